@@ -0,0 +1,90 @@
+"""
+Benchmark bulk search scaling with the number of processes.
+
+The API is replaced with a memory transport returning a prepared body, so only
+validation and deserialization cost is measured. Run from the repository root::
+
+    python benchmarks/bulk_processes.py --nips 30000
+"""
+import argparse
+import json
+import random
+import time
+
+from vater import Client
+from vater.request_types import RawResponse
+from vater.testing import make_nip
+from vater.transports import MemoryTransport
+
+
+def stub_response() -> RawResponse:
+    """Return stub response with 30 subjects."""
+    company = {
+        "companyName": "Moby Dick Inc",
+        "firstName": "sir Richard",
+        "lastName": "Lion Heart",
+        "nip": "0" * 10,
+        "pesel": "7" * 11,
+    }
+    subject = {
+        "name": "Eminem",
+        "nip": "0" * 10,
+        "statusVat": "Czynny",
+        "regon": "0" * 9,
+        "pesel": None,
+        "krs": "6" * 10,
+        "residenceAddress": "8 mile",
+        "workingAddress": "8 mile",
+        "representatives": [company],
+        "authorizedClerks": [company],
+        "partners": [company],
+        "registrationLegalDate": "2001-01-01",
+        "registrationDenialBasis": None,
+        "registrationDenialDate": None,
+        "restorationBasis": None,
+        "restorationDate": "2003-03-03",
+        "removalBasis": None,
+        "removalDate": None,
+        "accountNumbers": ["1" * 26, "2" * 26],
+        "hasVirtualAccounts": False,
+    }
+
+    return RawResponse(
+        json.dumps(
+            {"result": {"subjects": [subject] * 30, "requestId": "aa111-aa111aaa"}}
+        ).encode()
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nips", type=int, default=30000)
+    parser.add_argument("--processes", type=int, nargs="+", default=[0, 1, 4, 16])
+    args = parser.parse_args()
+
+    generator = random.Random()
+    nips = [make_nip(generator) for _ in range(args.nips)]
+    response = stub_response()
+    client = Client(
+        base_url="http://localhost",
+        transport=MemoryTransport(handler=lambda url: response),
+    )
+
+    for processes in args.processes:
+        start = time.perf_counter()
+        batches = sum(
+            1
+            for _ in client.search_nips_bulk(
+                nips, date="2001-01-01", processes=processes or None
+            )
+        )
+        elapsed = time.perf_counter() - start
+        print(  # noqa: T001
+            f"processes={processes or 'none':>4} batches={batches} "
+            f"time={elapsed:.2f}s nips/s={args.nips / elapsed:,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark subject serialization size and speed.
+
+Compares the binary codec with pickle and JSON of the subject fields. Run from
+the repository root::
+
+    python benchmarks/codec.py --subjects 10000
+"""
+
+import argparse
+import dataclasses
+import json
+import pickle
+import time
+from typing import Callable, List, Tuple
+
+from vater import codec
+from vater.models import Subject
+from vater.request_types import load_subjects
+from vater.testing import StubRegister, generate
+
+
+def make_subjects(count: int) -> List[Subject]:
+    """Return distinct generated subjects."""
+    records = generate(count, seed=0)
+    response = StubRegister([]).respond(
+        {"subjects": [record.subject for record in records]}
+    )
+    subjects, _ = load_subjects(response.content, True)
+    return subjects  # type: ignore
+
+
+def json_dumps(subjects: List[Subject]) -> bytes:
+    """Serialize subjects fields to JSON."""
+    return json.dumps(
+        [dataclasses.asdict(subject) for subject in subjects], default=str
+    ).encode()
+
+
+def json_loads(data: bytes) -> List[dict]:
+    """Deserialize subjects fields from JSON, without building the models."""
+    return json.loads(data)
+
+
+def measure(
+    dumps: Callable[[List[Subject]], bytes],
+    loads: Callable[[bytes], object],
+    subjects: List[Subject],
+    repeat: int,
+) -> Tuple[int, float, float]:
+    """Return size and the best encoding and decoding times."""
+    encoding, decoding = [], []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = dumps(subjects)
+        encoded = time.perf_counter()
+        loads(data)
+        encoding.append(encoded - start)
+        decoding.append(time.perf_counter() - encoded)
+
+    return len(data), min(encoding), min(decoding)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subjects", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    subjects = make_subjects(args.subjects)
+    formats = {
+        "codec": (codec.dumps_many, codec.loads_many),
+        "pickle": (pickle.dumps, pickle.loads),
+        "json": (json_dumps, json_loads),
+    }
+
+    for name, (dumps, loads) in formats.items():
+        size, encoding, decoding = measure(dumps, loads, subjects, args.repeat)
+        print(  # noqa: T001
+            f"{name:>6} bytes/subject={size / args.subjects:,.0f} "
+            f"dumps={encoding * 1000:.0f}ms loads={decoding * 1000:.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
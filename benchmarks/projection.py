@@ -0,0 +1,69 @@
+"""
+Benchmark loading of the projected subject fields.
+
+Compares CPU time and peak memory of deserializing a large `search_accounts`
+response with all fields and with the `status_vat` and `account_numbers`
+projection. Run from the repository root::
+
+    python benchmarks/projection.py --subjects 10000
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Optional, Tuple
+
+from vater.request_types import load_subjects
+from vater.testing import StubRegister, generate
+
+FIELDS = ("status_vat", "account_numbers")
+
+
+def make_response(count: int) -> bytes:
+    """Return search response body with distinct generated subjects."""
+    records = generate(count, seed=0)
+    response = StubRegister([]).respond(
+        {"subjects": [record.subject for record in records]}
+    )
+    return response.content
+
+
+def measure(
+    content: bytes, fields: Optional[Tuple[str, ...]], repeat: int
+) -> Tuple[float, int, int]:
+    """Return the best loading time, memory kept by the subjects and peak memory."""
+    times = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load_subjects(content, True, fields)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    subjects = load_subjects(content, True, fields)
+    kept, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del subjects
+
+    return min(times), kept, peak
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subjects", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    content = make_response(args.subjects)
+
+    for name, fields in (("all", None), ("projected", FIELDS)):
+        elapsed, kept, peak = measure(content, fields, args.repeat)
+        print(  # noqa: T001
+            f"{name:>9} load={elapsed * 1000:.0f}ms "
+            f"kept={kept / 2 ** 20:.1f}MiB peak={peak / 2 ** 20:.1f}MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
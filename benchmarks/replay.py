@@ -0,0 +1,141 @@
+"""
+Benchmark the whole client pipeline offline by replaying a recorded cassette.
+
+The workload searches batches of nips and single nips with the client methods,
+so the decorator, validators and response loading are measured. Interactions
+are recorded once, from a stub API by default or from the API at ``--base-url``
+with ``--live``, and replayed deterministically. Run from the repository root::
+
+    python benchmarks/replay.py --cassette /tmp/vater.json.gz --nips 3000
+    python benchmarks/replay.py --cassette /tmp/vater.json.gz --replay-only --speed 1
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import List
+
+from vater import Client
+from vater.request_types import RawResponse
+from vater.testing import make_nip
+from vater.transports import (
+    MemoryTransport,
+    RecordingTransport,
+    ReplayTransport,
+    RequestsTransport,
+    Transport,
+)
+
+DATE = "2001-01-01"
+
+
+def make_nips(count: int, seed: int) -> List[str]:
+    """Return the same random nips with valid checksums for the seed."""
+    generator = random.Random(seed)
+    return [make_nip(generator) for _ in range(count)]
+
+
+def stub_handler(url: str) -> RawResponse:
+    """Return a subject for every searched nip."""
+    values = url.split("/")[-1].split("?")[0].split(",")
+    subjects = [
+        {
+            "name": f"Eminem {nip}",
+            "nip": nip,
+            "statusVat": "Czynny",
+            "regon": "0" * 9,
+            "pesel": None,
+            "krs": "6" * 10,
+            "residenceAddress": "8 mile",
+            "workingAddress": None,
+            "representatives": [],
+            "authorizedClerks": [],
+            "partners": [],
+            "registrationLegalDate": "2001-01-01",
+            "registrationDenialBasis": None,
+            "registrationDenialDate": None,
+            "restorationBasis": None,
+            "restorationDate": None,
+            "removalBasis": None,
+            "removalDate": None,
+            "accountNumbers": ["1" * 26, "2" * 26],
+            "hasVirtualAccounts": False,
+        }
+        for nip in values
+    ]
+    result: dict = {"requestId": "aa111-aa111aaa"}
+    if "/nips/" in url:
+        result["subjects"] = subjects
+    else:
+        result["subject"] = subjects[0]
+
+    return RawResponse(json.dumps({"result": result}).encode())
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Return the value below which the given fraction of values lies."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_workload(
+    transport: Transport, base_url: str, nips: List[str], singles: int
+) -> List[float]:
+    """Send the workload through the client and return latency of every call."""
+    client = Client(base_url=base_url, transport=transport)
+    latencies = []
+
+    for start in range(0, len(nips), 30):
+        result = client.search_nips(nips[start : start + 30], date=DATE)
+        latencies.append(result.latency)
+
+    for nip in nips[:singles]:
+        latencies.append(client.search_nip(nip, date=DATE).latency)
+
+    return latencies
+
+
+def main() -> None:
+    """Record the cassette if needed and replay it."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cassette", required=True)
+    parser.add_argument("--nips", type=int, default=3000)
+    parser.add_argument("--singles", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base-url", default="https://wl-test.mf.gov.pl")
+    parser.add_argument("--live", action="store_true")
+    parser.add_argument("--replay-only", action="store_true")
+    parser.add_argument("--speed", type=float)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    nips = make_nips(args.nips, args.seed)
+
+    if not args.replay_only:
+        inner: Transport = (
+            RequestsTransport() if args.live else MemoryTransport(handler=stub_handler)
+        )
+        recording = RecordingTransport(inner, args.cassette)
+        run_workload(recording, args.base_url, nips, args.singles)
+        recording.close()
+
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        latencies = run_workload(
+            ReplayTransport(args.cassette, speed=args.speed),
+            args.base_url,
+            nips,
+            args.singles,
+        )
+        elapsed = time.perf_counter() - start
+        print(  # noqa: T001
+            f"calls={len(latencies)} time={elapsed:.2f}s "
+            f"calls/s={len(latencies) / elapsed:,.0f} "
+            f"p50={percentile(latencies, 0.5) * 1000:.2f}ms "
+            f"p99={percentile(latencies, 0.99) * 1000:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
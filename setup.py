@@ -36,7 +36,11 @@ setup(
     packages=find_packages("src"),
     python_requires=">=3.7",
     install_requires=requirements,
-    extras_require={"dev": requirements_dev},
+    extras_require={
+        "dev": requirements_dev,
+        "httpx": ["httpx[http2]>=0.18"],
+        "aiohttp": ["aiohttp>=3.6"],
+    },
     include_package_data=True,
     classifiers=[
         "Development Status :: 3 - Alpha",
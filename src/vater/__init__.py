@@ -1,5 +1,33 @@
 """vater package."""
-from vater.client import Client
-from vater.models import Company, CompanySchema, Subject, SubjectSchema
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from vater.client import Client
+    from vater.models import Company, Subject
+    from vater.schemas import CompanySchema, SubjectSchema
 
 __all__ = ["Client", "Company", "CompanySchema", "Subject", "SubjectSchema"]
+
+# public attributes are imported on first access (PEP 562), so importing
+# the package, e.g. by the CLI, doesn't import requests and marshmallow
+ATTRIBUTE_MODULES = {
+    "Client": "vater.client",
+    "Company": "vater.models",
+    "CompanySchema": "vater.schemas",
+    "Subject": "vater.models",
+    "SubjectSchema": "vater.schemas",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import public attribute on first access."""
+    if name in ATTRIBUTE_MODULES:
+        return getattr(importlib.import_module(ATTRIBUTE_MODULES[name]), name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    """Return module attributes including lazily imported ones."""
+    return sorted({*globals(), *__all__})
@@ -1,10 +1,10 @@
 """API request decorator module."""
 import functools
 import inspect
-from typing import Callable, List, Optional, Tuple, Type, Union
+from typing import Callable, Optional, Type, Union
 
-from vater.models import Subject
-from vater.request_types import RequestType
+from vater.request_types import RawResponse, RequestType
+from vater.results import Result
 
 
 def api_request(
@@ -14,8 +14,12 @@ def api_request(
     validators: Optional[dict] = None,
     **kwargs
 ) -> Callable:
-    """Initialize request handler."""
-    handler = handler_class(url_pattern=url_pattern, validators=validators, **kwargs)
+    """Initialize request handler factory."""
+    # handler keeps per call state, so a new one is created for every call
+    # to allow using the client from multiple threads
+    handler_factory = functools.partial(
+        handler_class, url_pattern=url_pattern, validators=validators, **kwargs
+    )
 
     def decorator_api_request(func: Callable) -> Callable:
         """Allow passing arguments."""
@@ -23,7 +27,7 @@ def api_request(
         @functools.wraps(func)
         def wrapper_api_request(
             *args: tuple, **kwargs: dict
-        ) -> Union[Tuple[bool, str], Tuple[Union[Subject, List[Subject]], str]]:
+        ) -> Union[dict, RawResponse, Result]:
             """Return handler result."""
             arg_spec = inspect.getfullargspec(func)
 
@@ -42,10 +46,13 @@ def api_request(
                 if param not in kwargs and param != "self":
                     params[param] = arg_spec.kwonlydefaults[param]
 
+            handler = handler_factory()
             handler.register_params(**params)
 
             return handler.result()
 
+        wrapper_api_request.handler_factory = handler_factory  # type: ignore
+        wrapper_api_request.url_pattern = url_pattern  # type: ignore
         return wrapper_api_request
 
     return decorator_api_request
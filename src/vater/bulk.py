@@ -0,0 +1,611 @@
+"""Bulk requests module."""
+import contextlib
+import datetime
+import functools
+import inspect
+import itertools
+import json
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
+
+from vater.cancellation import POLL_INTERVAL, CancellationToken
+from vater.dedup import DedupStats, batches_needed, deduplicate
+from vater.errors import IDENTIFIER_CODES, InvalidRequestData
+from vater.models import Subject
+from vater.negative_cache import NegativeCache, NegativeEntry
+from vater.request_types import SearchRequest, load_subjects
+from vater.results import INPUT_FIELDS, Result, match_inputs
+from vater.validators import (
+    account_validator,
+    date_validator,
+    fields_validator,
+    nip_validator,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def chunks(values: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Split values into lists of given size."""
+    iterator = iter(values)
+    chunk = list(itertools.islice(iterator, size))
+
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(iterator, size))
+
+
+def bounded_map(
+    function: Callable[[T], R],
+    values: Iterable[T],
+    executor: Optional[Executor] = None,
+    window: int = 1,
+    token: Optional[CancellationToken] = None,
+) -> Iterator[R]:
+    """
+    Map values lazily keeping at most `window` tasks submitted to the executor.
+
+    Results are yielded in the order of values. If no executor is given, function
+    is called in the current thread. Tasks which haven't started yet are cancelled
+    when the iterator is closed early or the `token` is cancelled, running ones
+    aren't waited for then.
+    """
+    if executor is None:
+        yield from map(function, values)
+        return
+
+    futures: Deque[Future] = deque()
+
+    try:
+        for value in values:
+            futures.append(executor.submit(function, value))
+
+            if len(futures) >= window:
+                yield wait_result(futures.popleft(), token)
+
+        while futures:
+            yield wait_result(futures.popleft(), token)
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def wait_result(future: Future, token: Optional[CancellationToken]) -> Any:
+    """Wait for the result of the future, raising `Cancelled` if the token is."""
+    if token is not None:
+        while not wait([future], POLL_INTERVAL).done:
+            token.check()
+
+    return future.result()
+
+
+@contextlib.contextmanager
+def thread_pool(
+    max_workers: int, token: Optional[CancellationToken] = None
+) -> Iterator[ThreadPoolExecutor]:
+    """
+    Create thread pool which isn't waited for once the token is cancelled.
+
+    Requests still in flight are abandoned and finish in the background within
+    the transport timeout, so the caller gets its capacity back right away.
+    """
+    threads = ThreadPoolExecutor(max_workers)
+    try:
+        yield threads
+    finally:
+        threads.shutdown(wait=token is None or not token.cancelled)
+
+
+def job_cancellation(client: Any, token: Optional[CancellationToken]) -> ContextManager:
+    """Return context sending client requests of the current thread with the token."""
+    if token is None:
+        return contextlib.nullcontext()
+
+    return client.cancellation(token)
+
+
+def validate_chunk(validators: List[Callable], values: List[str]) -> List[str]:
+    """Validate chunk of values with all given validators."""
+    for validator in validators:
+        values = list(validator(values))
+
+    return values
+
+
+def load_chunk(
+    many: bool, contents: List[bytes], fields: Optional[Tuple[str, ...]] = None
+) -> List[Tuple[Union[List[Subject], Optional[Subject]], str]]:
+    """Deserialize chunk of response bodies."""
+    return [load_subjects(content, many, fields) for content in contents]
+
+
+def bisect_batch(
+    send: Callable[[List[str]], T], batch: List[str]
+) -> Tuple[List[T], Dict[str, InvalidRequestData]]:
+    """
+    Send the batch, splitting it in halves while the API rejects its identifiers.
+
+    Every rejected identifier is isolated with a number of requests logarithmic
+    in the batch size. Errors not caused by a single identifier are raised.
+
+    :param send: function sending request for values
+    :param batch: values to search
+    :return: results of the requests for accepted values and error of every
+             rejected one
+    """
+    if not batch:
+        return [], {}
+
+    try:
+        return [send(batch)], {}
+    except InvalidRequestData as error:
+        if error.code not in IDENTIFIER_CODES:
+            raise
+
+        if len(batch) == 1:
+            return [], {batch[0]: error}
+
+    middle = len(batch) // 2
+    left, left_errors = bisect_batch(send, batch[:middle])
+    right, right_errors = bisect_batch(send, batch[middle:])
+    return left + right, {**left_errors, **right_errors}
+
+
+def merge_contents(contents: List[bytes]) -> Tuple[bytes, List[str]]:
+    """
+    Merge many values search response bodies of a bisected batch.
+
+    :param contents: response bodies
+    :return: response body with subjects of all bodies and request ids of the bodies
+    """
+    results = [json.loads(content)["result"] for content in contents]
+    request_ids = [result["requestId"] for result in results]
+
+    if len(contents) == 1:
+        return contents[0], request_ids
+
+    subjects = [subject for result in results for subject in result["subjects"]]
+    body = {"subjects": subjects, "requestId": request_ids[0] if results else ""}
+    return json.dumps({"result": body}).encode(), request_ids
+
+
+class Fetched(NamedTuple):
+    """Response body of a batch with the request metadata."""
+
+    batch: List[str]
+    # position and value of every given value answered by the batch
+    positions: List[Tuple[int, str]]
+    content: bytes
+    latency: float
+    from_cache: bool
+    request_ids: List[str]
+    errors: Dict[str, InvalidRequestData]
+    # values answered by the negative cache
+    known: Set[str]
+
+
+def unique_batches(
+    validated: Iterable[List[str]], stats: DedupStats, limit: int
+) -> Iterator[Tuple[List[str], List[Tuple[int, str]]]]:
+    """
+    Split values into batches of values not searched yet, keeping their positions.
+
+    Repeated values are left out of the batches and counted in `stats`, while
+    their positions are kept with the batch filled when they are given, so every
+    given position is answered by one of the batches.
+
+    :param validated: chunks of validated values
+    :param stats: counters the duplicates are added to
+    :param limit: maximal number of values in a single request
+    :return: iterator of values to search and position and value of every value
+             given since the previous batch
+    """
+    seen: Set[str] = set()
+    inputs = unique = saved = 0
+    batch: List[str] = []
+    positions: List[Tuple[int, str]] = []
+
+    for chunk in validated:
+        new = [value for value in deduplicate(chunk) if value not in seen]
+        seen.update(new)
+        unique += len(new)
+        total_saved = batches_needed(inputs + len(chunk), limit) - batches_needed(
+            unique, limit
+        )
+        stats.record(len(chunk), len(new), total_saved - saved)
+        saved = total_saved
+        fresh = set(new)
+
+        for position, value in enumerate(chunk, inputs):
+            if value in fresh:
+                fresh.remove(value)
+                # full batch is held back, so trailing repeats are answered by it
+                if len(batch) == limit:
+                    yield batch, positions
+                    batch, positions = [], []
+
+                batch.append(value)
+
+            positions.append((position, value))
+
+        inputs += len(chunk)
+
+    if positions:
+        yield batch, positions
+
+
+def fetch_batch(
+    send: Callable[[List[str]], Tuple[bytes, bool]],
+    batch: Tuple[List[str], List[Tuple[int, str]]],
+    *,
+    negative_cache: Optional[NegativeCache],
+    date: str,
+) -> Fetched:
+    """
+    Send requests for the batch, leaving out the values known to be missing.
+
+    :param send: function sending request for values and returning response body
+                 with the flag indicating if it was cached
+    :param batch: values to search with the positions of the given values
+    :param negative_cache: cache of the identifiers rejected by the API
+    :param date: date data is acquired from
+    :return: response body of the accepted values with the request metadata
+    """
+    start = time.perf_counter()
+    values, positions = batch
+    known: Dict[str, NegativeEntry] = {}
+
+    if negative_cache is not None:
+        for value in values:
+            entry = negative_cache.get(value, date)
+            if entry is not None:
+                known[value] = entry
+
+    errors = {
+        value: entry.error for value, entry in known.items() if entry.error is not None
+    }
+    sent, rejected = bisect_batch(
+        send, [value for value in values if value not in known]
+    )
+
+    if negative_cache is not None:
+        for value, error in rejected.items():
+            negative_cache.add(value, date, error)
+
+    content, request_ids = merge_contents([content for content, _ in sent])
+    return Fetched(
+        values,
+        positions,
+        content,
+        time.perf_counter() - start,
+        all(from_cache for _, from_cache in sent),
+        request_ids,
+        {**errors, **rejected},
+        set(known),
+    )
+
+
+def batch_result(
+    client: Any,
+    batch: Fetched,
+    subjects: Union[List[Subject], Optional[Subject]],
+    request_id: str,
+    param: str,
+    date: str,
+    answers: Dict[str, Any],
+) -> Result:
+    """
+    Make result of the fetched batch, remembering values which weren't found.
+
+    :param client: vat register client
+    :param batch: fetched batch
+    :param subjects: subjects of the batch
+    :param request_id: request id of the batch
+    :param param: name of the search parameter, e.g. `nips`
+    :param date: date data is acquired from
+    :param answers: subject and error of every value of the previous batches,
+                    updated with the values of this one
+    :return: result answering every position of the batch
+    """
+    by_input = match_inputs(subjects, batch.batch, param)  # type: ignore
+    errors = dict(batch.errors)
+    answers.update(
+        (value, (found, errors.get(value))) for value, found in by_input.items()
+    )
+
+    # repeats of the values searched in the previous batches
+    for _, value in batch.positions:
+        if value not in by_input:
+            by_input[value], error = answers[value]
+            if error is not None:
+                errors[value] = error
+
+    result = Result(
+        subjects,
+        request_id,
+        by_input=by_input,
+        inputs=[value for _, value in batch.positions],
+        positions=[position for position, _ in batch.positions],
+        latency=batch.latency,
+        from_cache=batch.from_cache,
+        batch_ids=batch.request_ids,
+        date=date,
+        errors=errors,  # type: ignore
+    )
+
+    if client.negative_cache is not None:
+        for value in (set(result.missing) & set(batch.batch)) - batch.known:
+            client.negative_cache.add_absent(value, date, request_id)
+
+    return result
+
+
+def process_pool(processes: Optional[int]) -> ContextManager[Optional[Executor]]:
+    """Return process pool context manager or an empty one if not requested."""
+    if processes is None:
+        return contextlib.nullcontext()
+
+    # imports multiprocessing, so it's deferred until a pool is requested
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(processes)
+
+
+def search_bulk(
+    method: Callable,
+    values: Iterable[str],
+    *,
+    date: Optional[Union[datetime.date, str]] = None,
+    max_workers: int = 4,
+    processes: Optional[int] = None,
+    chunksize: int = 8,
+    fields: Optional[Iterable[str]] = None,
+    token: Optional[CancellationToken] = None,
+) -> Iterator[Result]:
+    """
+    Yield results of the many values search method for any number of values.
+
+    Values are split into batches of the maximal size allowed by the API. Requests
+    are sent from a thread pool, while validation and response deserialization are
+    done in the calling process or, if `processes` is given, in a process pool.
+    Process pool tasks handle `chunksize` batches at once to limit pickling overhead.
+    Values are normalized and searched once, repeated values are left out
+    of the batches and counted in the client `dedup_stats`. Every given position,
+    including the repeats, is answered by one of the results: `positions` holds
+    the positions and `per_input` the values of the result, so answers of
+    the searched values are kept until the search ends. Batches rejected because
+    of invalid identifiers are bisected, so the other values are still found and
+    the rejected ones are reported in the result `errors` and kept in the client
+    negative cache. Once the `token` is cancelled, no more batches
+    are sent, batches in flight are abandoned and `Cancelled` is raised.
+
+    :param method: client many values search method, e.g. `client.search_nips`
+    :param values: values to search
+    :param date: date data is acquired from
+    :param max_workers: number of threads sending requests
+    :param processes: number of processes validating and deserializing data
+    :param chunksize: number of batches handled by a single process pool task
+    :param fields: names of the only subject fields loaded, all by default
+    :param token: cancellation token of the job, by default the one of the calling
+                  thread requests
+    :return: iterator of subjects and request id result for every batch
+    """
+    client: Any = method.__self__  # type: ignore
+    token = client.current_token if token is None else token
+    handler_factory: Callable = method.handler_factory  # type: ignore
+    param = next(iter(inspect.signature(method).parameters))
+    handler = handler_factory()
+    validated_date = date_validator(datetime.date.today() if date is None else date)
+    projection = fields_validator(fields)
+    if projection is not None:
+        # searched values are matched with the subjects by this field
+        projection = tuple({*projection, INPUT_FIELDS[param]})
+
+    def send(batch: List[str]) -> Tuple[bytes, bool]:
+        """Send request for validated batch of values."""
+        batch_handler = handler_factory()
+        batch_handler.register_params(
+            client=client, **{param: batch, "date": validated_date, "raw": True}
+        )
+        # values are validated before being split into batches
+        batch_handler.validated_params = batch_handler.params
+        batch_handler.lane = "bulk"
+        batch_handler.token = token
+        content = batch_handler.fetch()
+        return content, batch_handler.from_cache
+
+    with thread_pool(max_workers, token) as threads, process_pool(processes) as pool:
+        window = 2 * (processes or 1)
+        validated = bounded_map(
+            functools.partial(validate_chunk, handler.validators[param]),
+            chunks(values, handler.PARAM_LIMIT * chunksize),
+            pool,
+            window,
+        )
+        batches = unique_batches(validated, client.dedup_stats, handler.PARAM_LIMIT)
+        fetch = functools.partial(
+            fetch_batch,
+            send,
+            negative_cache=client.negative_cache,
+            date=validated_date,
+        )
+        fetched = bounded_map(fetch, batches, threads, 2 * max_workers, token)
+        # only bodies are sent to the process pool, metadata waits for them here
+        fetched_chunks: Deque[List[Fetched]] = deque()
+        answers: Dict[str, Any] = {}
+
+        def content_chunks() -> Iterator[List[bytes]]:
+            """Yield chunks of response bodies keeping their metadata."""
+            for chunk in chunks(fetched, chunksize):
+                fetched_chunks.append(chunk)
+                yield [batch.content for batch in chunk]
+
+        for results in bounded_map(
+            functools.partial(load_chunk, handler.many, fields=projection),
+            content_chunks(),
+            pool,
+            window,
+        ):
+            for batch, (subjects, request_id) in zip(fetched_chunks.popleft(), results):
+                # batches fetched before the cancellation aren't yielded either
+                if token is not None:
+                    token.check()
+
+                if client.index is not None and projection is None:
+                    client.index.add(subjects, validated_date, request_id)
+
+                yield batch_result(
+                    client, batch, subjects, request_id, param, validated_date, answers
+                )
+
+
+def check_nips_history(
+    client: Any,
+    checks: Iterable[Tuple[str, str, Optional[Union[datetime.date, str]]]],
+    *,
+    max_workers: int = 4,
+    token: Optional[CancellationToken] = None,
+) -> List[Result]:
+    """
+    Check if accounts were assigned to the subjects with given nips on given dates.
+
+    Distinct nips are fetched with `search_nips` once per date, in batches of
+    the maximal size allowed by the API, and all checks are answered from
+    the subjects account numbers. Only accounts of subjects having virtual accounts
+    which are not listed are checked with `check_nip`.
+
+    :param client: vat register client
+    :param checks: nip, account and date of every check
+    :param max_workers: number of threads sending requests
+    :param token: cancellation token of the job, by default the one of the calling
+                  thread requests
+    :return: check result and request id result for every check
+    """
+    token = client.current_token if token is None else token
+    validated = [
+        (
+            nip_validator(nip),
+            account_validator(account),
+            date_validator(datetime.date.today() if date is None else date),
+        )
+        for nip, account, date in checks
+    ]
+
+    nips_by_date: Dict[str, Set[str]] = {}
+    for nip, _, date in validated:
+        nips_by_date.setdefault(date, set()).add(nip)
+
+    tasks = [
+        (date, batch)
+        for date, nips in nips_by_date.items()
+        for batch in chunks(sorted(nips), SearchRequest.PARAM_LIMIT)
+    ]
+
+    def search(task: Tuple[str, List[str]]) -> Result:
+        """Search batch of nips for the date."""
+        date, batch = task
+        with client.lane("bulk"), job_cancellation(client, token):
+            return client.search_nips(batch, date=date)
+
+    distinct = list(dict.fromkeys(validated))
+    found: Dict[Tuple[str, str], Result] = {}
+    with thread_pool(max_workers, token) as threads:
+        for (date, batch), result in zip(
+            tasks, bounded_map(search, tasks, threads, 2 * max_workers, token)
+        ):
+            found.update({(date, nip): result for nip in batch})
+
+        answered = check_unlisted(
+            client,
+            [
+                listed_result(nip, account, found[date, nip])
+                for nip, account, date in distinct
+            ],
+            distinct,
+            threads,
+            2 * max_workers,
+            token,
+        )
+
+    results = dict(zip(distinct, answered))
+    return [results[check] for check in validated]
+
+
+def listed_result(nip: str, account: str, search_result: Result) -> Optional[Result]:
+    """
+    Check if the account is assigned to the subject found by the nips search.
+
+    :param nip: nip number of the subject
+    :param account: account number
+    :param search_result: result of the nips search the nip was searched by
+    :return: check result and request id result of the check, None if the account
+             may be an unlisted virtual account and has to be checked with the API
+    """
+    result = search_result.for_input(nip)
+    subject: Optional[Subject] = result.value
+    assigned = subject is not None and account in (subject.account_numbers or ())
+
+    # virtual accounts of the subject aren't listed
+    if subject is not None and subject.has_virtual_accounts and not assigned:
+        return None
+
+    result.value = assigned
+    result.by_input = {nip: assigned}
+    return result
+
+
+def check_unlisted(
+    client: Any,
+    results: List[Optional[Result]],
+    checks: Sequence[Tuple[str, Optional[str], str]],
+    executor: Executor,
+    window: int,
+    token: Optional[CancellationToken] = None,
+) -> List[Result]:
+    """
+    Send `check_nip` requests for the checks which weren't answered concurrently.
+
+    Checks are part of a bulk job, so they are sent in the bulk lane.
+
+    :param client: vat register client
+    :param results: result of every check, None if it has to be sent
+    :param checks: nip, account and date of every check
+    :param executor: executor sending the checks
+    :param window: maximal number of checks submitted at once
+    :param token: cancellation token of the job
+    :return: result of every check
+    """
+    missing = [index for index, result in enumerate(results) if result is None]
+
+    def check(index: int) -> Result:
+        """Check the account with the API."""
+        nip, account, date = checks[index]
+        with client.lane("bulk"), job_cancellation(client, token):
+            return client.check_nip(nip, account, date=date)
+
+    for index, result in zip(
+        missing, bounded_map(check, missing, executor, window, token)
+    ):
+        results[index] = result
+
+    return cast(List[Result], results)
@@ -0,0 +1,126 @@
+"""Response cache module."""
+import datetime
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# endpoint, identifier and date of the request
+CacheKey = Tuple[str, str, str]
+
+
+def next_refresh(
+    refresh_time: datetime.time, now: Optional[datetime.datetime] = None
+) -> float:
+    """
+    Get timestamp of the next daily register refresh.
+
+    :param refresh_time: local time the register is refreshed at
+    :param now: current time, by default `datetime.datetime.now()`
+    :return: timestamp of the next refresh
+    """
+    now = datetime.datetime.now() if now is None else now
+    refresh = datetime.datetime.combine(now.date(), refresh_time)
+
+    if refresh <= now:
+        refresh += datetime.timedelta(days=1)
+
+    return refresh.timestamp()
+
+
+class Cache(ABC):
+    """
+    Base class for all response caches.
+
+    Cached response bodies are invalidated at the register's daily refresh.
+    """
+
+    def __init__(self, refresh_time: datetime.time = datetime.time(0)) -> None:
+        """
+        Initialize refresh time.
+
+        :param refresh_time: local time the register is refreshed at
+        """
+        self.refresh_time = refresh_time
+
+    @abstractmethod
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        """Return cached response body or None if it's missing or expired."""
+
+    @abstractmethod
+    def set(self, key: CacheKey, value: bytes) -> None:
+        """Store response body until the next register refresh."""
+
+    def get_stale(self, key: CacheKey) -> Optional[Tuple[str, bytes]]:
+        """
+        Return last known response body for the endpoint and identifier of the key.
+
+        The body may be expired and fetched for any date. Caches not keeping expired
+        entries return None.
+
+        :param key: cache key of the request
+        :return: date and body of the last stored response or None
+        """
+        return None
+
+
+class MemoryCache(Cache):
+    """
+    In-process least recently used response cache.
+
+    Expired entries are kept until evicted, so they may be served as stale.
+    """
+
+    def __init__(
+        self, maxsize: int = 10000, refresh_time: datetime.time = datetime.time(0)
+    ) -> None:
+        """
+        Initialize empty cache.
+
+        :param maxsize: maximal number of cached responses
+        :param refresh_time: local time the register is refreshed at
+        """
+        super().__init__(refresh_time)
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[CacheKey, Tuple[float, bytes]]" = OrderedDict()
+        # key of the last stored response for every endpoint and identifier
+        self._latest: Dict[Tuple[str, str], CacheKey] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return number of cached responses."""
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        """Return cached response body or None if it's missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] <= time.time():
+                return None
+
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: CacheKey, value: bytes) -> None:
+        """Store response body until the next register refresh."""
+        with self._lock:
+            self._entries[key] = next_refresh(self.refresh_time), value
+            self._entries.move_to_end(key)
+            self._latest[key[:2]] = key
+
+            while len(self._entries) > self.maxsize:
+                evicted, _ = self._entries.popitem(last=False)
+                if self._latest.get(evicted[:2]) == evicted:
+                    del self._latest[evicted[:2]]
+
+    def get_stale(self, key: CacheKey) -> Optional[Tuple[str, bytes]]:
+        """Return last known response body for the endpoint and identifier."""
+        with self._lock:
+            latest = self._latest.get(key[:2])
+
+            if latest is None:
+                return None
+
+            return latest[2], self._entries[latest][1]
@@ -0,0 +1,97 @@
+"""Deadlines and cancellation module."""
+import threading
+import time
+from typing import Any, Awaitable, Optional
+
+from vater.errors import Cancelled, DeadlineExceeded
+
+# number of seconds between checks of a cancellation nothing is notified about
+POLL_INTERVAL = 0.05
+
+
+class CancellationToken:
+    """
+    Thread safe token cancelling the work it's passed to.
+
+    A token is cancelled explicitly with `cancel` or once its deadline passes.
+    Requests check the token during validation, while waiting in queues and
+    for rate limits, and bound the HTTP timeout by the time left.
+    """
+
+    def __init__(self, timeout: Optional[float] = None) -> None:
+        """
+        Initialize active token.
+
+        :param timeout: number of seconds until the deadline, no deadline by default
+        """
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        """Cancel the work using the token."""
+        self._event.set()
+
+    @property
+    def expired(self) -> bool:
+        """Check if the deadline passed."""
+        return self.deadline is not None and self.deadline <= time.monotonic()
+
+    @property
+    def cancelled(self) -> bool:
+        """Check if the token was cancelled or its deadline passed."""
+        return self._event.is_set() or self.expired
+
+    def remaining(self) -> Optional[float]:
+        """Get number of seconds left until the deadline, None if there is none."""
+        if self.deadline is None:
+            return None
+
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self) -> None:
+        """
+        Raise if the work should be stopped.
+
+        :raises DeadlineExceeded: if the deadline passed
+        :raises Cancelled: if the token was cancelled
+        """
+        if self.expired:
+            raise DeadlineExceeded("deadline exceeded")
+
+        if self._event.is_set():
+            raise Cancelled("cancelled")
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Sleep, waking up as soon as the token is cancelled.
+
+        :param seconds: number of seconds to sleep
+        :raises Cancelled: if the token is cancelled meanwhile
+        """
+        remaining = self.remaining()
+        self._event.wait(seconds if remaining is None else min(seconds, remaining))
+        self.check()
+
+    async def run(self, awaitable: Awaitable) -> Any:
+        """
+        Await the coroutine, cancelling it once the token is cancelled.
+
+        Lets coroutines, e.g. `AiohttpTransport.aget`, use the same tokens as
+        threads do.
+
+        :param awaitable: coroutine or future to await
+        :return: result of the awaitable
+        :raises Cancelled: if the token is cancelled first
+        """
+        import asyncio
+
+        task = asyncio.ensure_future(awaitable)
+
+        while not task.done():
+            await asyncio.wait({task}, timeout=POLL_INTERVAL)
+
+            if not task.done() and self.cancelled:
+                task.cancel()
+                self.check()
+
+        return task.result()
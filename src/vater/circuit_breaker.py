@@ -0,0 +1,125 @@
+"""Circuit breaker module."""
+import threading
+import time
+from typing import TYPE_CHECKING, Callable
+
+from vater.errors import ApiUnavailable
+
+if TYPE_CHECKING:
+    from vater.request_types import RawResponse
+
+# codes of 400 responses sent while the register is failing or being updated
+OUTAGE_CODES = {"WL-100", "WL-195", "WL-196"}
+
+
+def is_outage(response: "RawResponse") -> bool:
+    """Check if the response means that the API is failing."""
+    if response.status_code == 400:
+        return response.json().get("code") in OUTAGE_CODES
+
+    return response.status_code >= 500
+
+
+class CircuitBreaker:
+    """
+    Thread safe circuit breaker failing fast while the API is down.
+
+    After `failure_threshold` consecutive failures the circuit opens and requests
+    raise `ApiUnavailable` without being sent. Once `recovery_timeout` passes,
+    a single probe request is let through. The circuit closes if it succeeds
+    and opens again otherwise.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        """
+        Initialize closed circuit.
+
+        :param failure_threshold: number of consecutive failures opening the circuit
+        :param recovery_timeout: number of seconds before a probe request is sent
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def retry_after(self) -> float:
+        """Get number of seconds until a probe request is let through."""
+        return max(0.0, self._opened_at + self.recovery_timeout - time.monotonic())
+
+    def before_request(self) -> bool:
+        """
+        Raise error if the request shouldn't be sent.
+
+        :return: flag indicating if the request is the half-open probe
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+
+            if self.state == self.OPEN and self.retry_after == 0:
+                self.state = self.HALF_OPEN
+                return True
+
+        raise ApiUnavailable(self.retry_after)
+
+    def release_probe(self) -> None:
+        """
+        Let another probe through if the probe ended without an outcome.
+
+        Probes interrupted e.g. by a deadline say nothing about the API, so
+        the circuit opens again without waiting for the recovery timeout.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        """Count the failure and open the circuit if there are too many of them."""
+        with self._lock:
+            self.failures += 1
+
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def probe(self, function: Callable[[], object]) -> None:
+        """
+        Call the function in a background thread once a probe is let through.
+
+        Only one probe runs at a time and its errors are ignored, as they are
+        recorded by the request.
+
+        :param function: function sending the probe request
+        """
+        with self._lock:
+            if self._probing or self.state == self.CLOSED:
+                return
+
+            self._probing = True
+
+        def run() -> None:
+            """Wait for the recovery timeout and send the probe request."""
+            time.sleep(self.retry_after)
+            try:
+                function()
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._probing = False
+
+        threading.Thread(target=run, daemon=True).start()
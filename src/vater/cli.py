@@ -1,22 +1,45 @@
 """CLI module for vater."""
 import datetime
-from typing import Tuple
+from typing import IO, TYPE_CHECKING, Optional, Tuple
 
 import click
 
-from vater import Client
+if TYPE_CHECKING:
+    from vater.client import Client
+    from vater.request_types import RawResponse
 
 DATE_HELP_MESSAGE = "Date to search the data from"
 
 
+def echo_response(response: "RawResponse") -> None:
+    """Write the undecoded API response to stdout and exit with error on failure."""
+    click.echo(response.content)
+
+    if response.status_code != 200:
+        raise SystemExit(1)
+
+
 @click.group()
 @click.option(
     "--url", type=str, help="API base url", default="https://wl-api.mf.gov.pl"
 )
+@click.option("--no-daemon", is_flag=True, help="Don't use the running vater daemon")
 @click.pass_context
-def cli(ctx: click.Context, url: str) -> None:
+def cli(ctx: click.Context, url: str, no_daemon: bool) -> None:
     """Initialize a vater client object."""
-    ctx.obj = Client(base_url=url)
+    # generating datasets doesn't talk to the API
+    if ctx.invoked_subcommand == "generate":
+        return
+
+    # client is imported only when a command is run to keep `--help` fast
+    from vater.client import Client
+    from vater.daemon import find_daemon
+
+    daemon_url = None
+    if not no_daemon and ctx.invoked_subcommand != "serve":
+        daemon_url = find_daemon(url)
+
+    ctx.obj = Client(base_url=daemon_url or url)
 
 
 @cli.command(name="search-account")
@@ -25,9 +48,10 @@ def cli(ctx: click.Context, url: str) -> None:
     "-d", "--date", default=str(datetime.date.today()), help=DATE_HELP_MESSAGE
 )
 @click.pass_obj
-def search_account(client: Client, account: str, date: str) -> None:
+def search_account(client: "Client", account: str, date: str) -> None:
     """Search subjects with given account."""
-    click.echo(client.search_account(account=account, raw=True, date=date))
+    response = client.search_account(account=account, date=date, passthrough=True)
+    echo_response(response)
 
 
 @cli.command(name="search-accounts")
@@ -36,9 +60,10 @@ def search_account(client: Client, account: str, date: str) -> None:
     "-d", "--date", default=str(datetime.date.today()), help=DATE_HELP_MESSAGE
 )
 @click.pass_obj
-def search_accounts(client: Client, accounts: Tuple[str], date: str) -> None:
+def search_accounts(client: "Client", accounts: Tuple[str], date: str) -> None:
     """Search subjects with given accounts."""
-    click.echo(client.search_accounts(accounts, date=date, raw=True))
+    response = client.search_accounts(accounts, date=date, passthrough=True)
+    echo_response(response)
 
 
 @cli.command(name="search-nip")
@@ -47,9 +72,10 @@ def search_accounts(client: Client, accounts: Tuple[str], date: str) -> None:
     "-d", "--date", default=str(datetime.date.today()), help=DATE_HELP_MESSAGE
 )
 @click.pass_obj
-def search_nip(client: Client, nip: str, date: str) -> None:
+def search_nip(client: "Client", nip: str, date: str) -> None:
     """Search subjects with given nip."""
-    click.echo(client.search_nip(nip=nip, raw=True, date=date))
+    response = client.search_nip(nip=nip, date=date, passthrough=True)
+    echo_response(response)
 
 
 @cli.command(name="search-nips")
@@ -58,9 +84,10 @@ def search_nip(client: Client, nip: str, date: str) -> None:
     "-d", "--date", default=str(datetime.date.today()), help=DATE_HELP_MESSAGE
 )
 @click.pass_obj
-def search_nips(client: Client, nips: Tuple[str], date: str) -> None:
+def search_nips(client: "Client", nips: Tuple[str], date: str) -> None:
     """Search subjects with given nips."""
-    click.echo(client.search_nips(nips=nips, raw=True, date=date))
+    response = client.search_nips(nips=nips, date=date, passthrough=True)
+    echo_response(response)
 
 
 @cli.command(name="search-regon")
@@ -69,9 +96,10 @@ def search_nips(client: Client, nips: Tuple[str], date: str) -> None:
     "-d", "--date", default=str(datetime.date.today()), help=DATE_HELP_MESSAGE
 )
 @click.pass_obj
-def search_regon(client: Client, regon: str, date: str) -> None:
+def search_regon(client: "Client", regon: str, date: str) -> None:
     """Search subjects with given regon."""
-    click.echo(client.search_regon(regon=regon, raw=True, date=date))
+    response = client.search_regon(regon=regon, date=date, passthrough=True)
+    echo_response(response)
 
 
 @cli.command(name="search-regons")
@@ -80,9 +108,10 @@ def search_regon(client: Client, regon: str, date: str) -> None:
     "-d", "--date", default=str(datetime.date.today()), help=DATE_HELP_MESSAGE
 )
 @click.pass_obj
-def search_regons(client: Client, regons: Tuple[str], date: str) -> None:
+def search_regons(client: "Client", regons: Tuple[str], date: str) -> None:
     """Search subjects with given regons."""
-    click.echo(client.search_regons(regons=regons, raw=True, date=date))
+    response = client.search_regons(regons=regons, date=date, passthrough=True)
+    echo_response(response)
 
 
 @cli.command(name="check-nip")
@@ -92,9 +121,10 @@ def search_regons(client: Client, regons: Tuple[str], date: str) -> None:
     "-d", "--date", default=str(datetime.date.today()), help=DATE_HELP_MESSAGE
 )
 @click.pass_obj
-def check_nip(client: Client, nip: str, account: str, date: str) -> None:
+def check_nip(client: "Client", nip: str, account: str, date: str) -> None:
     """Check if given nip and account belongs to the same subject."""
-    click.echo(client.check_nip(nip=nip, account=account, date=date, raw=True))
+    response = client.check_nip(nip=nip, account=account, date=date, passthrough=True)
+    echo_response(response)
 
 
 @cli.command(name="check-regon")
@@ -104,9 +134,71 @@ def check_nip(client: Client, nip: str, account: str, date: str) -> None:
     "-d", "--date", default=str(datetime.date.today()), help=DATE_HELP_MESSAGE
 )
 @click.pass_obj
-def check_regon(client: Client, regon: str, account: str, date: str) -> None:
+def check_regon(client: "Client", regon: str, account: str, date: str) -> None:
     """Check if given regon and account belongs to the same subject."""
-    click.echo(client.check_regon(regon=regon, account=account, date=date, raw=True))
+    response = client.check_regon(
+        regon=regon, account=account, date=date, passthrough=True
+    )
+    echo_response(response)
+
+
+@cli.command(name="serve")
+@click.option("--host", default="127.0.0.1", help="Host to listen on")
+@click.option("--port", default=0, type=int, help="Port to listen on, random if 0")
+@click.option(
+    "--rate", type=float, default=None, help="Maximal number of API requests per second"
+)
+@click.option("--cache-size", default=10000, help="Maximal number of cached responses")
+@click.pass_obj
+def serve(
+    client: "Client", host: str, port: int, rate: Optional[float], cache_size: int
+) -> None:
+    """Run a daemon sharing connections, cache and rate limit between commands."""
+    from vater.serve import serve as run_daemon
+
+    run_daemon(client.base_url, host=host, port=port, rate=rate, cache_size=cache_size)
+
+
+@cli.command(name="generate")
+@click.argument("count", type=int)
+@click.option(
+    "-o", "--output", type=click.File("w"), default="-", help="Output file path"
+)
+@click.option(
+    "-f",
+    "--format",
+    "fmt",
+    type=click.Choice(["jsonl", "nips", "regons", "accounts"]),
+    default="jsonl",
+    help="Records or a single identifier per line",
+)
+@click.option("--seed", type=int, default=None, help="Seed of the dataset")
+@click.option("--duplicates", default=0.0, help="Fraction of repeated records")
+@click.option("--invalid", default=0.0, help="Fraction of invalid identifiers")
+@click.option(
+    "--virtual-accounts", default=0.1, help="Fraction of subjects with virtual accounts"
+)
+def generate(
+    count: int,
+    output: IO[str],
+    fmt: str,
+    seed: Optional[int],
+    duplicates: float,
+    invalid: float,
+    virtual_accounts: float,
+) -> None:
+    """Generate synthetic register dataset."""
+    from vater.testing import generate as generate_records
+    from vater.testing import write_dataset
+
+    records = generate_records(
+        count,
+        seed=seed,
+        duplicates=duplicates,
+        invalid=invalid,
+        virtual_accounts=virtual_accounts,
+    )
+    write_dataset(records, output, fmt)
 
 
 if __name__ == "__main__":
@@ -1,46 +1,206 @@
 """Vat register client module."""
+import contextlib
 import datetime
-from typing import Iterable, List, Optional, Tuple
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from vater.api_request import api_request
-from vater.models import Subject
+from vater.cancellation import CancellationToken
+from vater.dedup import DedupStats
 from vater.request_types import CheckRequest, SearchRequest
+from vater.results import Result
 from vater.validators import (
     account_validator,
     accounts_validator,
     date_validator,
+    fields_validator,
     nip_validator,
     nips_validator,
     regon_validator,
     regons_validator,
 )
 
+# optional features are imported where they are used, so commands creating
+# a client don't pay for their dependencies, e.g. sqlite3 and concurrent.futures
+if TYPE_CHECKING:
+    import requests
+
+    from vater.cache import Cache
+    from vater.circuit_breaker import CircuitBreaker
+    from vater.hedging import HedgingPolicy
+    from vater.index import AccountIndex
+    from vater.lanes import PriorityScheduler
+    from vater.negative_cache import NegativeCache
+    from vater.planner import Planner
+    from vater.prefetch import PrefetchJob
+    from vater.quota import QuotaLimiter
+    from vater.rate_limiter import RateLimiter
+    from vater.transports import Transport
+    from vater.watchlist import Watchlist
+
 
 class Client:
     """
     Vat register client class.
 
+    API methods return `Result`, which unpacks like the `(value, request_id)`
+    tuple and carries the result for every searched identifier, latency and cache
+    status of the request.
+
     Currently the API limits maximum number of requested subjects
     to 30, therefore if that number is exceeded MaximumParameterNumberExceeded
-    is raised.
+    is raised. Identifiers are normalized and duplicates are removed before
+    the limit is checked, `dedup_stats` counts the requests saved this way.
+
+    If an account index is given, subjects returned by search methods are added
+    to it and `search_account` and `check_nip` are answered from the index whenever
+    the data for the requested date is already known. `search_account` answered
+    this way only returns the subjects fetched so far.
+
+    Requests are sent through a single transport, which keeps connections to the API
+    open between calls. If a hedging policy is given, requests taking longer than
+    usual are sent again and the first response is used.
+
+    If a circuit breaker is given, requests fail fast with `ApiUnavailable` after
+    repeated API failures. With `serve_stale` set, the last known cached result
+    is returned flagged as stale instead while the API is down or the register
+    is being updated.
+
+    If a priority scheduler is given, checks are sent in the interactive lane,
+    bulk searches and checks, planned lookups and prefetching in the bulk lane
+    and other searches in the normal one, so interactive lookups jump the queue
+    of background batches. Use `lane` to send the requests of the current thread
+    in another lane.
     """
 
-    def __init__(self, base_url: str) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        index: Optional["AccountIndex"] = None,
+        cache: Optional["Cache"] = None,
+        rate_limiter: Optional["RateLimiter"] = None,
+        hedging: Optional["HedgingPolicy"] = None,
+        circuit_breaker: Optional["CircuitBreaker"] = None,
+        serve_stale: bool = False,
+        transport: Optional["Transport"] = None,
+        negative_cache: Optional["NegativeCache"] = None,
+        quota: Optional["QuotaLimiter"] = None,
+        scheduler: Optional["PriorityScheduler"] = None,
+    ) -> None:
         """
         Set root API url.
 
         :param base_url: root url of the API
+        :param index: account index answering lookups from already fetched subjects
+        :param cache: cache of the API response bodies
+        :param rate_limiter: rate limiter every request waits for
+        :param hedging: policy sending duplicates of slow requests
+        :param circuit_breaker: circuit breaker failing fast while the API is down
+        :param serve_stale: flag indicating if the last known cached result is
+                            returned flagged as stale while the API is down
+        :param transport: transport sending requests, `RequestsTransport` by default
+        :param negative_cache: cache of the identifiers rejected by the API
+        :param quota: limiter of the quota shared by all clients on the host
+        :param scheduler: scheduler of the interactive, normal and bulk requests
         """
         self.base_url = base_url
+        self.index = index
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.hedging = hedging
+        self.circuit_breaker = circuit_breaker
+        self.serve_stale = serve_stale
+        if transport is None:
+            from vater.transports import RequestsTransport
+
+            transport = RequestsTransport()
+
+        self.transport = transport
+        self.negative_cache = negative_cache
+        self.quota = quota
+        self.scheduler = scheduler
+        self._local = threading.local()
+        self.dedup_stats = DedupStats()
+
+    @property
+    def current_token(self) -> Optional[CancellationToken]:
+        """Get cancellation token of the requests sent by the current thread."""
+        return getattr(self._local, "token", None)
+
+    @contextlib.contextmanager
+    def cancellation(
+        self,
+        token: Optional[CancellationToken] = None,
+        *,
+        timeout: Optional[float] = None,
+    ) -> Iterator[CancellationToken]:
+        """
+        Cancel requests of the current thread with the token.
+
+        Requests check the token while being validated, queued and rate limited,
+        and the HTTP timeout is bounded by the time left until its deadline.
+
+        :param token: cancellation token, a new one by default
+        :param timeout: number of seconds until the deadline of a new token
+        :return: context manager yielding the token
+        """
+        if token is None:
+            token = CancellationToken(timeout)
+
+        previous = self.current_token
+        self._local.token = token
+        try:
+            yield token
+        finally:
+            self._local.token = previous
+
+    def lane(self, name: str) -> ContextManager[None]:
+        """
+        Send requests of the current thread in the given lane of the scheduler.
+
+        :param name: `interactive`, `normal` or `bulk`
+        :return: context manager setting the lane
+        """
+        if self.scheduler is None:
+            return contextlib.nullcontext()
+
+        return self.scheduler.lane(name)
+
+    @property
+    def session(self) -> "requests.Session":
+        """Get session of the default requests transport."""
+        return self.transport.session  # type: ignore
 
     @api_request(
         "/api/search/nip/{nip}?date={date}",
         SearchRequest,
-        validators={"date": [date_validator], "nip": [nip_validator]},
+        validators={
+            "date": [date_validator],
+            "nip": [nip_validator],
+            "fields": [fields_validator],
+        },
     )
     def search_nip(
-        self, nip: str, *, date: Optional[datetime.date] = None, raw: bool = False
-    ) -> Tuple[Optional[Subject], str]:
+        self,
+        nip: str,
+        *,
+        date: Optional[datetime.date] = None,
+        raw: bool = False,
+        passthrough: bool = False,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Result:
         """
         Get detailed vat payer information for given nip.
 
@@ -48,14 +208,21 @@ class Client:
         :param date: date data is acquired from
         :param raw: flag indicating if raw json from the server is returned
                     or python object representation
-        :return: subject and request id
+        :param passthrough: flag indicating if undecoded response is returned,
+                            API errors are returned instead of being raised
+        :param fields: names of the only subject fields loaded, others are None
+        :return: subject and request id with the request metadata
         """
 
     @api_request(
         "/api/search/nips/{nips}?date={date}",
         SearchRequest,
         many=True,
-        validators={"date": [date_validator], "nips": [nips_validator]},
+        validators={
+            "date": [date_validator],
+            "nips": [nips_validator],
+            "fields": [fields_validator],
+        },
     )
     def search_nips(
         self,
@@ -63,7 +230,9 @@ class Client:
         *,
         date: Optional[datetime.date] = None,
         raw: bool = False,
-    ) -> Tuple[List[Subject], str]:
+        passthrough: bool = False,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Result:
         """
         Get a list of detailed vat payers information.
 
@@ -71,16 +240,29 @@ class Client:
         :param date: date data is acquired from
         :param raw: flag indicating if raw json from the server is returned
                     or python object representation
+        :param passthrough: flag indicating if undecoded response is returned,
+                            API errors are returned instead of being raised
+        :param fields: names of the only subject fields loaded, others are None
         """
 
     @api_request(
         "/api/search/regon/{regon}?date={date}",
         SearchRequest,
-        validators={"date": [date_validator], "regon": [regon_validator]},
+        validators={
+            "date": [date_validator],
+            "regon": [regon_validator],
+            "fields": [fields_validator],
+        },
     )
     def search_regon(
-        self, regon: str, *, date: Optional[datetime.date] = None, raw: bool = False
-    ) -> Tuple[Optional[Subject], str]:
+        self,
+        regon: str,
+        *,
+        date: Optional[datetime.date] = None,
+        raw: bool = False,
+        passthrough: bool = False,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Result:
         """
         Get detailed vat payer information for given regon.
 
@@ -88,13 +270,20 @@ class Client:
         :param date: date data is acquired from
         :param raw: flag indicating if raw json from the server is returned
                     or python object representation
+        :param passthrough: flag indicating if undecoded response is returned,
+                            API errors are returned instead of being raised
+        :param fields: names of the only subject fields loaded, others are None
         """
 
     @api_request(
         "/api/search/regons/{regons}?date={date}",
         SearchRequest,
         many=True,
-        validators={"date": [date_validator], "regons": [regons_validator]},
+        validators={
+            "date": [date_validator],
+            "regons": [regons_validator],
+            "fields": [fields_validator],
+        },
     )
     def search_regons(
         self,
@@ -102,7 +291,9 @@ class Client:
         *,
         date: Optional[datetime.date] = None,
         raw: bool = False,
-    ) -> Tuple[List[Subject], str]:
+        passthrough: bool = False,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Result:
         """
         Get a list of detailed vat payers information.
 
@@ -110,17 +301,31 @@ class Client:
         :param date: date data is acquired from
         :param raw: flag indicating if raw json from the server is returned
                     or python object representation
+        :param passthrough: flag indicating if undecoded response is returned,
+                            API errors are returned instead of being raised
+        :param fields: names of the only subject fields loaded, others are None
         """
 
     @api_request(
         "/api/search/bank-account/{account}?date={date}",
         SearchRequest,
         many=True,  # API returns `subjects` key for single account search
-        validators={"date": [date_validator], "account": [account_validator]},
+        validators={
+            "date": [date_validator],
+            "account": [account_validator],
+            "fields": [fields_validator],
+        },
+        index_lookup="search_account",
     )
     def search_account(
-        self, account: str, *, date: Optional[datetime.date] = None, raw: bool = False
-    ) -> Tuple[List[Subject], str]:
+        self,
+        account: str,
+        *,
+        date: Optional[datetime.date] = None,
+        raw: bool = False,
+        passthrough: bool = False,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Result:
         """
         Get detailed vat payer information for given bank account.
 
@@ -128,13 +333,20 @@ class Client:
         :param date: date data is acquired from
         :param raw: flag indicating if raw json from the server is returned
                     or python object representation
+        :param passthrough: flag indicating if undecoded response is returned,
+                            API errors are returned instead of being raised
+        :param fields: names of the only subject fields loaded, others are None
         """
 
     @api_request(
         "/api/search/bank-accounts/{accounts}?date={date}",
         SearchRequest,
         many=True,
-        validators={"date": [date_validator], "accounts": [accounts_validator]},
+        validators={
+            "date": [date_validator],
+            "accounts": [accounts_validator],
+            "fields": [fields_validator],
+        },
     )
     def search_accounts(
         self,
@@ -142,7 +354,9 @@ class Client:
         *,
         date: Optional[datetime.date] = None,
         raw: bool = False,
-    ) -> Tuple[List[Subject], str]:
+        passthrough: bool = False,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Result:
         """
         Get a list of detailed vat payers information.
 
@@ -150,6 +364,9 @@ class Client:
         :param date: date data is acquired from
         :param raw: flag indicating if raw json from the server is returned
                     or python object representation
+        :param passthrough: flag indicating if undecoded response is returned,
+                            API errors are returned instead of being raised
+        :param fields: names of the only subject fields loaded, others are None
         """
 
     @api_request(
@@ -168,7 +385,8 @@ class Client:
         *,
         date: Optional[datetime.date] = None,
         raw: bool = False,
-    ) -> Tuple[bool, str]:
+        passthrough: bool = False,
+    ) -> Result:
         """
         Check if given account is assigned to the subject with given regon.
 
@@ -177,6 +395,8 @@ class Client:
         :param date: date data is acquired from
         :param raw: flag indicating if raw json from the server is returned
                     or python object representation
+        :param passthrough: flag indicating if undecoded response is returned,
+                            API errors are returned instead of being raised
         """
 
     @api_request(
@@ -187,6 +407,7 @@ class Client:
             "nip": [nip_validator],
             "account": [account_validator],
         },
+        index_lookup="check_nip",
     )
     def check_nip(
         self,
@@ -195,7 +416,8 @@ class Client:
         *,
         date: Optional[datetime.date] = None,
         raw: bool = False,
-    ) -> Tuple[bool, str]:
+        passthrough: bool = False,
+    ) -> Result:
         """
         Check if given account is assigned to the subject with given nip.
 
@@ -204,4 +426,264 @@ class Client:
         :param date: date data is acquired from
         :param raw: flag indicating if raw json from the server is returned
                     or python object representation
+        :param passthrough: flag indicating if undecoded response is returned,
+                            API errors are returned instead of being raised
+        """
+
+    def search_nips_bulk(
+        self,
+        nips: Iterable[str],
+        *,
+        date: Optional[Union[datetime.date, str]] = None,
+        max_workers: int = 4,
+        processes: Optional[int] = None,
+        fields: Optional[Iterable[str]] = None,
+        token: Optional[CancellationToken] = None,
+    ) -> Iterator[Result]:
+        """
+        Get detailed vat payers information for any number of nips.
+
+        Nips are split into batches sent concurrently and results are yielded
+        in order.
+
+        :param nips: nip numbers of the subjects to fetch
+        :param date: date data is acquired from
+        :param max_workers: number of threads sending requests
+        :param processes: number of processes validating nips and deserializing
+                          responses, by default it's done in the calling process
+        :param fields: names of the only subject fields loaded, others are None
+        :param token: cancellation token abandoning the remaining batches
+        :return: iterator of subjects and request id for every batch
+        """
+        from vater.bulk import search_bulk
+
+        return search_bulk(
+            self.search_nips,
+            nips,
+            date=date,
+            max_workers=max_workers,
+            processes=processes,
+            fields=fields,
+            token=token,
+        )
+
+    def search_regons_bulk(
+        self,
+        regons: Iterable[str],
+        *,
+        date: Optional[Union[datetime.date, str]] = None,
+        max_workers: int = 4,
+        processes: Optional[int] = None,
+        fields: Optional[Iterable[str]] = None,
+        token: Optional[CancellationToken] = None,
+    ) -> Iterator[Result]:
+        """
+        Get detailed vat payers information for any number of regons.
+
+        Regons are split into batches sent concurrently and results are yielded
+        in order.
+
+        :param regons: regon numbers of the subjects to fetch
+        :param date: date data is acquired from
+        :param max_workers: number of threads sending requests
+        :param processes: number of processes validating regons and deserializing
+                          responses, by default it's done in the calling process
+        :param fields: names of the only subject fields loaded, others are None
+        :param token: cancellation token abandoning the remaining batches
+        :return: iterator of subjects and request id for every batch
+        """
+        from vater.bulk import search_bulk
+
+        return search_bulk(
+            self.search_regons,
+            regons,
+            date=date,
+            max_workers=max_workers,
+            processes=processes,
+            fields=fields,
+            token=token,
+        )
+
+    def search_accounts_bulk(
+        self,
+        accounts: Iterable[str],
+        *,
+        date: Optional[Union[datetime.date, str]] = None,
+        max_workers: int = 4,
+        processes: Optional[int] = None,
+        fields: Optional[Iterable[str]] = None,
+        token: Optional[CancellationToken] = None,
+    ) -> Iterator[Result]:
+        """
+        Get detailed vat payers information for any number of bank accounts.
+
+        Accounts are split into batches sent concurrently and results are yielded
+        in order.
+
+        :param accounts: account numbers of the subjects to fetch
+        :param date: date data is acquired from
+        :param max_workers: number of threads sending requests
+        :param processes: number of processes validating accounts and deserializing
+                          responses, by default it's done in the calling process
+        :param fields: names of the only subject fields loaded, others are None
+        :param token: cancellation token abandoning the remaining batches
+        :return: iterator of subjects and request id for every batch
+        """
+        from vater.bulk import search_bulk
+
+        return search_bulk(
+            self.search_accounts,
+            accounts,
+            date=date,
+            max_workers=max_workers,
+            processes=processes,
+            fields=fields,
+            token=token,
+        )
+
+    def check_nip_history(
+        self,
+        nip: str,
+        account: str,
+        dates: Iterable[Union[datetime.date, str]],
+        *,
+        max_workers: int = 4,
+        token: Optional[CancellationToken] = None,
+    ) -> Dict[Union[datetime.date, str], Result]:
+        """
+        Check if given account was assigned to the subject on each of given dates.
+
+        The subject is fetched once for every distinct date.
+
+        :param nip: nip number of the subject to check
+        :param account: account number of the subject to check
+        :param dates: dates data is acquired from
+        :param max_workers: number of threads sending requests
+        :param token: cancellation token abandoning the remaining requests
+        :return: check result and request id for every date
         """
+        dates = list(dates)
+        return dict(
+            zip(
+                dates,
+                self.check_nips_history(
+                    [(nip, account, date) for date in dates],
+                    max_workers=max_workers,
+                    token=token,
+                ),
+            )
+        )
+
+    def check_nips_history(
+        self,
+        checks: Iterable[Tuple[str, str, Optional[Union[datetime.date, str]]]],
+        *,
+        max_workers: int = 4,
+        token: Optional[CancellationToken] = None,
+    ) -> List[Result]:
+        """
+        Check if accounts were assigned to the subjects with given nips on given dates.
+
+        Distinct nips are fetched with `search_nips` once per date, 30 at a time,
+        and checks are answered from the subjects account numbers. `check_nip`
+        is sent only for subjects having virtual accounts, when the account
+        is not listed.
+
+        :param checks: nip, account and date of every check
+        :param max_workers: number of threads sending requests
+        :param token: cancellation token abandoning the remaining requests
+        :return: check result and request id for every check
+        """
+        from vater.bulk import check_nips_history
+
+        return check_nips_history(self, checks, max_workers=max_workers, token=token)
+
+    def check_nips_bulk(
+        self,
+        pairs: Iterable[Tuple[str, str]],
+        *,
+        date: Optional[Union[datetime.date, str]] = None,
+        max_workers: int = 4,
+        token: Optional[CancellationToken] = None,
+    ) -> List[Result]:
+        """
+        Check if accounts are assigned to the subjects with given nips.
+
+        Pairs are grouped by nip and resolved with `search_nips`, 30 nips
+        per request. `check_nip` is sent only for subjects having virtual accounts,
+        when the account is not listed.
+
+        :param pairs: nip and account of every check
+        :param date: date data is acquired from
+        :param max_workers: number of threads sending requests
+        :param token: cancellation token abandoning the remaining requests
+        :return: check result and request id of the batch for every pair
+        """
+        return self.check_nips_history(
+            ((nip, account, date) for nip, account in pairs),
+            max_workers=max_workers,
+            token=token,
+        )
+
+    def prefetch(
+        self,
+        *,
+        nips: Iterable[str] = (),
+        regons: Iterable[str] = (),
+        accounts: Iterable[str] = (),
+        date: Optional[Union[datetime.date, str]] = None,
+        max_workers: int = 4,
+        on_progress: Optional[Callable[["PrefetchJob"], None]] = None,
+        token: Optional[CancellationToken] = None,
+    ) -> "PrefetchJob":
+        """
+        Load subjects into the cache and account index in the background.
+
+        Values are searched 30 at a time and batch responses are split, so later
+        single value searches are answered from the cache and account lookups
+        from the index.
+
+        :param nips: nip numbers of the subjects to load
+        :param regons: regon numbers of the subjects to load
+        :param accounts: account numbers of the subjects to load
+        :param date: date data is acquired from
+        :param max_workers: number of threads sending requests
+        :param on_progress: function called with the job after every batch
+        :param token: cancellation token of the job, see `PrefetchJob.cancel`
+        :return: running job
+        """
+        from vater.prefetch import PrefetchJob
+
+        return PrefetchJob(
+            self,
+            nips=nips,
+            regons=regons,
+            accounts=accounts,
+            date=date,
+            max_workers=max_workers,
+            on_progress=on_progress,
+            token=token,
+        ).start()
+
+    def plan(self, *, max_workers: int = 4) -> "Planner":
+        """
+        Create planner answering mixed lookups with the minimal number of requests.
+
+        :param max_workers: number of threads sending requests
+        :return: empty planner
+        """
+        from vater.planner import Planner
+
+        return Planner(self, max_workers=max_workers)
+
+    def watchlist(self, path: str = ":memory:", *, max_workers: int = 4) -> "Watchlist":
+        """
+        Open watchlist emitting changes of the subjects between register dates.
+
+        :param path: path of the SQLite database file
+        :param max_workers: number of threads sending requests
+        :return: watchlist stored in the database
+        """
+        from vater.watchlist import Watchlist
+
+        return Watchlist(self, path, max_workers=max_workers)
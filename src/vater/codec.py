@@ -0,0 +1,355 @@
+"""Compact binary serialization module."""
+import datetime
+import itertools
+import operator
+import struct
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from vater.models import Company, Subject
+
+VERSION = 3
+
+SUBJECT_STRINGS = (
+    "name",
+    "nip",
+    "status_vat",
+    "regon",
+    "pesel",
+    "krs",
+    "residence_address",
+    "working_address",
+    "registration_denial_basis",
+    "restoration_basis",
+    "removal_basis",
+)
+SUBJECT_DATES = (
+    "registration_legal_date",
+    "registration_denial_date",
+    "restoration_date",
+    "removal_date",
+)
+SUBJECT_COMPANIES = ("representatives", "authorized_clerks", "partners")
+COMPANY_STRINGS = ("company_name", "first_name", "last_name", "nip", "pesel")
+
+# strings of the subject and its companies are joined with the separator,
+# so they are split with a single call
+SEPARATOR = "\x00"
+SHORT_MAX = 0xFFFF
+# bitmap of None strings, companies and accounts, encoded size of the strings,
+# date ordinals, virtual accounts flag, companies counts, accounts count
+# and accounts packed flag, 2 for accounts with wide lengths; it's followed
+# by the bitmap of None strings of every company
+SUBJECT_HEADER = struct.Struct(f"<HH{len(SUBJECT_DATES)}Ib{len(SUBJECT_COMPANIES)}HHB")
+# header of the subjects with the separator in a string or any size or count
+# over `SHORT_MAX`, flagged with the highest bit of the None bitmap, which keeps
+# lengths of the strings in characters instead of separating them; lengths
+# of the companies strings follow their None bitmaps
+WIDE_SUBJECT_HEADER = struct.Struct(
+    f"<H{len(SUBJECT_STRINGS)}II{len(SUBJECT_DATES)}Ib{len(SUBJECT_COMPANIES)}IIB"
+)
+WIDE_SUBJECT = 1 << 15
+STRINGS_COUNT = len(SUBJECT_STRINGS)
+COMPANY_STRINGS_COUNT = len(COMPANY_STRINGS)
+COMPANIES_BIT = STRINGS_COUNT
+ACCOUNTS_BIT = COMPANIES_BIT + len(SUBJECT_COMPANIES)
+BLOB_HEADER = struct.Struct("<BI")
+ACCOUNT_SIZE = 13  # 26 digits packed two per byte
+
+get_subject_strings = operator.attrgetter(*SUBJECT_STRINGS)
+get_subject_dates = operator.attrgetter(*SUBJECT_DATES)
+get_subject_companies = operator.attrgetter(*SUBJECT_COMPANIES)
+get_company_strings = operator.attrgetter(*COMPANY_STRINGS)
+from_ordinal = datetime.date.fromordinal
+
+
+class CodecError(ValueError):
+    """Raised when data can't be decoded."""
+
+
+def _nulls(values: Iterable[Optional[object]]) -> int:
+    """Get bitmap with bits of None values set."""
+    return sum(1 << bit for bit, value in enumerate(values) if value is None)
+
+
+def _set_nulls(values: List[Optional[str]], nulls: int, start: int = 0) -> None:
+    """Set values with bits set in the bitmap to None, counting from `start`."""
+    while nulls:
+        values[start + (nulls & -nulls).bit_length() - 1] = None
+        # clear the lowest set bit
+        nulls &= nulls - 1
+
+
+def _encode_strings(values: Sequence[Optional[str]]) -> Tuple[List[int], bytes]:
+    """Get lengths and encoded concatenation of the strings, None has length 0."""
+    return (
+        [0 if value is None else len(value) for value in values],
+        "".join(value for value in values if value is not None).encode(),
+    )
+
+
+def _join_strings(values: Sequence[Optional[str]]) -> Optional[bytes]:
+    """Get encoded strings joined with the separator, None if one contains it."""
+    text = SEPARATOR.join("" if value is None else value for value in values)
+    if text.count(SEPARATOR) != len(values) - 1:
+        return None
+
+    return text.encode()
+
+
+def _decode_strings(text: str, lengths: Sequence[int]) -> List[Optional[str]]:
+    """Split concatenation of the strings by their lengths."""
+    ends = list(itertools.accumulate(lengths))
+    return [text[start:end] for start, end in zip([0, *ends], ends)]
+
+
+def _encode_accounts(accounts: Optional[List[str]]) -> Tuple[int, int, bytes]:
+    """Get count, packed flag and bytes of the accounts, the flag is 2 for wide."""
+    if not accounts:
+        return 0, 0, b""
+
+    if all(
+        len(account) == 26 and account.isascii() and account.isdigit()
+        for account in accounts
+    ):
+        return len(accounts), 1, bytes.fromhex("".join(accounts))
+
+    lengths, data = _encode_strings(accounts)
+    wide = max(*lengths, len(data)) > SHORT_MAX
+    code = "I" if wide else "H"
+    return (
+        len(accounts),
+        2 if wide else 0,
+        struct.pack(f"<{len(lengths)}{code}{code}", *lengths, len(data)) + data,
+    )
+
+
+def _decode_accounts(
+    data: bytes, offset: int, count: int, packed: int
+) -> Tuple[List[str], int]:
+    """Get accounts and the offset after them."""
+    if packed == 1:
+        end = offset + count * ACCOUNT_SIZE
+        digits = data[offset:end].hex()
+        return [digits[start : start + 26] for start in range(0, 26 * count, 26)], end
+
+    if not count:
+        return [], offset
+
+    code = "I" if packed == 2 else "H"
+    *lengths, size = struct.unpack_from(f"<{count}{code}{code}", data, offset)
+    offset += struct.calcsize(code) * (count + 1)
+    text = str(data[offset : offset + size], "utf-8")
+    return _decode_strings(text, lengths), offset + size  # type: ignore
+
+
+def _encode_subject(subject: Subject) -> bytes:
+    """Encode subject without the version header."""
+    values = get_subject_strings(subject)
+    companies = get_subject_companies(subject)
+    counts = [0 if value is None else len(value) for value in companies]
+    companies_values = [
+        get_company_strings(company) for value in companies for company in value or ()
+    ]
+    strings = [*values, *itertools.chain.from_iterable(companies_values)]
+    accounts_count, packed, accounts = _encode_accounts(subject.account_numbers)
+    virtual = subject.has_virtual_accounts
+    nulls = _nulls((*values, *companies, subject.account_numbers))
+    fields = (
+        *(
+            0 if date is None else date.toordinal()
+            for date in get_subject_dates(subject)
+        ),
+        -1 if virtual is None else virtual,
+        *counts,
+        accounts_count,
+        packed,
+    )
+    companies_nulls = bytes(_nulls(company) for company in companies_values)
+    joined = _join_strings(strings)
+
+    if joined is not None and max(len(joined), *counts, accounts_count) <= SHORT_MAX:
+        header = SUBJECT_HEADER.pack(nulls, len(joined), *fields) + companies_nulls
+        return b"".join((header, joined, accounts))
+
+    lengths, text = _encode_strings(strings)
+    header = WIDE_SUBJECT_HEADER.pack(
+        nulls | WIDE_SUBJECT, *lengths[:STRINGS_COUNT], len(text), *fields
+    )
+    companies_lengths = struct.pack(
+        f"<{len(lengths) - STRINGS_COUNT}I", *lengths[STRINGS_COUNT:]
+    )
+    return b"".join((header, companies_nulls, companies_lengths, text, accounts))
+
+
+def _decode_companies(
+    strings: List[Optional[str]], start: int, companies_nulls: bytes
+) -> List[Company]:
+    """Get companies of the strings starting at the position."""
+    companies = []
+
+    for nulls in companies_nulls:
+        end = start + COMPANY_STRINGS_COUNT
+        values = strings[start:end]
+        _set_nulls(values, nulls)
+        companies.append(Company(*values))
+        start = end
+
+    return companies
+
+
+def _decode_subject(data: bytes, offset: int) -> Tuple[Subject, int]:
+    """Decode subject starting at the offset and get the offset after it."""
+    # the wide flag is the highest bit of the little endian bitmap
+    wide = data[offset + 1] & 0x80
+    if wide:
+        nulls, *fields = WIDE_SUBJECT_HEADER.unpack_from(data, offset)
+        offset += WIDE_SUBJECT_HEADER.size
+        lengths, size = fields[:STRINGS_COUNT], fields[STRINGS_COUNT]
+        fields = fields[STRINGS_COUNT + 1 :]
+    else:
+        nulls, size, *fields = SUBJECT_HEADER.unpack_from(data, offset)
+        offset += SUBJECT_HEADER.size
+
+    (
+        legal_ordinal,
+        denial_ordinal,
+        restoration_ordinal,
+        removal_ordinal,
+        virtual,
+        *counts,
+        accounts_count,
+        packed,
+    ) = fields
+    companies_count = sum(counts)
+    companies_nulls = bytes(data[offset : offset + companies_count])
+    offset += companies_count
+
+    if wide:
+        strings_count = companies_count * COMPANY_STRINGS_COUNT
+        lengths += struct.unpack_from(f"<{strings_count}I", data, offset)
+        offset += 4 * strings_count
+        strings = _decode_strings(str(data[offset : offset + size], "utf-8"), lengths)
+    else:
+        strings = [*str(data[offset : offset + size], "utf-8").split(SEPARATOR)]
+
+    offset += size
+    _set_nulls(strings, nulls & (1 << STRINGS_COUNT) - 1)
+    (
+        name,
+        nip,
+        status_vat,
+        regon,
+        pesel,
+        krs,
+        residence_address,
+        working_address,
+        registration_denial_basis,
+        restoration_basis,
+        removal_basis,
+    ) = strings[:STRINGS_COUNT]
+
+    companies: List[Optional[List[Company]]] = [[], [], []]
+    # most subjects have neither companies nor None companies
+    if companies_count or nulls >> COMPANIES_BIT & 7:
+        start = STRINGS_COUNT
+        for index, count in enumerate(counts):
+            if nulls >> (COMPANIES_BIT + index) & 1:
+                companies[index] = None
+            elif count:
+                companies[index] = _decode_companies(
+                    strings, start, companies_nulls[:count]
+                )
+                start += count * COMPANY_STRINGS_COUNT
+                companies_nulls = companies_nulls[count:]
+
+    representatives, authorized_clerks, partners = companies
+    accounts: Optional[List[str]]
+    accounts, offset = _decode_accounts(data, offset, accounts_count, packed)
+    if nulls >> ACCOUNTS_BIT & 1:
+        accounts = None
+
+    return (
+        Subject(
+            name,  # type: ignore
+            nip,
+            status_vat,
+            regon,
+            pesel,
+            krs,
+            residence_address,
+            working_address,
+            representatives,
+            authorized_clerks,
+            partners,
+            from_ordinal(legal_ordinal) if legal_ordinal else None,
+            registration_denial_basis,
+            from_ordinal(denial_ordinal) if denial_ordinal else None,
+            restoration_basis,
+            from_ordinal(restoration_ordinal) if restoration_ordinal else None,
+            removal_basis,
+            from_ordinal(removal_ordinal) if removal_ordinal else None,
+            accounts,
+            None if virtual == -1 else bool(virtual),
+        ),
+        offset,
+    )
+
+
+def _check_version(data: bytes) -> None:
+    """Raise error if data was encoded with a different codec version."""
+    if not data or data[0] != VERSION:
+        raise CodecError(f"unsupported codec version: {data[:1]!r}")
+
+
+def dumps(subject: Subject) -> bytes:
+    """
+    Encode subject.
+
+    Fields are written in a fixed order, dates as ordinals and account numbers
+    as 13 bytes of packed digits.
+
+    :param subject: subject to encode
+    :return: encoded subject
+    """
+    return bytes((VERSION,)) + _encode_subject(subject)
+
+
+def loads(data: bytes) -> Subject:
+    """
+    Decode subject encoded with `dumps`.
+
+    :param data: encoded subject
+    :return: decoded subject
+    """
+    _check_version(data)
+    return _decode_subject(data, 1)[0]
+
+
+def dumps_many(subjects: Iterable[Subject]) -> bytes:
+    """
+    Encode subjects.
+
+    :param subjects: subjects to encode
+    :return: encoded subjects
+    """
+    encoded = [_encode_subject(subject) for subject in subjects]
+    return BLOB_HEADER.pack(VERSION, len(encoded)) + b"".join(encoded)
+
+
+def loads_many(data: bytes) -> List[Subject]:
+    """
+    Decode subjects encoded with `dumps_many`.
+
+    :param data: encoded subjects
+    :return: decoded subjects
+    """
+    _check_version(data)
+    _, count = BLOB_HEADER.unpack_from(data)
+    offset = BLOB_HEADER.size
+    subjects = []
+
+    for _ in range(count):
+        subject, offset = _decode_subject(data, offset)
+        subjects.append(subject)
+
+    return subjects
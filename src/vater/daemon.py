@@ -0,0 +1,91 @@
+"""Daemon state module."""
+import json
+import os
+from typing import Optional
+
+# path answered by the daemon with the token of its state file
+PING_PATH = "/vater/ping"
+# number of seconds the daemon has to answer the ping in
+PING_TIMEOUT = 0.5
+
+
+def state_file_path() -> str:
+    """Get path of the file describing the running daemon."""
+    return os.environ.get(
+        "VATER_DAEMON_FILE",
+        os.path.join(os.path.expanduser("~"), ".cache", "vater", "daemon.json"),
+    )
+
+
+def write_state(url: str, upstream: str, token: str) -> None:
+    """
+    Describe the daemon running in the current process.
+
+    :param url: url of the daemon
+    :param upstream: root url of the API the daemon sends requests to
+    :param token: random token the daemon answers the ping with
+    """
+    path = state_file_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    state = {
+        "url": url,
+        "upstream": upstream.rstrip("/"),
+        "pid": os.getpid(),
+        "token": token,
+    }
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(state, file)
+
+
+def remove_state() -> None:
+    """Remove description of the stopped daemon."""
+    try:
+        os.remove(state_file_path())
+    except FileNotFoundError:
+        pass
+
+
+def ping(url: str, token: str) -> bool:
+    """
+    Check if the daemon described by the state file answers at the url.
+
+    :param url: url of the daemon
+    :param token: token of the daemon state file
+    :return: flag indicating if the daemon is alive
+    """
+    # urllib.request takes longer to import than the rest of a command needs,
+    # so it's imported only if a daemon state file is found
+    from urllib.request import urlopen
+
+    try:
+        with urlopen(url + PING_PATH, timeout=PING_TIMEOUT) as response:
+            return response.read().decode() == token
+    except (OSError, ValueError):  # URLError is an OSError
+        return False
+
+
+def find_daemon(upstream: str) -> Optional[str]:
+    """
+    Get url of the running daemon.
+
+    A state file left by a killed daemon, or whose pid was reused, is ignored,
+    as the daemon has to answer the ping with the token of the file.
+
+    :param upstream: root url of the API the daemon should send requests to
+    :return: daemon url or None if no daemon for given API is running
+    """
+    try:
+        with open(state_file_path(), encoding="utf-8") as file:
+            state = json.load(file)
+
+        os.kill(state["pid"], 0)
+        url, token = state["url"], state["token"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+    if state["upstream"] != upstream.rstrip("/") or not ping(url, token):
+        return None
+
+    return url
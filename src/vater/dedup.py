@@ -0,0 +1,44 @@
+"""Identifiers deduplication module."""
+import threading
+from dataclasses import dataclass, field
+from typing import Iterable, List
+
+
+def batches_needed(count: int, limit: int) -> int:
+    """Get number of requests needed to search given number of values."""
+    return -(-count // limit)
+
+
+def deduplicate(values: Iterable[str]) -> List[str]:
+    """Remove repeated values keeping the order of their first occurrences."""
+    return list(dict.fromkeys(values))
+
+
+@dataclass
+class DedupStats:
+    """Counters of the identifiers removed before being searched."""
+
+    inputs: int = 0
+    unique: int = 0
+    requests_saved: int = 0
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    @property
+    def duplicates(self) -> int:
+        """Get number of removed identifiers."""
+        return self.inputs - self.unique
+
+    def record(self, inputs: int, unique: int, requests_saved: int) -> None:
+        """
+        Add counters of the deduplicated values.
+
+        :param inputs: number of given values
+        :param unique: number of values left after deduplication
+        :param requests_saved: number of requests the duplicates would have taken
+        """
+        with self._lock:
+            self.inputs += inputs
+            self.unique += unique
+            self.requests_saved += requests_saved
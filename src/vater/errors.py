@@ -1,5 +1,5 @@
 """Errors module."""
-
+import datetime
 from typing import Optional
 
 # Following code mapping comes from API docs
@@ -27,6 +27,19 @@ ERROR_CODE_MAPPING = {
     "WL-196": "Database is being updated, Try again later.",
 }
 
+# codes of errors caused by a single invalid identifier
+IDENTIFIER_CODES = {
+    "WL-105",
+    "WL-106",
+    "WL-107",
+    "WL-109",
+    "WL-110",
+    "WL-111",
+    "WL-113",
+    "WL-114",
+    "WL-115",
+}
+
 
 class ApiError(Exception):
     """Base class for all API errors."""
@@ -35,16 +48,38 @@ class ApiError(Exception):
 class InvalidRequestData(ApiError):
     """Base class for invalid request errors."""
 
+    def __init__(self, message: str, code: Optional[str] = None) -> None:
+        """Assign API error code to the instance."""
+        super().__init__(message)
+        self.code = code
+
 
 class InvalidField(InvalidRequestData):
     """Raised if known error from external API is returned."""
 
 
+class ApiUnavailable(ApiError):
+    """Raised when the API keeps failing or can't be reached."""
+
+    def __init__(self, retry_after: float) -> None:
+        """Assign number of seconds until the API is tried again."""
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+    def __str__(self) -> str:
+        """Get error representation."""
+        return (
+            f"{self.__class__.__name__}: API is unavailable, "
+            f"retry after {self.retry_after:.1f}s"
+        )
+
+
 class UnknownExternalApiError(Exception):
     """Raised when unknown error from vat register site occurs."""
 
     def __init__(self, status_code: int, data: Optional[str]) -> None:
         """Assign status code and data to the instance."""
+        super().__init__(status_code, data)
         self.status_code = status_code
         self.data = data
 
@@ -65,6 +100,7 @@ class MaximumParameterNumberExceeded(ClientError):
 
     def __init__(self, param: str, maximum: int) -> None:
         """Assign parameter name."""
+        super().__init__(param, maximum)
         self.param = param
         self.maximum = maximum
 
@@ -81,9 +117,35 @@ class ValidationError(ClientError):
 
     def __init__(self, param, msg) -> None:
         """Initialize the instance."""
+        super().__init__(param, msg)
         self.param = param
         self.msg = msg
 
     def __str__(self) -> str:
         """Get validation error representation."""
         return f"{self.__class__.__name__}: {self.param} {self.msg}"
+
+
+class Cancelled(ClientError):
+    """Raised when the work is cancelled with its cancellation token."""
+
+
+class DeadlineExceeded(Cancelled):
+    """Raised when the deadline of the call or job passes."""
+
+
+class QuotaExceeded(ClientError):
+    """Raised when the daily request quota shared by the host is used up."""
+
+    def __init__(self, remaining: int, resets: float) -> None:
+        """Assign number of requests left and timestamp of the quota reset."""
+        super().__init__(remaining, resets)
+        self.remaining = remaining
+        self.resets = resets
+
+    def __str__(self) -> str:
+        """Get error representation."""
+        return (
+            f"{self.__class__.__name__}: {self.remaining} requests left, "
+            f"quota resets at {datetime.datetime.fromtimestamp(self.resets)}"
+        )
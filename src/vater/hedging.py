@@ -0,0 +1,134 @@
+"""Hedged requests module."""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Deque, Optional, TypeVar, Union
+
+from vater.quota import QuotaLimiter
+from vater.rate_limiter import RateLimiter
+
+T = TypeVar("T")
+
+
+@dataclass
+class HedgingStats:
+    """Counters of the hedged requests."""
+
+    requests: int = 0
+    fired: int = 0
+    won: int = 0
+    skipped: int = 0
+
+
+class HedgingPolicy:
+    """
+    Policy sending a duplicate of a request which takes longer than usual.
+
+    If the request hasn't answered within the given percentile of the recent
+    latencies, a hedge is sent and the first response is used. Hedges take a token
+    from the client rate limiter without waiting, so they are skipped when its
+    budget is used up. The slower request can't be cancelled and its response
+    is dropped.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        *,
+        initial_delay: float = 0.5,
+        min_delay: float = 0.01,
+        window: int = 1000,
+        min_samples: int = 20,
+        max_workers: int = 8,
+    ) -> None:
+        """
+        Initialize empty latency window.
+
+        :param percentile: percentile of the recent latencies to wait before hedging
+        :param initial_delay: delay used until `min_samples` latencies are known
+        :param min_delay: minimal delay before hedging
+        :param window: number of recent latencies the percentile is computed from
+        :param min_samples: minimal number of latencies to compute the percentile
+        :param max_workers: number of threads sending requests and hedges
+        """
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+        self.stats = HedgingStats()
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def delay(self) -> float:
+        """Get time to wait for the response before sending a hedge."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+
+        if len(latencies) < self.min_samples:
+            return self.initial_delay
+
+        position = round(self.percentile / 100 * (len(latencies) - 1))
+        return max(self.min_delay, latencies[position])
+
+    def _submit(self, function: Callable[[], T]) -> "Future[T]":
+        """Run the function in the policy thread pool."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers)
+
+        return self._executor.submit(function)
+
+    def call(
+        self,
+        function: Callable[[], T],
+        rate_limiter: Optional[Union[RateLimiter, QuotaLimiter]] = None,
+    ) -> T:
+        """
+        Call the function, calling it again if it doesn't return in time.
+
+        :param function: function sending the request
+        :param rate_limiter: rate limiter bounding the number of hedges
+        :return: result of the first successful call
+        """
+        start = time.monotonic()
+        primary = self._submit(function)
+        done, _ = wait([primary], timeout=self.delay())
+
+        with self._lock:
+            self.stats.requests += 1
+
+            hedge = not done and (rate_limiter is None or rate_limiter.try_acquire())
+            if hedge:
+                self.stats.fired += 1
+            elif not done:
+                self.stats.skipped += 1
+
+        pending = {primary, self._submit(function)} if hedge else {primary}
+        error: Optional[BaseException] = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            future = done.pop()
+            error = future.exception()
+
+            if error is None:
+                with self._lock:
+                    self._latencies.append(time.monotonic() - start)
+                    if future is not primary:
+                        self.stats.won += 1
+
+                return future.result()
+
+            # results of both requests are waited for if the first one failed
+            pending |= done
+
+        raise error  # type: ignore
+
+    def close(self) -> None:
+        """Shut down the thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
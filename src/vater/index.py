@@ -0,0 +1,248 @@
+"""Account number reverse index module."""
+import datetime
+import pickle
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from vater.models import Subject
+
+LOW_MASK = (1 << 64) - 1
+
+
+def _pack_account(account: str) -> Optional[Tuple[int, int]]:
+    """Split 26 digits account number into lower 64 bits and the remaining bits."""
+    if len(account) != 26 or not account.isdigit():
+        return None
+
+    number = int(account)
+    return number & LOW_MASK, number >> 64
+
+
+class _DateIndex:
+    """Accounts and subjects known for a single register date."""
+
+    __slots__ = ("lo", "hi", "refs", "pending", "subjects", "by_nip")
+
+    def __init__(self) -> None:
+        """Initialize empty sorted arrays and insertion buffer."""
+        # sorted by (lo, hi), refs point to the `subjects` list
+        self.lo = array("Q")
+        self.hi = array("I")
+        self.refs = array("I")
+        self.pending: Dict[Tuple[int, int], List[int]] = {}
+        self.subjects: List[Tuple[Subject, str]] = []
+        self.by_nip: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        """Return number of indexed account entries."""
+        return len(self.refs) + sum(len(refs) for refs in self.pending.values())
+
+    def add(self, subject: Subject, request_id: str) -> None:
+        """Add a subject with its accounts to the index."""
+        if subject.nip is not None and subject.nip in self.by_nip:
+            return
+
+        ref = len(self.subjects)
+        self.subjects.append((subject, request_id))
+
+        if subject.nip is not None:
+            self.by_nip[subject.nip] = ref
+
+        for account in subject.account_numbers or ():
+            key = _pack_account(account)
+            if key is not None:
+                self.pending.setdefault(key, []).append(ref)
+
+    def find(self, key: Tuple[int, int]) -> List[int]:
+        """Return references of subjects having given packed account."""
+        refs = list(self.pending.get(key, ()))
+        lo, hi = key
+
+        position = bisect_left(self.lo, lo)
+        while position < len(self.lo) and self.lo[position] == lo:
+            if self.hi[position] == hi:
+                refs.append(self.refs[position])
+            position += 1
+
+        return refs
+
+    def compact(self) -> None:
+        """
+        Merge insertion buffer into the sorted arrays.
+
+        Only the buffered entries are sorted. Runs of the arrays between them are
+        copied as slices, so merging costs a linear copy of the arrays and a few
+        operations per buffered entry.
+        """
+        if not self.pending:
+            return
+
+        entries = sorted(
+            (lo, hi, ref) for (lo, hi), refs in self.pending.items() for ref in refs
+        )
+        lo_array, hi_array, refs_array = array("Q"), array("I"), array("I")
+        start = 0
+
+        for lo, hi, ref in entries:
+            # buffered refs are newer, so they follow the entries with equal keys
+            position = bisect_right(self.lo, lo, start)
+            lo_array += self.lo[start:position]
+            hi_array += self.hi[start:position]
+            refs_array += self.refs[start:position]
+            lo_array.append(lo)
+            hi_array.append(hi)
+            refs_array.append(ref)
+            start = position
+
+        lo_array += self.lo[start:]
+        hi_array += self.hi[start:]
+        refs_array += self.refs[start:]
+        self.lo, self.hi, self.refs = lo_array, hi_array, refs_array
+        self.pending = {}
+
+
+class AccountIndex:
+    """
+    In-memory reverse index from account number to subject.
+
+    Subjects are grouped by the register date they were fetched for, as the
+    register state may differ between dates. Account numbers are kept as packed
+    integers in sorted arrays, which takes 16 bytes per account, instead of a dict
+    of strings. New entries are buffered and merged into the arrays once the buffer
+    grows past `compact_threshold` or an eighth of the arrays size.
+
+    The index is thread safe, as subjects are added by bulk searches from worker
+    threads. Lookups only know the subjects fetched so far, so `search_account`
+    may miss subjects with the account which weren't searched for the date yet.
+    """
+
+    def __init__(self, compact_threshold: int = 65536) -> None:
+        """
+        Initialize empty index.
+
+        :param compact_threshold: minimal number of buffered accounts before merge
+        """
+        self.compact_threshold = compact_threshold
+        self._dates: Dict[str, _DateIndex] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return number of indexed account entries for all dates."""
+        with self._lock:
+            return sum(len(date_index) for date_index in self._dates.values())
+
+    def add(
+        self,
+        subjects: Iterable[Subject],
+        date: Union[datetime.date, str],
+        request_id: str,
+    ) -> None:
+        """
+        Add subjects fetched for given date to the index.
+
+        :param subjects: subjects returned by the API
+        :param date: date the data was acquired from
+        :param request_id: identifier of the request subjects come from
+        """
+        subjects = list(subjects)
+
+        with self._lock:
+            date_index = self._dates.setdefault(str(date), _DateIndex())
+
+            for subject in subjects:
+                date_index.add(subject, request_id)
+
+            if len(date_index.pending) >= max(
+                self.compact_threshold, len(date_index.refs) // 8
+            ):
+                date_index.compact()
+
+    def compact(self) -> None:
+        """Merge all buffered entries into the sorted arrays."""
+        with self._lock:
+            for date_index in self._dates.values():
+                date_index.compact()
+
+    def search_account(
+        self, account: str, date: Union[datetime.date, str]
+    ) -> Optional[Tuple[List[Subject], str]]:
+        """
+        Get subjects with given account known for given date.
+
+        Only the subjects fetched so far are returned, so other subjects having
+        the account are missing until they are searched for the date.
+
+        :param account: account number of the subjects to find
+        :param date: date data is acquired from
+        :return: subjects and request id or None if account is not indexed
+        """
+        key = _pack_account(account)
+
+        with self._lock:
+            date_index = self._dates.get(str(date))
+            if date_index is None or key is None:
+                return None
+
+            subjects = [date_index.subjects[ref] for ref in date_index.find(key)]
+
+        if not subjects:
+            return None
+
+        return [subject for subject, _ in subjects], subjects[0][1]
+
+    def check_nip(
+        self, nip: str, account: str, date: Union[datetime.date, str]
+    ) -> Optional[Tuple[bool, str]]:
+        """
+        Check if given account is assigned to the subject with given nip.
+
+        Subjects with virtual accounts are answered only when the account is listed,
+        as virtual accounts are not returned by the API.
+
+        :param nip: nip number of the subject to check
+        :param account: account number of the subject to check
+        :param date: date data is acquired from
+        :return: check result and request id or None if it can't be answered
+        """
+        with self._lock:
+            date_index = self._dates.get(str(date))
+            if date_index is None or nip not in date_index.by_nip:
+                return None
+
+            subject, request_id = date_index.subjects[date_index.by_nip[nip]]
+
+        if account in (subject.account_numbers or ()):
+            return True, request_id
+
+        if subject.has_virtual_accounts:
+            return None
+
+        return False, request_id
+
+    def save(self, path: str) -> None:
+        """
+        Persist the index to the file.
+
+        :param path: path of the file
+        """
+        self.compact()
+
+        with self._lock, open(path, "wb") as file:
+            pickle.dump((self.compact_threshold, self._dates), file)
+
+    @classmethod
+    def load(cls, path: str) -> "AccountIndex":
+        """
+        Load the index persisted with `save`.
+
+        :param path: path of the file
+        :return: loaded index
+        """
+        with open(path, "rb") as file:
+            compact_threshold, dates = pickle.load(file)
+
+        index = cls(compact_threshold=compact_threshold)
+        index._dates = dates
+        return index
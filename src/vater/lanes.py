@@ -0,0 +1,173 @@
+"""Priority lanes module."""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterator, Optional, Tuple
+
+from vater.cancellation import POLL_INTERVAL, CancellationToken
+
+# lanes from the highest to the lowest priority
+LANES = ("interactive", "normal", "bulk")
+# shared quota priorities of the lanes, the normal lane uses the one of the limiter
+QUOTA_PRIORITIES = {"interactive": "interactive", "bulk": "batch"}
+
+
+@dataclass
+class LaneStats:
+    """Queue depth and wait time counters of a single lane."""
+
+    depth: int = 0
+    max_depth: int = 0
+    requests: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        """Get mean number of seconds requests waited in the queue."""
+        return self.total_wait / self.requests if self.requests else 0.0
+
+
+class PriorityScheduler:
+    """
+    Scheduler letting requests of higher priority lanes jump the queue.
+
+    At most `max_concurrency` requests are sent at once and at most `limits[lane]`
+    of them from a single lane. A free slot is given to the oldest waiting request
+    of the highest priority lane which is under its limit, so interactive lookups
+    don't wait behind queued bulk batches. Requests of a lane leave
+    `rate_reserve[lane]` tokens of the client rate limiter to the other lanes.
+    Slots of requests whose cancellation token is cancelled are given back right
+    away, without waiting for the abandoned responses.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        limits: Optional[Dict[str, int]] = None,
+        rate_reserve: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """
+        Initialize empty queues.
+
+        :param max_concurrency: maximal number of requests sent at once
+        :param limits: maximal number of requests sent at once per lane,
+                       half of `max_concurrency` for the bulk lane by default
+        :param rate_reserve: number of rate limiter tokens left by requests per lane
+        """
+        self.max_concurrency = max_concurrency
+        self.limits = {
+            "interactive": max_concurrency,
+            "normal": max_concurrency,
+            "bulk": max(1, max_concurrency // 2),
+            **(limits or {}),
+        }
+        self.rate_reserve = {lane: 0 for lane in LANES}
+        self.rate_reserve.update(rate_reserve or {})
+        self.stats = {lane: LaneStats() for lane in LANES}
+        self._queues: Dict[str, Deque[object]] = {lane: deque() for lane in LANES}
+        self._running = {lane: 0 for lane in LANES}
+        # lanes and tokens of the held slots which may be cancelled
+        self._cancellable: Dict[object, Tuple[str, CancellationToken]] = {}
+        self._condition = threading.Condition()
+        self._local = threading.local()
+
+    def current_lane(self, default: str) -> str:
+        """Get lane set for the current thread or the given default."""
+        return getattr(self._local, "lane", None) or default
+
+    @contextmanager
+    def lane(self, name: str) -> Iterator[None]:
+        """
+        Send requests of the current thread in the given lane.
+
+        :param name: `interactive`, `normal` or `bulk`
+        """
+        if name not in LANES:
+            raise ValueError(f"lane must be one of {LANES}")
+
+        previous = getattr(self._local, "lane", None)
+        self._local.lane = name
+        try:
+            yield
+        finally:
+            self._local.lane = previous
+
+    def _release_cancelled(self) -> None:
+        """Give back slots of the requests with cancelled tokens."""
+        for ticket, (lane, token) in list(self._cancellable.items()):
+            if token.cancelled:
+                del self._cancellable[ticket]
+                self._running[lane] -= 1
+
+    def _next(self) -> Optional[object]:
+        """Get ticket of the waiting request allowed to run next."""
+        if sum(self._running.values()) >= self.max_concurrency:
+            return None
+
+        for lane in LANES:
+            queue = self._queues[lane]
+            if queue and self._running[lane] < self.limits[lane]:
+                return queue[0]
+
+        return None
+
+    @contextmanager
+    def slot(
+        self, lane: str, token: Optional[CancellationToken] = None
+    ) -> Iterator[None]:
+        """
+        Wait for a free slot of the lane and hold it.
+
+        :param lane: `interactive`, `normal` or `bulk`
+        :param token: cancellation token removing the request from the queue
+                      and giving its slot back once it's cancelled
+        """
+        if lane not in LANES:
+            raise ValueError(f"lane must be one of {LANES}")
+
+        stats = self.stats[lane]
+        ticket = object()
+        start = time.monotonic()
+
+        with self._condition:
+            self._queues[lane].append(ticket)
+            stats.depth += 1
+            stats.max_depth = max(stats.max_depth, stats.depth)
+
+            self._release_cancelled()
+            while self._next() is not ticket:
+                if token is not None and token.cancelled:
+                    self._queues[lane].remove(ticket)
+                    stats.depth -= 1
+                    self._condition.notify_all()
+                    token.check()
+
+                # cancellations of the held slots aren't notified about
+                poll = token is not None or self._cancellable
+                self._condition.wait(POLL_INTERVAL if poll else None)
+                self._release_cancelled()
+
+            self._queues[lane].popleft()
+            self._running[lane] += 1
+            if token is not None:
+                self._cancellable[ticket] = (lane, token)
+            wait = time.monotonic() - start
+            stats.depth -= 1
+            stats.requests += 1
+            stats.total_wait += wait
+            stats.max_wait = max(stats.max_wait, wait)
+            # the next waiting request may be allowed to run as well
+            self._condition.notify_all()
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                # the slot may have been given back once the token was cancelled
+                if token is None or ticket in self._cancellable:
+                    self._cancellable.pop(ticket, None)
+                    self._running[lane] -= 1
+                self._condition.notify_all()
@@ -0,0 +1,199 @@
+"""Memory-mapped response cache module."""
+import datetime
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+from vater.cache import Cache, CacheKey, next_refresh
+
+MAGIC = b"VATERMC1"
+# magic, slot count, data size, data tail, entries count, expiration timestamp
+HEADER = struct.Struct("<8sQQQQd")
+# key hash, record offset
+SLOT = struct.Struct("<QQ")
+# key length, value length
+RECORD = struct.Struct("<II")
+MAX_LOAD_FACTOR = 0.75
+
+
+def hash_key(key: bytes) -> int:
+    """Get hash of the key, which is the same in all processes and never 0."""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") or 1
+
+
+class MmapCache(Cache):
+    """
+    Response cache stored in a memory-mapped file shared by processes on a host.
+
+    The file holds an open addressing hash table followed by an append-only data
+    area. Readers take a shared file lock and writers an exclusive one, and threads
+    of the process are serialized by a thread lock, as file locks are held by the
+    process. All entries expire together at the register's daily refresh, and the
+    table is cleared when it's expired or full, so no per entry bookkeeping is
+    needed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        slots: int = 65536,
+        data_size: int = 64 * 1024 * 1024,
+        refresh_time: datetime.time = datetime.time(0),
+    ) -> None:
+        """
+        Open or create the cache file.
+
+        If the file already exists, its slots count and data size are used.
+
+        :param path: path of the cache file, e.g. on tmpfs like `/dev/shm`
+        :param slots: number of hash table slots
+        :param data_size: size of the data area in bytes
+        :param refresh_time: local time the register is refreshed at
+        """
+        super().__init__(refresh_time)
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        with self._lock(fcntl.LOCK_EX):
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, HEADER.size + slots * SLOT.size + data_size)
+                self._mmap = mmap.mmap(self._fd, 0)
+                self._slots, self._data_size = slots, data_size
+                self._reset()
+            else:
+                self._mmap = mmap.mmap(self._fd, 0)
+                magic, self._slots, self._data_size, *_ = HEADER.unpack_from(self._mmap)
+                if magic != MAGIC:
+                    raise ValueError(f"{path} is not a vater cache file")
+
+        self._data_offset = HEADER.size + self._slots * SLOT.size
+
+    @contextmanager
+    def _lock(self, operation: int) -> Iterator[None]:
+        """Hold the thread lock and the file lock."""
+        with self._thread_lock:
+            fcntl.flock(self._fd, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _reset(self) -> None:
+        """Remove all entries, lock has to be held exclusively."""
+        self._mmap[HEADER.size : HEADER.size + self._slots * SLOT.size] = bytes(
+            self._slots * SLOT.size
+        )
+        HEADER.pack_into(
+            self._mmap,
+            0,
+            MAGIC,
+            self._slots,
+            self._data_size,
+            0,
+            0,
+            next_refresh(self.refresh_time),
+        )
+
+    def _find(self, key: bytes) -> Tuple[int, Optional[int]]:
+        """Get slot position of the key and its record position if it's stored."""
+        key_hash = hash_key(key)
+        slot = key_hash % self._slots
+
+        for _ in range(self._slots):
+            position = HEADER.size + slot * SLOT.size
+            slot_hash, offset = SLOT.unpack_from(self._mmap, position)
+
+            if slot_hash == 0:
+                return position, None
+
+            if slot_hash == key_hash:
+                record = self._data_offset + offset
+                key_length, _ = RECORD.unpack_from(self._mmap, record)
+                start = record + RECORD.size
+                if self._mmap[start : start + key_length] == key:
+                    return position, record
+
+            slot = (slot + 1) % self._slots
+
+        raise RuntimeError("cache hash table is full")
+
+    def _value_view(self, record: int) -> memoryview:
+        """Get view of the record value."""
+        key_length, value_length = RECORD.unpack_from(self._mmap, record)
+        start = record + RECORD.size + key_length
+        return memoryview(self._mmap)[start : start + value_length]
+
+    def _get_view(self, key: CacheKey) -> Optional[memoryview]:
+        """Get view of the cached response body, lock has to be held."""
+        if HEADER.unpack_from(self._mmap)[5] <= time.time():
+            return None
+
+        _, record = self._find("|".join(key).encode())
+        return None if record is None else self._value_view(record)
+
+    def get_view(self, key: CacheKey) -> Optional[memoryview]:
+        """
+        Get view of the cached response body without copying it.
+
+        The lock isn't held once the view is returned, so the record may be
+        overwritten by the refresh or a clear of the full table, in this or
+        another process, while the view is read. Use `get` unless the caller
+        tolerates that, e.g. by validating the decoded body.
+        """
+        with self._lock(fcntl.LOCK_SH):
+            return self._get_view(key)
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        """Return cached response body or None if it's missing or expired."""
+        with self._lock(fcntl.LOCK_SH):
+            view = self._get_view(key)
+            return None if view is None else view.tobytes()
+
+    def set(self, key: CacheKey, value: bytes) -> None:
+        """Store response body until the next register refresh."""
+        encoded_key = "|".join(key).encode()
+        size = RECORD.size + len(encoded_key) + len(value)
+
+        if size > self._data_size:
+            return
+
+        with self._lock(fcntl.LOCK_EX):
+            _, _, _, tail, count, expires = HEADER.unpack_from(self._mmap)
+            full = (
+                tail + size > self._data_size,
+                count + 1 > self._slots * MAX_LOAD_FACTOR,
+            )
+
+            if expires <= time.time() or any(full):
+                self._reset()
+                tail, count = 0, 0
+
+            position, record = self._find(encoded_key)
+            start = self._data_offset + tail
+            RECORD.pack_into(self._mmap, start, len(encoded_key), len(value))
+            self._mmap[start + RECORD.size : start + size] = encoded_key + value
+            SLOT.pack_into(self._mmap, position, hash_key(encoded_key), tail)
+
+            HEADER.pack_into(
+                self._mmap,
+                0,
+                MAGIC,
+                self._slots,
+                self._data_size,
+                tail + size,
+                count if record is not None else count + 1,
+                HEADER.unpack_from(self._mmap)[5],
+            )
+
+    def close(self) -> None:
+        """Unmap and close the cache file."""
+        self._mmap.close()
+        os.close(self._fd)
@@ -1,9 +1,8 @@
-"""Schemas and models module."""
+"""Models module."""
 import datetime
+import importlib
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
-
-from marshmallow import Schema, fields, post_load
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 
 @dataclass
@@ -17,21 +16,6 @@ class Company:
     pesel: Optional[str]
 
 
-class CompanySchema(Schema):
-    """Schema for company entity."""
-
-    company_name = fields.String(data_key="companyName", required=True, allow_none=True)
-    first_name = fields.String(data_key="firstName", required=True, allow_none=True)
-    last_name = fields.String(data_key="lastName", required=True, allow_none=True)
-    nip = fields.String(required=True, allow_none=True)
-    pesel = fields.String(allow_none=True, required=True)
-
-    @post_load
-    def make_company(self, data: Dict[str, str], **kwargs: Any) -> Company:
-        """Create a company instance."""
-        return Company(**data)
-
-
 @dataclass
 class Subject:
     """Class representing subject in vat payers register."""
@@ -58,43 +42,77 @@ class Subject:
     has_virtual_accounts: Optional[bool]
 
 
-class SubjectSchema(Schema):
-    """Schema for subject entity."""
-
-    name = fields.String()
-    nip = fields.String(allow_none=True)
-    status_vat = fields.String(data_key="statusVat", allow_none=True)
-    regon = fields.String(allow_none=True)
-    pesel = fields.String(allow_none=True)
-    krs = fields.String(allow_none=True)
-    residence_address = fields.String(data_key="residenceAddress", allow_none=True)
-    working_address = fields.String(data_key="workingAddress", allow_none=True)
-    representatives = fields.List(fields.Nested(CompanySchema), allow_none=True)
-    authorized_clerks = fields.List(
-        fields.Nested(CompanySchema), data_key="authorizedClerks", allow_none=True
-    )
-    partners = fields.List(fields.Nested(CompanySchema))
-    registration_legal_date = fields.Date(
-        data_key="registrationLegalDate", allow_none=True
-    )
-    registration_denial_basis = fields.String(
-        data_key="registrationDenialBasis", allow_none=True
-    )
-    registration_denial_date = fields.Date(
-        data_key="registrationDenialDate", allow_none=True
-    )
-    restoration_basis = fields.String(data_key="restorationBasis", allow_none=True)
-    restoration_date = fields.Date(data_key="restorationDate", allow_none=True)
-    removal_basis = fields.String(data_key="removalBasis", allow_none=True)
-    removal_date = fields.Date(data_key="removalDate", allow_none=True)
-    account_numbers = fields.List(
-        fields.String(), data_key="accountNumbers", allow_none=True
-    )
-    has_virtual_accounts = fields.Boolean(
-        data_key="hasVirtualAccounts", allow_none=True
-    )
-
-    @post_load
-    def make_subject(self, data: dict, **kwargs: Any) -> Subject:
-        """Create a subject instance."""
-        return Subject(**data)
+def _load_date(value: Optional[str]) -> Optional[datetime.date]:
+    """Parse date of the API json."""
+    return None if value is None else datetime.date.fromisoformat(value)
+
+
+def _load_companies(values: Optional[List[dict]]) -> Optional[List[Company]]:
+    """Create companies of the API json."""
+    if values is None:
+        return None
+
+    return [
+        Company(
+            company_name=value.get("companyName"),
+            first_name=value.get("firstName"),
+            last_name=value.get("lastName"),
+            nip=value.get("nip"),
+            pesel=value.get("pesel"),
+        )
+        for value in values
+    ]
+
+
+# API json key and converter of every subject field
+SUBJECT_KEYS: Dict[str, Tuple[str, Optional[Callable[[Any], Any]]]] = {
+    "name": ("name", None),
+    "nip": ("nip", None),
+    "status_vat": ("statusVat", None),
+    "regon": ("regon", None),
+    "pesel": ("pesel", None),
+    "krs": ("krs", None),
+    "residence_address": ("residenceAddress", None),
+    "working_address": ("workingAddress", None),
+    "representatives": ("representatives", _load_companies),
+    "authorized_clerks": ("authorizedClerks", _load_companies),
+    "partners": ("partners", _load_companies),
+    "registration_legal_date": ("registrationLegalDate", _load_date),
+    "registration_denial_basis": ("registrationDenialBasis", None),
+    "registration_denial_date": ("registrationDenialDate", _load_date),
+    "restoration_basis": ("restorationBasis", None),
+    "restoration_date": ("restorationDate", _load_date),
+    "removal_basis": ("removalBasis", None),
+    "removal_date": ("removalDate", _load_date),
+    "account_numbers": ("accountNumbers", None),
+    "has_virtual_accounts": ("hasVirtualAccounts", None),
+}
+
+
+def load_projection(data: dict, fields: Iterable[str]) -> Subject:
+    """
+    Create subject with only given fields loaded from the API json.
+
+    Skipped fields are None, so neither dates are parsed nor companies are created
+    for fields the caller doesn't need. Values aren't validated by the schema.
+
+    :param data: subject json
+    :param fields: names of the loaded fields
+    :return: subject
+    """
+    values: Dict[str, Any] = dict.fromkeys(SUBJECT_KEYS)
+
+    for field in fields:
+        key, load = SUBJECT_KEYS[field]
+        value = data.get(key)
+        values[field] = value if load is None else load(value)
+
+    return Subject(**values)
+
+
+def __getattr__(name: str) -> Any:
+    """Import schemas lazily, as marshmallow is not needed for raw results."""
+    if name in ("CompanySchema", "SubjectSchema"):
+        return getattr(importlib.import_module("vater.schemas"), name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
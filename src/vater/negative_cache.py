@@ -0,0 +1,191 @@
+"""Negative cache module."""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+from vater.errors import ERROR_CODE_MAPPING, InvalidRequestData
+
+# expiration timestamp, request id and error code of an identifier and date
+Entry = Tuple[float, Optional[str], Optional[str]]
+
+
+class NegativeEntry(NamedTuple):
+    """Known negative result of the identifier search."""
+
+    # id of the request the identifier wasn't found by, None if answered by the filter
+    request_id: Optional[str]
+    # error the identifier was rejected with, None if it isn't registered
+    error: Optional[InvalidRequestData]
+
+
+class BloomFilter:
+    """
+    Compact set of strings answering membership with false positives.
+
+    The bit array is sized for `capacity` strings at `error_rate` false positives,
+    e.g. a million strings at 0.1% take less than 2 MB.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        """
+        Initialize empty bit array.
+
+        :param capacity: number of strings the filter is sized for
+        :param error_rate: probability of a false positive at full capacity
+        """
+        self.capacity = capacity
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str) -> Tuple[int, ...]:
+        """Get bit positions of the value with double hashing."""
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return tuple((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, value: str) -> None:
+        """Add the string to the filter."""
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+        self.count += 1
+
+    def __contains__(self, value: object) -> bool:
+        """Check if the string was probably added to the filter."""
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(str(value))
+        )
+
+    def clear(self) -> None:
+        """Remove all strings from the filter."""
+        self._bits = bytearray(len(self._bits))
+        self.count = 0
+
+
+class NegativeCache:
+    """
+    Thread safe cache of the identifiers not found or rejected by the API.
+
+    Entries are kept per identifier and date for `ttl` seconds, separately from
+    the response cache. Least recently used entries are evicted above
+    `max_entries`. With `bloom_capacity` given, evicted identifiers which aren't
+    registered are moved to a Bloom filter, so very large sets of misses are kept
+    in little memory at the cost of `bloom_error_rate` registered identifiers
+    being reported as not registered. The filter is cleared after `ttl` seconds
+    or once it's full.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 3600.0,
+        max_entries: int = 100_000,
+        *,
+        bloom_capacity: Optional[int] = None,
+        bloom_error_rate: float = 0.001,
+    ) -> None:
+        """
+        Initialize empty cache.
+
+        :param ttl: number of seconds entries are kept for
+        :param max_entries: maximal number of entries kept in the dictionary
+        :param bloom_capacity: number of evicted misses kept in the Bloom filter
+        :param bloom_error_rate: probability of a false positive of the Bloom filter
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Entry]" = OrderedDict()
+        self.bloom: Optional[BloomFilter] = None
+        if bloom_capacity is not None:
+            self.bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+
+        self._bloom_expires = time.time() + ttl
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Get number of entries kept in the dictionary."""
+        return len(self._entries)
+
+    def _set(
+        self, key: Tuple[str, str], request_id: Optional[str], code: Optional[str]
+    ) -> None:
+        """Store the entry evicting the least recently used ones."""
+        with self._lock:
+            self._entries[key] = time.time() + self.ttl, request_id, code
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                evicted, (_, _, evicted_code) = self._entries.popitem(last=False)
+                if self.bloom is not None and evicted_code is None:
+                    self._add_to_bloom(self.bloom, "/".join(evicted))
+
+    def _add_to_bloom(self, bloom: BloomFilter, value: str) -> None:
+        """Add the miss to the Bloom filter, clearing it first if it's expired."""
+        if self._bloom_expires < time.time() or bloom.count >= bloom.capacity:
+            bloom.clear()
+            self._bloom_expires = time.time() + self.ttl
+
+        bloom.add(value)
+
+    def _in_bloom(self, key: Tuple[str, str]) -> bool:
+        """Check if the miss was probably moved to the Bloom filter."""
+        if self.bloom is None or self._bloom_expires < time.time():
+            return False
+
+        return "/".join(key) in self.bloom
+
+    def add(self, identifier: str, date: str, error: InvalidRequestData) -> None:
+        """
+        Remember that the identifier was rejected.
+
+        :param identifier: rejected nip, regon or account number
+        :param date: date the identifier was searched for
+        :param error: error raised for the identifier
+        """
+        if error.code is not None:
+            self._set((identifier, date), None, error.code)
+
+    def add_absent(self, identifier: str, date: str, request_id: str) -> None:
+        """
+        Remember that no subject was found for the identifier.
+
+        :param identifier: nip, regon or account number
+        :param date: date the identifier was searched for
+        :param request_id: id of the request the identifier wasn't found by
+        """
+        self._set((identifier, date), request_id, None)
+
+    def get(self, identifier: str, date: str) -> Optional[NegativeEntry]:
+        """
+        Get negative result of the identifier search.
+
+        :param identifier: nip, regon or account number
+        :param date: date the identifier is searched for
+        :return: negative result or None if the identifier isn't known
+        """
+        key = identifier, date
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.time():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                return NegativeEntry(None, None) if self._in_bloom(key) else None
+
+            self._entries.move_to_end(key)
+
+        _, request_id, code = entry
+        if code is None:
+            return NegativeEntry(request_id, None)
+
+        return NegativeEntry(
+            request_id, InvalidRequestData(ERROR_CODE_MAPPING[code], code)
+        )
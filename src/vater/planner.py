@@ -0,0 +1,236 @@
+"""Lookup planner module."""
+import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from vater.bulk import (
+    bounded_map,
+    check_unlisted,
+    chunks,
+    job_cancellation,
+    listed_result,
+    thread_pool,
+)
+from vater.cancellation import CancellationToken
+from vater.request_types import SearchRequest
+from vater.results import Result
+from vater.validators import (
+    account_validator,
+    date_validator,
+    nip_validator,
+    regon_validator,
+)
+
+# client many values search method answering every kind of lookup
+SEARCH_METHODS = {
+    "nip": "search_nips",
+    "regon": "search_regons",
+    "account": "search_accounts",
+    "check": "search_nips",
+}
+
+
+class Lookup(NamedTuple):
+    """Single submitted lookup."""
+
+    kind: str
+    value: str
+    # account number checked for the nip of the `check` lookups
+    account: Optional[str]
+    date: str
+
+
+class Batch(NamedTuple):
+    """Single planned search request."""
+
+    method: str
+    date: str
+    values: List[str]
+
+
+class Planner:
+    """
+    Planner answering mixed lookups with the minimal number of search requests.
+
+    Lookups are grouped by date and search kind, duplicates are merged and
+    every batch is filled up to the limit of the API. Checks of the nip and
+    account pairs are merged into the nips searches and answered from
+    the subjects account numbers. Only unlisted accounts of the subjects having
+    virtual accounts are checked with additional requests.
+    """
+
+    def __init__(self, client: Any, *, max_workers: int = 4) -> None:
+        """
+        Initialize empty plan.
+
+        :param client: vat register client
+        :param max_workers: number of threads sending requests
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.lookups: List[Lookup] = []
+
+    def _add(
+        self,
+        kind: str,
+        value: str,
+        account: Optional[str],
+        date: Optional[Union[datetime.date, str]],
+    ) -> int:
+        """Add validated lookup and return its position."""
+        self.lookups.append(
+            Lookup(
+                kind,
+                value,
+                account,
+                date_validator(datetime.date.today() if date is None else date),
+            )
+        )
+        return len(self.lookups) - 1
+
+    def add_nip(
+        self, nip: str, date: Optional[Union[datetime.date, str]] = None
+    ) -> int:
+        """
+        Add search of the subject with given nip.
+
+        :param nip: nip number of the subject
+        :param date: date data is acquired from
+        :return: position of the lookup result
+        """
+        return self._add("nip", nip_validator(nip), None, date)
+
+    def add_regon(
+        self, regon: str, date: Optional[Union[datetime.date, str]] = None
+    ) -> int:
+        """
+        Add search of the subject with given regon.
+
+        :param regon: regon number of the subject
+        :param date: date data is acquired from
+        :return: position of the lookup result
+        """
+        return self._add("regon", regon_validator(regon), None, date)
+
+    def add_account(
+        self, account: str, date: Optional[Union[datetime.date, str]] = None
+    ) -> int:
+        """
+        Add search of the subjects with given account.
+
+        :param account: account number of the subjects
+        :param date: date data is acquired from
+        :return: position of the lookup result
+        """
+        return self._add("account", account_validator(account), None, date)
+
+    def add_check(
+        self,
+        nip: str,
+        account: str,
+        date: Optional[Union[datetime.date, str]] = None,
+    ) -> int:
+        """
+        Add check if the account is assigned to the subject with given nip.
+
+        :param nip: nip number of the subject
+        :param account: account number
+        :param date: date data is acquired from
+        :return: position of the lookup result
+        """
+        return self._add("check", nip_validator(nip), account_validator(account), date)
+
+    def batches(self) -> List[Batch]:
+        """Get planned search requests."""
+        values: Dict[Tuple[str, str], Dict[str, None]] = {}
+
+        for lookup in self.lookups:
+            key = SEARCH_METHODS[lookup.kind], lookup.date
+            values.setdefault(key, {})[lookup.value] = None
+
+        return [
+            Batch(method, date, batch)
+            for (method, date), found in sorted(values.items())
+            for batch in chunks(list(found), SearchRequest.PARAM_LIMIT)
+        ]
+
+    @property
+    def naive_requests(self) -> int:
+        """Get number of requests of the lookups sent one by one."""
+        return len(self.lookups)
+
+    @property
+    def planned_requests(self) -> int:
+        """Get number of planned search requests."""
+        return len(self.batches())
+
+    def explain(self) -> str:
+        """Describe planned requests and compare their number with the naive one."""
+        lines = [
+            f"{batch.date} {batch.method}: {len(batch.values)} values"
+            for batch in self.batches()
+        ]
+        lines.append(
+            f"{self.planned_requests} requests planned instead of "
+            f"{self.naive_requests} for {len(self.lookups)} lookups"
+        )
+        checks = sum(lookup.kind == "check" for lookup in self.lookups)
+        if checks:
+            lines.append(
+                f"up to {checks} checks of unlisted virtual accounts may be sent"
+            )
+
+        return "\n".join(lines)
+
+    def execute(self, token: Optional[CancellationToken] = None) -> List[Result]:
+        """
+        Send planned requests concurrently and answer all lookups.
+
+        :param token: cancellation token abandoning the remaining requests,
+                      by default the one of the calling thread requests
+        :return: result of every lookup in the order they were added
+        """
+        batches = self.batches()
+        token = self.client.current_token if token is None else token
+
+        def search(batch: Batch) -> Result:
+            """Send planned search request."""
+            method = getattr(self.client, batch.method)
+            with self.client.lane("bulk"), job_cancellation(self.client, token):
+                return method(batch.values, date=batch.date)
+
+        found: Dict[Tuple[str, str, str], Result] = {}
+        with thread_pool(self.max_workers, token) as threads:
+            for batch, result in zip(
+                batches,
+                bounded_map(search, batches, threads, 2 * self.max_workers, token),
+            ):
+                found.update(
+                    {
+                        (batch.method, batch.date, value): result
+                        for value in batch.values
+                    }
+                )
+
+            return check_unlisted(
+                self.client,
+                [self._answer(lookup, found) for lookup in self.lookups],
+                [
+                    (lookup.value, lookup.account, lookup.date)
+                    for lookup in self.lookups
+                ],
+                threads,
+                2 * self.max_workers,
+                token,
+            )
+
+    def _answer(
+        self, lookup: Lookup, found: Dict[Tuple[str, str, str], Result]
+    ) -> Optional[Result]:
+        """Answer the lookup from its search result, None if it has to be checked."""
+        result = found[SEARCH_METHODS[lookup.kind], lookup.date, lookup.value]
+
+        # only checks have an account
+        if lookup.account is not None:
+            return listed_result(lookup.value, lookup.account, result)
+
+        return result.for_input(lookup.value)
@@ -0,0 +1,278 @@
+"""Cache warm-up module."""
+import datetime
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from vater.bulk import bounded_map, chunks, thread_pool
+from vater.cache import next_refresh
+from vater.cancellation import CancellationToken
+from vater.errors import Cancelled, UnknownExternalApiError
+from vater.request_types import SearchRequest, load_subjects
+from vater.validators import normalize_account, normalize_nip, normalize_regon
+
+# client batch method, single value cache endpoint, subject field matched
+# with the value and flag indicating if the single value response has many subjects
+SEARCHES = {
+    "nips": ("search_nips", "/api/search/nip", "nip", False),
+    "regons": ("search_regons", "/api/search/regon", "regon", False),
+    "accounts": ("search_accounts", "/api/search/bank-account", "accountNumbers", True),
+}
+# functions turning the values into the form the cache keys are made of
+NORMALIZERS = {
+    "nips": normalize_nip,
+    "regons": normalize_regon,
+    "accounts": normalize_account,
+}
+
+
+def split_batch(
+    content: bytes, kind: str, batch: List[str]
+) -> Iterable[Tuple[str, bytes]]:
+    """
+    Split batch search response into single value search response bodies.
+
+    :param content: batch search response body
+    :param kind: kind of the searched values, `nips`, `regons` or `accounts`
+    :param batch: searched values
+    :return: value and single value search response body for every found value
+    """
+    _, _, field, many = SEARCHES[kind]
+    result = json.loads(content)["result"]
+    request_id = result["requestId"]
+    found: Dict[str, List[dict]] = {value: [] for value in batch}
+
+    for subject in result["subjects"]:
+        values = subject[field] if many else [subject[field]]
+        for value in values or ():
+            if value in found:
+                found[value].append(subject)
+
+    for value, subjects in found.items():
+        if many:
+            # virtual accounts aren't listed, so missing accounts are unknown
+            if subjects:
+                body = {"subjects": subjects, "requestId": request_id}
+                yield value, json.dumps({"result": body}).encode()
+        elif kind == "nips" or subjects:
+            subject = subjects[0] if subjects else None
+            body = {"subject": subject, "requestId": request_id}
+            yield value, json.dumps({"result": body}).encode()
+
+
+class PrefetchJob:
+    """
+    Background job loading subjects into the client cache and account index.
+
+    Values are searched in batches of the maximal size allowed by the API and
+    the batch responses are split, so single value searches and account index
+    lookups are answered without a request.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        nips: Iterable[str] = (),
+        regons: Iterable[str] = (),
+        accounts: Iterable[str] = (),
+        date: Optional[Union[datetime.date, str]] = None,
+        max_workers: int = 4,
+        on_progress: Optional[Callable[["PrefetchJob"], None]] = None,
+        token: Optional[CancellationToken] = None,
+    ) -> None:
+        """
+        Split normalized values into batches.
+
+        :param client: vat register client with a cache or an account index
+        :param nips: nip numbers of the subjects to load
+        :param regons: regon numbers of the subjects to load
+        :param accounts: account numbers of the subjects to load
+        :param date: date data is acquired from
+        :param max_workers: number of threads sending requests
+        :param on_progress: function called with the job after every batch
+        :param token: cancellation token of the job, a new one by default
+        """
+        if client.cache is None and client.index is None:
+            raise ValueError("client has neither a cache nor an account index")
+
+        self.client = client
+        self.date = datetime.date.today() if date is None else date
+        self.max_workers = max_workers
+        self.on_progress = on_progress
+        self.token = CancellationToken() if token is None else token
+        self.batches = [
+            (kind, batch)
+            for kind, values in (
+                ("nips", nips),
+                ("regons", regons),
+                ("accounts", accounts),
+            )
+            for batch in chunks(
+                sorted(set(map(NORMALIZERS[kind], values))), SearchRequest.PARAM_LIMIT
+            )
+        ]
+        self.completed = 0
+        # number of single value search responses stored in the cache
+        self.loaded = 0
+        self.errors: List[Tuple[List[str], Exception]] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._finished = threading.Event()
+
+    @property
+    def total(self) -> int:
+        """Get number of batches."""
+        return len(self.batches)
+
+    @property
+    def progress(self) -> float:
+        """Get fraction of completed batches."""
+        return self.completed / self.total if self.batches else 1.0
+
+    @property
+    def done(self) -> bool:
+        """Check if all batches are completed."""
+        return self._finished.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the job is done.
+
+        :param timeout: maximal number of seconds to wait
+        :return: flag indicating if the job is done
+        """
+        return self._finished.wait(timeout)
+
+    def cancel(self) -> None:
+        """Stop sending batches, abandoning the ones in flight."""
+        self.token.cancel()
+
+    def start(self) -> "PrefetchJob":
+        """Run the job in a background thread."""
+        threading.Thread(target=self.run, daemon=True).start()
+        return self
+
+    def run(self) -> None:
+        """Load all batches in the current thread."""
+        self.started_at = time.time()
+
+        try:
+            with thread_pool(self.max_workers, self.token) as threads:
+                for task, loaded, error in bounded_map(
+                    self._load, self.batches, threads, 2 * self.max_workers, self.token
+                ):
+                    self.completed += 1
+                    self.loaded += loaded
+                    if error is not None:
+                        self.errors.append((task[1], error))
+
+                    if self.on_progress is not None:
+                        self.on_progress(self)
+        except Cancelled:
+            # remaining batches are abandoned, completed ones stay loaded
+            pass
+        finally:
+            self.finished_at = time.time()
+            self._finished.set()
+
+    def _load(
+        self, task: Tuple[str, List[str]]
+    ) -> Tuple[Tuple[str, List[str]], int, Optional[Exception]]:
+        """Search the batch and store its results."""
+        kind, batch = task
+        method, _, _, _ = SEARCHES[kind]
+
+        try:
+            with self.client.lane("bulk"), self.client.cancellation(self.token):
+                response = getattr(self.client, method)(
+                    batch, date=self.date, passthrough=True
+                )
+            # stale responses of the previous days mustn't be stored for the date
+            if response.status_code != 200 or "Warning" in response.headers:
+                raise UnknownExternalApiError(
+                    response.status_code, response.content.decode()
+                )
+
+            loaded = self._store(kind, batch, response.content)
+        except Exception as error:
+            return task, 0, error
+
+        return task, loaded, None
+
+    def _store(self, kind: str, batch: List[str], content: bytes) -> int:
+        """Add batch results to the client cache and account index."""
+        _, endpoint, _, _ = SEARCHES[kind]
+        date = str(self.date)
+        loaded = 0
+
+        if self.client.cache is not None:
+            for value, body in split_batch(content, kind, batch):
+                self.client.cache.set((endpoint, value, date), body)
+                loaded += 1
+
+        if self.client.index is not None:
+            subjects, request_id = load_subjects(content, True)
+            self.client.index.add(subjects, date, request_id)  # type: ignore
+
+        return loaded
+
+
+class PrefetchScheduler:
+    """Daily prefetch of the same values run right after the register refresh."""
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        refresh_time: Optional[datetime.time] = None,
+        delay: datetime.timedelta = datetime.timedelta(minutes=1),
+        **kwargs: Any
+    ) -> None:
+        """
+        Initialize the scheduler.
+
+        :param client: vat register client with a cache or an account index
+        :param refresh_time: local time the register is refreshed at, by default
+                             the client cache refresh time or midnight
+        :param delay: time after the refresh the prefetch is started at
+        :param kwargs: `client.prefetch` arguments except date
+        """
+        if refresh_time is None:
+            cache = client.cache
+            refresh_time = datetime.time(0) if cache is None else cache.refresh_time
+
+        self.client = client
+        self.refresh_time = refresh_time
+        self.delay = delay
+        self.kwargs = kwargs
+        self.last_job: Optional[PrefetchJob] = None
+        self._stopped = threading.Event()
+
+    def next_run(self, now: Optional[datetime.datetime] = None) -> float:
+        """Get timestamp of the next prefetch."""
+        now = datetime.datetime.now() if now is None else now
+        refresh = next_refresh(self.refresh_time, now - self.delay)
+        return refresh + self.delay.total_seconds()
+
+    def run_once(self) -> PrefetchJob:
+        """Prefetch today's data and wait until it's loaded."""
+        self.last_job = self.client.prefetch(date=datetime.date.today(), **self.kwargs)
+        self.last_job.wait()
+        return self.last_job
+
+    def start(self) -> "PrefetchScheduler":
+        """Run the prefetch every day in a background thread."""
+
+        def loop() -> None:
+            """Wait for the next run until stopped."""
+            while not self._stopped.wait(max(0.0, self.next_run() - time.time())):
+                self.run_once()
+
+        threading.Thread(target=loop, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Stop scheduling new prefetches."""
+        self._stopped.set()
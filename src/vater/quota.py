@@ -0,0 +1,217 @@
+"""Host wide quota coordination module."""
+import datetime
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from vater.cache import next_refresh
+from vater.cancellation import CancellationToken
+from vater.errors import QuotaExceeded
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quota (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    used INTEGER,
+    resets REAL,
+    tokens REAL,
+    updated REAL
+);
+"""
+
+PRIORITIES = ("interactive", "batch")
+
+
+class QuotaCoordinator:
+    """
+    Daily quota and token bucket shared by all processes on the host.
+
+    The state is kept in a SQLite database file, whose lock serializes updates
+    made by all clients using the same `path`. Every request takes a token from
+    the common bucket refilled at `rate` per second and counts against
+    the `daily_limit`, which resets at the register's daily refresh.
+
+    Interactive traffic may use the whole budget. Batch jobs only use the capacity
+    left over: they leave `reserve` requests of the daily budget and `headroom`
+    tokens of the bucket to interactive requests.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        daily_limit: int,
+        rate: Optional[float] = None,
+        burst: int = 1,
+        *,
+        reserve: int = 0,
+        headroom: Optional[int] = None,
+        refresh_time: datetime.time = datetime.time(0),
+    ) -> None:
+        """
+        Open the shared state.
+
+        :param path: path of the SQLite database file shared by the processes
+        :param daily_limit: number of requests allowed per day
+        :param rate: number of requests allowed per second, unlimited by default
+        :param burst: maximal number of requests sent at once
+        :param reserve: number of daily requests batch jobs leave to interactive ones
+        :param headroom: number of bucket tokens batch jobs leave to interactive
+                         requests, half of the burst by default
+        :param refresh_time: local time the daily quota resets at
+        """
+        self.daily_limit = daily_limit
+        self.rate = rate
+        self.burst = burst
+        self.reserve = reserve
+        self.headroom = burst // 2 if headroom is None else headroom
+        self.refresh_time = refresh_time
+        self._connection = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._connection.executescript(SCHEMA)
+        self._connection.execute(
+            "INSERT OR IGNORE INTO quota VALUES (1, 0, ?, ?, ?)",
+            (next_refresh(refresh_time), float(burst), time.time()),
+        )
+        self._lock = threading.Lock()
+
+    def _load(self, now: float) -> Tuple[int, float, float]:
+        """Get used requests, reset timestamp and refilled tokens of the bucket."""
+        used, resets, tokens, updated = self._connection.execute(
+            "SELECT used, resets, tokens, updated FROM quota"
+        ).fetchone()
+
+        if resets <= now:
+            used, resets = 0, next_refresh(self.refresh_time)
+
+        if self.rate is not None:
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+
+        return used, resets, tokens
+
+    def take(self, tokens: int = 1, priority: str = "interactive") -> float:
+        """
+        Take tokens from the shared budget if available.
+
+        :param tokens: number of requests to be sent
+        :param priority: `interactive` or `batch`
+        :return: 0 if tokens were taken, otherwise seconds to wait before retrying
+        :raises QuotaExceeded: if the daily budget of the priority is used up
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {PRIORITIES}")
+
+        batch = priority == "batch"
+        now = time.time()
+
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                used, resets, available = self._load(now)
+
+                if used + tokens > self.daily_limit - (self.reserve if batch else 0):
+                    raise QuotaExceeded(self.daily_limit - used, resets)
+
+                needed = tokens + (self.headroom if batch else 0)
+                if self.rate is not None and available < needed:
+                    return (needed - available) / self.rate
+
+                self._connection.execute(
+                    "UPDATE quota SET used = ?, resets = ?, tokens = ?, updated = ?",
+                    (
+                        used + tokens,
+                        resets,
+                        available - (tokens if self.rate is not None else 0),
+                        now,
+                    ),
+                )
+                return 0.0
+            finally:
+                self._connection.execute("COMMIT")
+
+    @property
+    def used(self) -> int:
+        """Get number of requests sent today by all processes."""
+        with self._lock:
+            used, _, _ = self._load(time.time())
+
+        return used
+
+    @property
+    def remaining(self) -> int:
+        """Get number of requests left in the daily budget."""
+        return self.daily_limit - self.used
+
+    def limiter(self, priority: str = "interactive") -> "QuotaLimiter":
+        """
+        Get limiter taking tokens of the given priority.
+
+        :param priority: `interactive` or `batch`
+        :return: limiter passed to the client as `quota`
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {PRIORITIES}")
+
+        return QuotaLimiter(self, priority)
+
+    def close(self) -> None:
+        """Close the database."""
+        self._connection.close()
+
+
+class QuotaLimiter:
+    """Limiter taking tokens of a single priority from the shared quota."""
+
+    def __init__(self, coordinator: QuotaCoordinator, priority: str) -> None:
+        """
+        Assign coordinator and priority.
+
+        :param coordinator: quota coordinator shared by the processes
+        :param priority: `interactive` or `batch`
+        """
+        self.coordinator = coordinator
+        self.priority = priority
+
+    @property
+    def remaining(self) -> int:
+        """Get number of requests left in the daily budget of the priority."""
+        reserve = self.coordinator.reserve if self.priority == "batch" else 0
+        return max(0, self.coordinator.remaining - reserve)
+
+    def try_acquire(self, tokens: int = 1) -> bool:
+        """
+        Take tokens if available right away.
+
+        :param tokens: number of tokens to take
+        :return: flag indicating if tokens were taken
+        """
+        try:
+            return self.coordinator.take(tokens, self.priority) == 0
+        except QuotaExceeded:
+            return False
+
+    def acquire(
+        self,
+        tokens: int = 1,
+        token: Optional[CancellationToken] = None,
+        priority: Optional[str] = None,
+    ) -> None:
+        """
+        Wait until tokens are available and take them.
+
+        :param tokens: number of tokens to take
+        :param token: cancellation token interrupting the wait
+        :param priority: priority of the tokens, the one of the limiter by default
+        :raises QuotaExceeded: if the daily budget of the priority is used up
+        """
+        priority = self.priority if priority is None else priority
+
+        while True:
+            delay = self.coordinator.take(tokens, priority)
+            if not delay:
+                return
+
+            if token is None:
+                time.sleep(delay)
+            else:
+                token.sleep(delay)
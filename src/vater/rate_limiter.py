@@ -0,0 +1,93 @@
+"""Rate limiter module."""
+import threading
+import time
+from typing import Optional
+
+from vater.cancellation import CancellationToken
+
+
+class RateLimiter:
+    """
+    Thread safe token bucket limiting the number of requests sent to the API.
+
+    Requests may leave a `reserve` of tokens to other requests. Tokens keep
+    accumulating over the `burst` while the bucket is full and count only towards
+    the reserve, so a reserving request is let through once the other requests
+    left `reserve / rate` seconds of capacity unused, even if `burst` is 1.
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        """
+        Initialize full bucket.
+
+        :param rate: number of requests allowed per second
+        :param burst: maximal number of requests sent at once
+        """
+        self.rate = rate
+        self.burst = burst
+        # may exceed the burst, only `burst` tokens are taken at once
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        """Add tokens accumulated since the last update."""
+        now = time.monotonic()
+        self._tokens += (now - self._updated) * self.rate
+        self._updated = now
+
+    def _missing(self, tokens: int, reserve: int) -> float:
+        """Get number of tokens missing to take given ones leaving the reserve."""
+        return max(
+            tokens - min(self.burst, self._tokens), tokens + reserve - self._tokens
+        )
+
+    def _take(self, tokens: int) -> None:
+        """Take tokens from the bucket, dropping ones accumulated over the burst."""
+        self._tokens = min(self.burst, self._tokens) - tokens
+
+    def try_acquire(self, tokens: int = 1, reserve: int = 0) -> bool:
+        """
+        Take tokens from the bucket if available.
+
+        :param tokens: number of tokens to take
+        :param reserve: number of tokens left in the bucket for other requests
+        :return: flag indicating if tokens were taken
+        """
+        with self._lock:
+            self._refill()
+
+            if self._missing(tokens, reserve) > 0:
+                return False
+
+            self._take(tokens)
+            return True
+
+    def acquire(
+        self,
+        tokens: int = 1,
+        reserve: int = 0,
+        token: Optional[CancellationToken] = None,
+    ) -> None:
+        """
+        Wait until tokens are available and take them.
+
+        :param tokens: number of tokens to take
+        :param reserve: number of tokens left in the bucket for other requests
+        :param token: cancellation token interrupting the wait
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                missing = self._missing(tokens, reserve)
+
+                if missing <= 0:
+                    self._take(tokens)
+                    return
+
+                delay = missing / self.rate
+
+            if token is None:
+                time.sleep(delay)
+            else:
+                token.sleep(delay)
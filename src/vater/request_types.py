@@ -1,53 +1,158 @@
 """This module contains logic for different API request types."""
 import datetime
+import json
+import re
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Tuple, Union
-
-import requests
-from requests import Response
+from typing import Any, BinaryIO, Dict, Iterable, List, Mapping, Optional, Tuple, Union
 
+from vater.cancellation import CancellationToken
+from vater.circuit_breaker import is_outage
+from vater.dedup import batches_needed, deduplicate
 from vater.errors import (
     ERROR_CODE_MAPPING,
+    IDENTIFIER_CODES,
+    ApiUnavailable,
+    DeadlineExceeded,
     InvalidRequestData,
     MaximumParameterNumberExceeded,
     UnknownExternalApiError,
 )
-from vater.models import Subject, SubjectSchema
+from vater.lanes import QUOTA_PRIORITIES
+from vater.models import Subject, load_projection
+from vater.results import INPUT_FIELDS, Result, match_inputs
+
+# headers of responses served from the cache
+CACHED_HEADERS = {"Content-Type": "application/json"}
+STALE_HEADERS = {**CACHED_HEADERS, "Warning": '110 - "Response is Stale"'}
+# statuses of responses sent while the API, or the daemon in front of it, is down
+UNAVAILABLE_STATUSES = {502, 503}
+
+
+class RawResponse:
+    """Undecoded API response body with its status code and headers."""
+
+    __slots__ = ("content", "status_code", "headers")
+
+    def __init__(
+        self,
+        content: bytes,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        """
+        Assign response data to the instance.
+
+        :param content: response body
+        :param status_code: response status code
+        :param headers: response headers
+        """
+        self.content = content
+        self.status_code = status_code
+        self.headers = CACHED_HEADERS if headers is None else headers
+
+    def view(self) -> memoryview:
+        """Get view of the response body without copying it."""
+        return memoryview(self.content)
+
+    @property
+    def text(self) -> str:
+        """Get the response body as text."""
+        return self.content.decode(errors="replace")
+
+    def json(self) -> Any:
+        """Decode the response body."""
+        return json.loads(self.content)
+
+    @property
+    def retry_after(self) -> float:
+        """Get number of seconds of the `Retry-After` header, 0 if it isn't given."""
+        try:
+            return float(self.headers.get("Retry-After", 0))
+        except ValueError:
+            return 0.0
+
+    def write_to(self, file: BinaryIO, chunk_size: int = 65536) -> int:
+        """
+        Write the response body to the binary file-like object in chunks.
+
+        :param file: file-like object to write to, e.g. a socket file
+        :param chunk_size: maximal number of bytes written at once
+        :return: number of written bytes
+        """
+        view = self.view()
+
+        for start in range(0, len(view), chunk_size):
+            file.write(view[start : start + chunk_size])
+
+        return len(view)
 
 
 class RequestType(ABC):
     """Base class for all request types."""
 
-    def __init__(self, url_pattern: str, *args, validators=None, **kwargs) -> None:
+    LANE = "normal"
+
+    def __init__(
+        self,
+        url_pattern: str,
+        *args,
+        validators=None,
+        index_lookup: Optional[str] = None,
+        **kwargs
+    ) -> None:
         """Initialize instance parameters."""
         self.params: Dict[str, Any] = {}
         self.url_pattern = url_pattern
         self.validators = {} if validators is None else validators
         self.validated_params: dict = {}
+        self.index_lookup = index_lookup
+        self.input_param = re.findall(r"{(\w+)}", url_pattern)[0]
+        self.inputs: Optional[List[str]] = None
+        self.errors: Dict[str, Exception] = {}
+        self.outage = False
+        self.from_cache = False
+        self.stale_date: Optional[str] = None
+        self.started = time.perf_counter()
+        # lane of the client scheduler the request is sent in
+        self.lane = self.LANE
+        self.token: Optional[CancellationToken] = None
 
     def _get_url(self) -> None:
-        """Interpolate endpoint url."""
+        """Interpolate endpoint url and cache key."""
         url = self.url_pattern
+        identifiers = []
+
+        for key in re.findall(r"{(\w+)}", self.url_pattern):
+            value = self.validated_params[key]
+            if not isinstance(value, (str, datetime.date)):
+                value = ",".join(value)
 
-        for key, value in self.validated_params.items():  # type: ignore
-            if f"{{{key}}}" in self.url_pattern:
-                if isinstance(value, (str, datetime.date)):
-                    url = url.replace(f"{{{key}}}", str(value))
-                else:
-                    url = url.replace(f"{{{key}}}", ",".join(value))
+            url = url.replace(f"{{{key}}}", str(value))
+            if key != "date":
+                identifiers.append(str(value))
 
         self.url = self.client.base_url + url  # type: ignore
+        self.cache_key = (
+            self.url_pattern.split("/{")[0],
+            "/".join(identifiers),
+            str(self.validated_params["date"]),
+        )
 
     def register_params(self, **kwargs: Any) -> None:
         """Register parameters to the instance."""
         self.client = kwargs.pop("client")
         self.params = kwargs
+        self.token = self.client.current_token
 
         if self.params["date"] is None:  # type: ignore
             self.params["date"] = datetime.date.today()  # type: ignore
 
     def validate(self) -> None:
         """Validate given parameters."""
+        if self.token is not None:
+            self.token.check()
+
         for param, value in self.params.items():  # type: ignore
             try:
                 for validator in self.validators[param]:
@@ -55,18 +160,230 @@ class RequestType(ABC):
             except KeyError:
                 self.validated_params[param] = value
 
-    def send_request(self) -> Response:
-        """Get response from the API."""
+    def index_result(self) -> Optional[Tuple[Any, str]]:
+        """Return result answered by the client account index if possible."""
+        index = self.client.index  # type: ignore
+
+        if index is None or self.index_lookup is None or self.params.get("raw"):
+            return None
+
+        return getattr(index, self.index_lookup)(
+            **{
+                key: value
+                for key, value in self.validated_params.items()
+                if key not in ("raw", "passthrough", "fields")
+            }
+        )
+
+    def fetch(self) -> bytes:
+        """Get response body from the client cache or from the API."""
+        self._get_url()
+        cache = self.client.cache  # type: ignore
+
+        if cache is not None:
+            content = cache.get(self.cache_key)
+            if content is not None:
+                self.from_cache = True
+                return content
+
+        try:
+            content = self.send_request().content
+        except Exception:
+            stale = self.stale_content()
+            if stale is None:
+                raise
+
+            return stale
+
+        if cache is not None:
+            cache.set(self.cache_key, content)
+
+        return content
+
+    def stale_content(self) -> Optional[bytes]:
+        """
+        Get last known response body if the request failed because of an outage.
+
+        A probe refreshing the cache is sent in the background once the client
+        circuit breaker lets it through.
+        """
+        cache = self.client.cache  # type: ignore
+
+        # raw results are plain dicts, which can't be flagged as stale
+        if self.params.get("raw") or not self.client.serve_stale:  # type: ignore
+            return None
+
+        if not self.outage or cache is None:
+            return None
+
+        stale = cache.get_stale(self.cache_key)
+        if stale is None:
+            return None
+
+        if self.client.circuit_breaker is not None:  # type: ignore
+            self.client.circuit_breaker.probe(self.refresh)  # type: ignore
+
+        self.stale_date, content = stale
+        return content
+
+    def refresh(self) -> None:
+        """Send the request and store its response in the client cache."""
+        self.client.cache.set(  # type: ignore
+            self.cache_key, self.send_request().content
+        )
+
+    def passthrough(self) -> RawResponse:
+        """Get undecoded response from the client cache or from the API."""
         self._get_url()
-        response = requests.get(self.url)
+        cache = self.client.cache  # type: ignore
+
+        if cache is not None:
+            content = cache.get(self.cache_key)
+            if content is not None:
+                return RawResponse(content)
+
+        # error responses are returned as they are, to be forwarded by the caller
+        try:
+            response = self.send_request(check_status=False)
+        except Exception:
+            stale = self.stale_content()
+            if stale is None:
+                raise
+
+            return RawResponse(stale, headers=STALE_HEADERS)
+
+        if self.outage:
+            stale = self.stale_content()
+            if stale is not None:
+                return RawResponse(stale, headers=STALE_HEADERS)
+
+        if cache is not None and response.status_code == 200:
+            cache.set(self.cache_key, response.content)
+
+        return response
+
+    def get_response(self) -> RawResponse:
+        """Send the request in its lane of the client scheduler."""
+        scheduler = self.client.scheduler  # type: ignore
+        if scheduler is None:
+            return self.send(self.lane)
+
+        lane = scheduler.current_lane(self.lane)
+        with scheduler.slot(lane, self.token):
+            return self.send(lane, scheduler.rate_reserve[lane])
+
+    def send(self, lane: str, reserve: int = 0) -> RawResponse:
+        """
+        Send the request within the client rate limit and circuit breaker.
+
+        :param lane: lane the request is sent in
+        :param reserve: number of rate limiter tokens left for other lanes
+        """
+        if self.client.rate_limiter is not None:  # type: ignore
+            self.client.rate_limiter.acquire(  # type: ignore
+                reserve=reserve, token=self.token
+            )
+
+        quota = self.client.quota  # type: ignore
+        if quota is not None:
+            quota.acquire(
+                token=self.token, priority=QUOTA_PRIORITIES.get(lane, quota.priority)
+            )
+
+        breaker = self.client.circuit_breaker  # type: ignore
+        if breaker is None:
+            return self.hedged_get()
+
+        probe = breaker.before_request()
+        try:
+            response = self.hedged_get()
+        # transports raise connection errors and timeouts as OSError subclasses
+        except OSError:
+            breaker.record_failure()
+            raise
+        else:
+            if is_outage(response):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        finally:
+            if probe:
+                breaker.release_probe()
+
+        return response
+
+    def hedged_get(self) -> RawResponse:
+        """Send GET request within the client hedging policy."""
+        hedging = self.client.hedging  # type: ignore
+        if hedging is None:
+            return self.transport_get()
+
+        quota = self.client.quota  # type: ignore
+        # hedges count against the shared quota if there is one
+        return hedging.call(
+            self.transport_get,
+            self.client.rate_limiter if quota is None else quota,  # type: ignore
+        )
+
+    def transport_get(self) -> RawResponse:
+        """Send GET request with the timeout bounded by the request deadline."""
+        if self.token is None:
+            return self.client.transport.get(self.url)  # type: ignore
+
+        self.token.check()
+        try:
+            return self.client.transport.get(  # type: ignore
+                self.url, timeout=self.token.remaining()
+            )
+        except OSError as error:
+            # timeouts caused by the caller's deadline don't mean the API is down
+            if self.token.expired:
+                raise DeadlineExceeded("deadline exceeded") from error
+            raise
+
+    def send_request(self, check_status: bool = True) -> RawResponse:
+        """Get response from the API."""
+        try:
+            response = self.get_response()
+        except (ApiUnavailable, OSError):
+            self.outage = True
+            raise
+
+        self.outage = is_outage(response)
+
+        if not check_status:
+            return response
 
         if response.status_code == 400:
-            raise InvalidRequestData(ERROR_CODE_MAPPING[response.json()["code"]])
+            code = response.json()["code"]
+            raise InvalidRequestData(ERROR_CODE_MAPPING[code], code)
+        elif response.status_code in UNAVAILABLE_STATUSES:
+            raise ApiUnavailable(response.retry_after)
         elif response.status_code != 200:
             raise UnknownExternalApiError(response.status_code, response.text)
 
         return response
 
+    def by_input(self, value: Any) -> Dict[str, Any]:
+        """Map the searched identifier to the result value."""
+        return {self.validated_params[self.input_param]: value}
+
+    def make_result(
+        self, value: Any, request_id: Optional[str], from_cache: bool = False
+    ) -> Result:
+        """Create result with the request metadata."""
+        return Result(
+            value,
+            request_id,
+            by_input=self.by_input(value),
+            inputs=self.inputs,
+            latency=time.perf_counter() - self.started,
+            from_cache=from_cache or self.from_cache,
+            stale=self.stale_date is not None,
+            date=self.stale_date or str(self.validated_params["date"]),
+            errors=self.errors,
+        )
+
     @abstractmethod
     def result(self):
         """Return request result."""
@@ -75,17 +392,28 @@ class RequestType(ABC):
 class CheckRequest(RequestType):
     """Class for check requests type."""
 
-    def result(self) -> Union[dict, Tuple[bool, str]]:
+    LANE = "interactive"
+
+    def result(self) -> Union[dict, RawResponse, Result]:
         """Return check result if account is assigned to the subject and request id."""
+        self.started = time.perf_counter()
         self.validate()
-        response = self.send_request()
+
+        if self.params.get("passthrough"):
+            return self.passthrough()
+
+        index_result = self.index_result()
+        if index_result is not None:
+            return self.make_result(*index_result, from_cache=True)
+
+        content = self.fetch()
 
         if self.params.get("raw"):  # type: ignore
-            return response.json()
+            return json.loads(content)
 
-        result = response.json()["result"]
+        result = json.loads(content)["result"]
 
-        return result["accountAssigned"] == "TAK", result["requestId"]
+        return self.make_result(result["accountAssigned"] == "TAK", result["requestId"])
 
 
 class SearchRequest(RequestType):
@@ -105,29 +433,202 @@ class SearchRequest(RequestType):
         if not self.many:
             return
 
-        param = ({*self.params} - {"raw", "date"}).pop()  # type: ignore
+        param = self.input_param
+        if param in INPUT_FIELDS:
+            # duplicates are searched once and fanned out by the result
+            self.inputs = list(self.validated_params[param])
+            self.validated_params[param] = deduplicate(self.inputs)
+            self.record_duplicates(len(self.validated_params[param]))
 
-        if len(self.params[param]) > self.PARAM_LIMIT:  # type: ignore
+        if len(self.validated_params[param]) > self.PARAM_LIMIT:  # type: ignore
             raise MaximumParameterNumberExceeded(param, self.PARAM_LIMIT)
 
-    def result(
-        self
-    ) -> Union[dict, Tuple[Union[List[Subject], Optional[Subject]], str]]:
+    def record_duplicates(self, unique: int) -> None:
+        """Add numbers of the given and searched values to the client counters."""
+        inputs = len(self.inputs)  # type: ignore
+        saved = batches_needed(inputs, self.PARAM_LIMIT)
+        saved -= batches_needed(unique, self.PARAM_LIMIT)
+        self.client.dedup_stats.record(inputs, unique, saved)  # type: ignore
+
+    def result(self) -> Union[dict, RawResponse, Result]:
         """Return subject/subjects mapped to the specific parameter and request id."""
+        self.started = time.perf_counter()
         self.validate()
-        response = self.send_request()
+
+        if self.params.get("passthrough"):
+            return self.passthrough()
+
+        index_result = self.index_result()
+        if index_result is not None:
+            return self.make_result(*index_result, from_cache=True)
+
+        negative_result = self.negative_result()
+        if negative_result is not None:
+            return self.make_result(*negative_result, from_cache=True)
+
+        try:
+            content = self.fetch()
+        except InvalidRequestData as error:
+            self.add_rejected(error)
+            raise
 
         if self.params.get("raw"):  # type: ignore
-            return response.json()
+            return json.loads(content)
+
+        subjects, request_id = load_subjects(content, self.many, self.projection())
+
+        if self.stale_date is None:
+            self.add_to_index(subjects, request_id)
+            self.add_absent(subjects, request_id)
+
+        return self.make_result(subjects, request_id)
+
+    def searched_values(self) -> List[str]:
+        """Get validated identifiers sent in the request."""
+        value = self.validated_params[self.input_param]
+        return value if self.input_param in INPUT_FIELDS else [value]
+
+    def negative_result(self) -> Optional[Tuple[Any, Optional[str]]]:
+        """
+        Return result answered by the client negative cache if possible.
+
+        Identifiers known to be missing are left out of the many values search,
+        rejected ones are reported in the result errors.
+        """
+        negative = self.client.negative_cache  # type: ignore
+        if negative is None or self.params.get("raw"):
+            return None
+
+        date = str(self.validated_params["date"])
+        values = self.searched_values()
+        known = {}
+
+        for value in values:
+            entry = negative.get(value, date)
+            if entry is not None:
+                known[value] = entry
+
+        self.errors = {
+            value: entry.error
+            for value, entry in known.items()
+            if entry.error is not None
+        }
+
+        if len(known) < len(values):
+            if known:
+                self.validated_params[self.input_param] = [
+                    value for value in values if value not in known
+                ]
 
-        result = response.json()["result"]
+            return None
 
-        if not self.many and result["subject"] is None:
-            return None, result["requestId"]
+        entry = next(iter(known.values()))
+        if self.input_param not in INPUT_FIELDS and entry.error is not None:
+            raise entry.error
 
-        return (
-            SubjectSchema().load(
-                result["subjects" if self.many else "subject"], many=self.many
-            ),
-            result["requestId"],
+        return [] if self.many else None, entry.request_id
+
+    def add_rejected(self, error: InvalidRequestData) -> None:
+        """Add identifier rejected by the API to the client negative cache."""
+        negative = self.client.negative_cache  # type: ignore
+
+        if negative is None or self.input_param in INPUT_FIELDS:
+            return
+
+        if error.code in IDENTIFIER_CODES:
+            negative.add(
+                self.validated_params[self.input_param],
+                str(self.validated_params["date"]),
+                error,
+            )
+
+    def add_absent(
+        self, subjects: Union[List[Subject], Optional[Subject]], request_id: str
+    ) -> None:
+        """Add identifiers without a subject to the client negative cache."""
+        negative = self.client.negative_cache  # type: ignore
+        if negative is None:
+            return
+
+        if self.input_param in INPUT_FIELDS:
+            found = match_inputs(
+                subjects, self.searched_values(), self.input_param  # type: ignore
+            )
+        else:
+            found = self.by_input(subjects)
+
+        for value, subject in found.items():
+            if not subject:
+                negative.add_absent(
+                    value, str(self.validated_params["date"]), request_id
+                )
+
+    def by_input(self, value: Any) -> Dict[str, Any]:
+        """Map every searched identifier to its subject or subjects."""
+        if self.input_param not in INPUT_FIELDS:
+            return super().by_input(value)
+
+        return match_inputs(
+            value, deduplicate(self.inputs), self.input_param  # type: ignore
+        )
+
+    def projection(self) -> Optional[Tuple[str, ...]]:
+        """Get names of the loaded subject fields, including the searched one."""
+        fields = self.validated_params.get("fields")
+        if fields is None:
+            return None
+
+        # single value search parameters are singular forms of the many values ones
+        param = self.input_param
+        field = INPUT_FIELDS[param if param in INPUT_FIELDS else f"{param}s"]
+        return tuple({*fields, field})
+
+    def add_to_index(
+        self, subjects: Union[List[Subject], Optional[Subject]], request_id: str
+    ) -> None:
+        """Add subjects to the client account index."""
+        if self.client.index is None or subjects is None:  # type: ignore
+            return
+
+        # index answers lookups with the stored subjects, so they must be complete
+        if self.projection() is not None:
+            return
+
+        self.client.index.add(  # type: ignore
+            subjects if self.many else [subjects],  # type: ignore
+            self.validated_params["date"],
+            request_id,
         )
+
+
+def load_subjects(
+    content: bytes, many: bool, fields: Optional[Iterable[str]] = None
+) -> Tuple[Union[List[Subject], Optional[Subject]], str]:
+    """
+    Deserialize subject/subjects and request id from the response body.
+
+    :param content: search response body
+    :param many: flag indicating if the response contains `subjects` list
+    :param fields: names of the only subject fields loaded, all by default
+    :return: subject/subjects and request id
+    """
+    result = json.loads(content)["result"]
+
+    if not many and result["subject"] is None:
+        return None, result["requestId"]
+
+    if fields is not None:
+        if many:
+            return (
+                [load_projection(data, fields) for data in result["subjects"]],
+                result["requestId"],
+            )
+
+        return load_projection(result["subject"], fields), result["requestId"]
+
+    from vater.schemas import SubjectSchema
+
+    return (
+        SubjectSchema().load(result["subjects" if many else "subject"], many=many),
+        result["requestId"],
+    )
@@ -0,0 +1,176 @@
+"""Request results module."""
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from vater.models import Subject
+
+# subject field matched with every value of the many values search parameter
+INPUT_FIELDS = {"nips": "nip", "regons": "regon", "accounts": "account_numbers"}
+
+
+def match_inputs(
+    subjects: Optional[List[Subject]], inputs: Iterable[str], param: str
+) -> Dict[str, Any]:
+    """
+    Map every searched value to its subject, or to its subjects for accounts.
+
+    :param subjects: subjects returned by the many values search
+    :param inputs: searched values
+    :param param: name of the search parameter, e.g. `nips`
+    :return: subject, None or list of subjects for every value
+    """
+    field = INPUT_FIELDS[param]
+
+    if field == "account_numbers":
+        by_account: Dict[str, List[Subject]] = {value: [] for value in inputs}
+
+        for subject in subjects or ():
+            for account in subject.account_numbers or ():
+                if account in by_account:
+                    by_account[account].append(subject)
+
+        return by_account
+
+    by_value: Dict[str, Optional[Subject]] = dict.fromkeys(inputs)
+
+    for subject in subjects or ():
+        value = getattr(subject, field)
+        if value in by_value and by_value[value] is None:
+            by_value[value] = subject
+
+    return by_value
+
+
+class Result:
+    """
+    Request result with its metadata.
+
+    Result unpacks and compares like the `(value, request_id)` tuple returned
+    by previous versions, e.g. `subjects, request_id = client.search_nips(nips)`.
+    """
+
+    __slots__ = (
+        "value",
+        "request_id",
+        "by_input",
+        "inputs",
+        "positions",
+        "latency",
+        "from_cache",
+        "batch_ids",
+        "stale",
+        "date",
+        "errors",
+    )
+
+    def __init__(
+        self,
+        value: Any,
+        request_id: Optional[str],
+        *,
+        by_input: Optional[Dict[str, Any]] = None,
+        inputs: Optional[List[str]] = None,
+        positions: Optional[List[int]] = None,
+        latency: Optional[float] = None,
+        from_cache: bool = False,
+        batch_ids: Optional[List[str]] = None,
+        stale: bool = False,
+        date: Optional[str] = None,
+        errors: Optional[Dict[str, Exception]] = None,
+    ) -> None:
+        """
+        Assign result data.
+
+        :param value: subject, subjects or check result
+        :param request_id: identifier of the request, None if it isn't known
+        :param by_input: value for every searched identifier
+        :param inputs: normalized identifier at every position of the given
+                       values, including the removed duplicates
+        :param positions: position of every identifier of `inputs` in the given
+                          values, consecutive ones by default
+        :param latency: number of seconds the result took
+        :param from_cache: flag indicating if the result was answered locally
+        :param batch_ids: request ids of all batches the result comes from
+        :param stale: flag indicating if the result comes from the last known
+                      response served while the API is unavailable
+        :param date: date the data was acquired from
+        :param errors: error for every identifier rejected by the API
+        """
+        self.value = value
+        self.request_id = request_id
+        self.by_input = {} if by_input is None else by_input
+        self.inputs = list(self.by_input) if inputs is None else inputs
+        self.positions = (
+            list(range(len(self.inputs))) if positions is None else positions
+        )
+        self.latency = latency
+        self.from_cache = from_cache
+        if batch_ids is None:
+            batch_ids = [] if request_id is None else [request_id]
+
+        self.batch_ids = batch_ids
+        self.stale = stale
+        self.date = date
+        self.errors = {} if errors is None else errors
+
+    @property
+    def missing(self) -> List[str]:
+        """Get searched identifiers without a matching subject or an error."""
+        return [
+            key
+            for key, value in self.by_input.items()
+            if value in (None, []) and key not in self.errors
+        ]
+
+    @property
+    def per_input(self) -> List[Any]:
+        """Get value for every position of the given identifiers in `positions`."""
+        return [self.by_input.get(key) for key in self.inputs]
+
+    def for_input(self, key: str) -> "Result":
+        """
+        Get result of a single searched identifier.
+
+        :param key: searched identifier
+        :return: result of the identifier with the metadata of this result
+        """
+        value = self.by_input.get(key)
+        return Result(
+            value,
+            self.request_id,
+            by_input={key: value},
+            latency=self.latency,
+            from_cache=self.from_cache,
+            batch_ids=self.batch_ids,
+            stale=self.stale,
+            date=self.date,
+            errors={key: self.errors[key]} if key in self.errors else None,
+        )
+
+    def __iter__(self) -> Iterator[Any]:
+        """Iterate over value and request id."""
+        yield self.value
+        yield self.request_id
+
+    def __len__(self) -> int:
+        """Return length of the tuple the result is compatible with."""
+        return 2
+
+    def __getitem__(self, index: Any) -> Any:
+        """Get item of the `(value, request_id)` tuple."""
+        return (self.value, self.request_id)[index]
+
+    def __eq__(self, other: object) -> bool:
+        """Compare value and request id with the other result or tuple."""
+        if isinstance(other, (Result, tuple)):
+            return tuple(self) == tuple(other)
+
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        """Get hash of value and request id."""
+        return hash(tuple(self))
+
+    def __repr__(self) -> str:
+        """Get result representation."""
+        flags = " stale" if self.stale else ""
+        return f"<Result {self.value!r}, {self.request_id!r}{flags}>"
@@ -0,0 +1,217 @@
+"""Local daemon module."""
+import inspect
+import json
+import re
+import secrets
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Pattern, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from vater.cache import MemoryCache
+from vater.client import Client
+from vater.daemon import PING_PATH, remove_state, write_state
+from vater.errors import ERROR_CODE_MAPPING, ApiUnavailable, ClientError
+from vater.rate_limiter import RateLimiter
+
+
+class Coalescer:
+    """Share a single call between concurrent callers using the same key."""
+
+    def __init__(self) -> None:
+        """Initialize in-flight calls registry."""
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def call(self, key: str, function: Callable[[], Any]) -> Any:
+        """
+        Call the function or wait for the result of the in-flight call.
+
+        :param key: key identifying the call
+        :param function: function to call
+        :return: function result
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            return future.result()  # type: ignore
+
+        try:
+            result = function()
+        except BaseException as error:
+            future.set_exception(error)  # type: ignore
+            raise
+        else:
+            future.set_result(result)  # type: ignore
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+def build_routes(client: Client) -> List[Tuple[Pattern, Callable, Set[str]]]:
+    """Get path pattern, method and multi value parameters of every API method."""
+    routes = []
+
+    for name in dir(type(client)):
+        # looked up on the class, so properties of the client aren't evaluated
+        url_pattern = getattr(getattr(type(client), name), "url_pattern", None)
+
+        if url_pattern is None:
+            continue
+
+        method = getattr(client, name)
+        path = re.sub(r"{(\w+)}", r"(?P<\1>[^/]+)", url_pattern.split("?")[0])
+        many = {
+            param.name
+            for param in inspect.signature(method).parameters.values()
+            if param.kind == param.POSITIONAL_OR_KEYWORD and param.annotation is not str
+        }
+        routes.append((re.compile(path), method, many))
+
+    return routes
+
+
+def error_body(code: str, message: Optional[str] = None) -> bytes:
+    """Get body of the error response in the API format."""
+    if message is None:
+        message = ERROR_CODE_MAPPING[code]
+
+    return json.dumps({"code": code, "message": message}).encode()
+
+
+class Daemon(ThreadingHTTPServer):
+    """
+    Local HTTP server exposing the API through a long living client.
+
+    Paths are the same as the API ones, so the daemon url may be used as a client
+    base url. Connections, cache and rate limiter of the client are shared by all
+    callers and identical concurrent requests are sent to the API once.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, client: Client, address: Tuple[str, int] = ("127.0.0.1", 0)):
+        """
+        Bind the server.
+
+        :param client: client sending requests to the API
+        :param address: host and port to listen on, random port is used for 0
+        """
+        super().__init__(address, DaemonRequestHandler)
+        self.client = client
+        self.routes = build_routes(client)
+        self.coalescer = Coalescer()
+        # lets the CLI tell this daemon from a process which reused its pid
+        self.token = secrets.token_hex(16)
+
+    @property
+    def url(self) -> str:
+        """Get url of the daemon."""
+        host, port = self.socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def dispatch(self, path: str) -> Tuple[int, bytes]:
+        """
+        Call client method matching the path.
+
+        :param path: request path with the query
+        :return: response status code and body
+        """
+        parts = urlsplit(path)
+
+        for pattern, method, many in self.routes:
+            match = pattern.fullmatch(parts.path)
+            if match is not None:
+                break
+        else:
+            return 404, error_body("WL-190")
+
+        params: Dict[str, Any] = {
+            key: value.split(",") if key in many else value
+            for key, value in match.groupdict().items()
+        }
+        params["date"] = parse_qs(parts.query).get("date", [None])[0]
+
+        try:
+            response = method(**params, passthrough=True)
+        except ClientError as error:
+            return 400, error_body("WL-190", str(error))
+
+        # API response bodies, including errors, are forwarded without decoding
+        return response.status_code, response.content
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    """Handler of the daemon requests."""
+
+    server: Daemon
+
+    def do_GET(self) -> None:
+        """Respond with the result of the matching client method."""
+        headers = {"Content-Type": "application/json"}
+
+        if self.path == PING_PATH:
+            status, body = 200, self.server.token.encode()
+            headers["Content-Type"] = "text/plain"
+        else:
+            try:
+                status, body = self.server.coalescer.call(
+                    self.path, lambda: self.server.dispatch(self.path)
+                )
+            except ApiUnavailable as error:
+                status, body = 503, error_body("WL-100", str(error))
+                headers["Retry-After"] = str(error.retry_after)
+            # the API couldn't be reached or answered with an unknown error
+            except Exception as error:
+                status, body = 502, error_body("WL-100", str(error))
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Disable logging every request to stderr."""
+
+
+def serve(
+    upstream: str,
+    *,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    rate: Optional[float] = None,
+    cache_size: int = 10000,
+) -> None:
+    """
+    Run the daemon until interrupted.
+
+    The daemon url is written to the state file, which the CLI uses to find it.
+
+    :param upstream: root url of the API
+    :param host: host to listen on
+    :param port: port to listen on, random port is used for 0
+    :param rate: maximal number of requests per second sent to the API
+    :param cache_size: maximal number of cached responses
+    """
+    client = Client(
+        base_url=upstream,
+        cache=MemoryCache(maxsize=cache_size),
+        rate_limiter=None if rate is None else RateLimiter(rate),
+    )
+    daemon = Daemon(client, (host, port))
+    write_state(daemon.url, upstream, daemon.token)
+
+    try:
+        daemon.serve_forever()
+    finally:
+        daemon.server_close()
+        remove_state()
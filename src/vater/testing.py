@@ -0,0 +1,325 @@
+"""Synthetic register dataset module for tests and benchmarks."""
+import datetime
+import json
+import random
+import re
+from collections import deque
+from typing import IO, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from vater.errors import ValidationError
+from vater.request_types import RawResponse
+from vater.validators import NIP_WEIGHTS, REGON_WEIGHTS, nip_validator, regon_validator
+
+# digits of the `PL` country code in the IBAN checksum
+PL_DIGITS = "2521"
+# number of recent records duplicates are drawn from
+DUPLICATES_WINDOW = 10000
+NAMES = ("Moby Dick", "Eminem", "Lion Heart", "Kowalski", "Nowak", "Wisła", "Odra")
+KINDS = ("Sp. z o.o.", "S.A.", "Sp. j.", "S.C.")
+STREETS = ("Polna", "Leśna", "Słoneczna", "Krótka", "Szkolna", "Ogrodowa")
+CITIES = ("Warszawa", "Kraków", "Łódź", "Wrocław", "Poznań", "Gdańsk")
+FORMATS = ("jsonl", "nips", "regons", "accounts")
+
+
+class Record(NamedTuple):
+    """Generated subject with its identifiers."""
+
+    nip: str
+    regon: str
+    accounts: List[str]
+    # subject json as returned by the API, None for invalid identifiers
+    subject: Optional[dict]
+
+    @property
+    def valid(self) -> bool:
+        """Check if the identifiers of the record have valid checksums."""
+        return self.subject is not None
+
+
+def checksum(digits: str, weights: Iterable[int]) -> int:
+    """Get weighted sum of the digits modulo 11."""
+    return sum(weight * int(digit) for weight, digit in zip(weights, digits)) % 11
+
+
+def make_nip(rng: random.Random, valid: bool = True) -> str:
+    """
+    Generate nip number.
+
+    :param rng: random numbers generator
+    :param valid: flag indicating if the checksum is valid
+    :return: nip number
+    """
+    while True:
+        digits = f"{rng.randrange(10 ** 9):09d}"
+        control = checksum(digits, NIP_WEIGHTS)
+        # digits with the control number of 10 have no valid nip
+        if control != 10:
+            return digits + str(control if valid else (control + 1) % 10)
+
+
+def make_regon(rng: random.Random, length: int = 9, valid: bool = True) -> str:
+    """
+    Generate regon number.
+
+    :param rng: random numbers generator
+    :param length: 9 or 14, the long regon extends a valid short one
+    :param valid: flag indicating if the checksum is valid
+    :return: regon number
+    """
+    digits = (
+        f"{rng.randrange(10 ** 8):08d}"
+        if length == 9
+        else make_regon(rng) + f"{rng.randrange(10 ** 4):04d}"
+    )
+    control = checksum(digits, REGON_WEIGHTS[length])
+
+    if control == 10:
+        return make_regon(rng, length, valid)
+
+    return digits + str(control if valid else (control + 1) % 10)
+
+
+def make_account(rng: random.Random, valid: bool = True) -> str:
+    """
+    Generate NRB account number.
+
+    :param rng: random numbers generator
+    :param valid: flag indicating if the IBAN checksum is valid
+    :return: 26 digits account number
+    """
+    basic = f"{rng.randrange(10 ** 24):024d}"
+    control = 98 - int(basic + PL_DIGITS + "00") % 97
+
+    if not valid:
+        control = control % 97 + 1
+
+    return f"{control:02d}{basic}"
+
+
+def account_checksum_valid(account: str) -> bool:
+    """Check the IBAN checksum of the NRB account number."""
+    return int(account[2:] + PL_DIGITS + account[:2]) % 97 == 1
+
+
+def make_date(rng: random.Random, start: int = 1990, end: int = 2019) -> str:
+    """Generate date between the years."""
+    first = datetime.date(start, 1, 1).toordinal()
+    last = datetime.date(end, 12, 31).toordinal()
+    return str(datetime.date.fromordinal(rng.randint(first, last)))
+
+
+def make_subject(
+    rng: random.Random, nip: str, regon: str, accounts: List[str], virtual: bool
+) -> dict:
+    """
+    Generate subject json as returned by the API.
+
+    :param rng: random numbers generator
+    :param nip: nip number of the subject
+    :param regon: regon number of the subject
+    :param accounts: account numbers of the subject
+    :param virtual: flag indicating if the subject has virtual accounts
+    :return: subject json
+    """
+    address = (
+        f"{rng.choice(STREETS).upper()} {rng.randint(1, 200)}, "
+        f"{rng.randint(0, 99):02d}-{rng.randint(0, 999):03d} "
+        f"{rng.choice(CITIES).upper()}"
+    )
+    exempt = rng.random() < 0.1
+
+    return {
+        "name": f"{rng.choice(NAMES).upper()} {rng.choice(KINDS).upper()}",
+        "nip": nip,
+        "statusVat": "Zwolniony" if exempt else "Czynny",
+        "regon": regon,
+        "pesel": None,
+        "krs": f"{rng.randrange(10 ** 10):010d}",
+        "residenceAddress": None,
+        "workingAddress": address,
+        "representatives": [],
+        "authorizedClerks": [],
+        "partners": [],
+        "registrationLegalDate": make_date(rng),
+        "registrationDenialBasis": None,
+        "registrationDenialDate": None,
+        "restorationBasis": None,
+        "restorationDate": None,
+        "removalBasis": None,
+        "removalDate": None,
+        "accountNumbers": accounts,
+        "hasVirtualAccounts": virtual,
+    }
+
+
+def generate(
+    count: int,
+    *,
+    seed: Optional[int] = None,
+    duplicates: float = 0.0,
+    invalid: float = 0.0,
+    virtual_accounts: float = 0.1,
+    long_regons: float = 0.1,
+    max_accounts: int = 3,
+) -> Iterator[Record]:
+    """
+    Generate synthetic register records lazily.
+
+    Identifiers have checksums computed with the weights of the validators and
+    accounts have valid NRB checksums. Memory use doesn't depend on `count`,
+    so millions of records may be streamed to disk.
+
+    :param count: number of records
+    :param seed: seed making the dataset reproducible
+    :param duplicates: fraction of records repeating one of the recent records
+    :param invalid: fraction of records with invalid checksums and no subject
+    :param virtual_accounts: fraction of the subjects having virtual accounts
+    :param long_regons: fraction of the subjects with 14 digits regon
+    :param max_accounts: maximal number of accounts of a subject
+    :return: iterator of the records
+    """
+    rng = random.Random(seed)
+    recent: Deque[Record] = deque(maxlen=DUPLICATES_WINDOW)
+
+    for _ in range(count):
+        if recent and rng.random() < duplicates:
+            yield rng.choice(recent)
+            continue
+
+        valid = rng.random() >= invalid
+        nip = make_nip(rng, valid)
+        regon = make_regon(rng, 14 if rng.random() < long_regons else 9, valid)
+        accounts = [
+            make_account(rng, valid) for _ in range(rng.randint(1, max_accounts))
+        ]
+        subject = None
+        if valid:
+            virtual = rng.random() < virtual_accounts
+            subject = make_subject(rng, nip, regon, accounts, virtual)
+
+        record = Record(nip, regon, accounts, subject)
+        recent.append(record)
+        yield record
+
+
+def write_dataset(records: Iterable[Record], file: IO[str], fmt: str = "jsonl") -> int:
+    """
+    Write records to the text file, one per line.
+
+    :param records: records to write
+    :param file: text file-like object
+    :param fmt: `jsonl` for the whole records, `nips`, `regons` or `accounts`
+                for the identifiers only
+    :return: number of written lines
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+
+    lines = 0
+
+    for record in records:
+        if fmt == "jsonl":
+            values = [json.dumps({**record._asdict(), "valid": record.valid})]
+        elif fmt == "accounts":
+            values = record.accounts
+        else:
+            values = [getattr(record, fmt[:-1])]
+
+        for value in values:
+            file.write(value + "\n")
+            lines += 1
+
+    return lines
+
+
+class StubRegister:
+    """
+    Stub API answering client requests from generated records.
+
+    Pass it as the `MemoryTransport` handler to feed the client, benchmarks
+    or the account index with the generated subjects offline.
+    """
+
+    URL = re.compile(
+        r"/api/(?:search/(?P<kind>[\w-]+)/(?P<values>[\d,]+)"
+        r"|check/(?P<check>nip|regon)/(?P<id>\d+)/bank-account/(?P<account>\d+))"
+    )
+    SEARCH_KINDS = {
+        "nip": ("nip", False),
+        "nips": ("nip", True),
+        "regon": ("regon", False),
+        "regons": ("regon", True),
+        "bank-account": ("account", True),
+        "bank-accounts": ("account", True),
+    }
+
+    def __init__(self, records: Iterable[Record], request_id: str = "aa111-aa111aaa"):
+        """
+        Index subjects of the valid records.
+
+        :param records: generated records
+        :param request_id: request id of all responses
+        """
+        self.request_id = request_id
+        self.subjects: Dict[str, Dict[str, dict]] = {
+            "nip": {},
+            "regon": {},
+            "account": {},
+        }
+
+        for record in records:
+            if record.subject is None:
+                continue
+
+            self.subjects["nip"][record.nip] = record.subject
+            self.subjects["regon"][record.regon] = record.subject
+            for account in record.accounts:
+                self.subjects["account"][account] = record.subject
+
+    def respond(self, result: dict) -> RawResponse:
+        """Get response with the result."""
+        body = {"result": {**result, "requestId": self.request_id}}
+        return RawResponse(json.dumps(body).encode())
+
+    def __call__(self, url: str) -> RawResponse:
+        """Answer the request url."""
+        match = self.URL.search(url)
+        if match is None:
+            return RawResponse(b"", 404, {})
+
+        try:
+            if match["check"] is not None:
+                return self.check(match["check"], match["id"], match["account"])
+
+            field, many = self.SEARCH_KINDS[match["kind"]]
+            subjects = self.search(field, match["values"].split(","))
+        except ValidationError as error:
+            code = "WL-115" if error.args[0] == "nip" else "WL-107"
+            body = {"code": code, "message": str(error)}
+            return RawResponse(json.dumps(body).encode(), 400)
+
+        if many:
+            return self.respond({"subjects": subjects})
+
+        return self.respond({"subject": subjects[0] if subjects else None})
+
+    def search(self, field: str, values: List[str]) -> List[dict]:
+        """Get subjects with the identifiers, rejecting invalid ones."""
+        validator = {"nip": nip_validator, "regon": regon_validator}.get(field)
+        subjects = []
+
+        for value in values:
+            if validator is not None:
+                validator(value)
+
+            subject = self.subjects[field].get(value)
+            if subject is not None and subject not in subjects:
+                subjects.append(subject)
+
+        return subjects
+
+    def check(self, field: str, value: str, account: str) -> RawResponse:
+        """Get check result of the account of the subject."""
+        subjects = self.search(field, [value])
+        assigned = bool(subjects) and account in subjects[0]["accountNumbers"]
+        return self.respond({"accountAssigned": "TAK" if assigned else "NIE"})
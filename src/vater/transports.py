@@ -0,0 +1,449 @@
+"""HTTP transports module."""
+import base64
+import gzip
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Coroutine,
+    Deque,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Union,
+)
+
+from vater.request_types import RawResponse
+
+if TYPE_CHECKING:
+    import requests
+
+CASSETTE_VERSION = 1
+
+
+def bound_timeout(
+    default: Optional[float], timeout: Optional[float]
+) -> Optional[float]:
+    """Get the shorter of the transport and request timeouts."""
+    if timeout is None or default is None:
+        return default if timeout is None else timeout
+
+    return min(default, timeout)
+
+
+class Transport(ABC):
+    """
+    Base class for all transports sending GET requests to the API.
+
+    Connection errors and timeouts are raised as `OSError` subclasses, so they
+    are recognized as API outages.
+    """
+
+    @abstractmethod
+    def get(self, url: str, timeout: Optional[float] = None) -> RawResponse:
+        """
+        Send GET request.
+
+        Transports are used by many threads at once, e.g. by bulk searches.
+
+        :param url: request url
+        :param timeout: number of seconds left until the deadline of the request,
+                        bounding the transport timeout
+        :return: response
+        """
+
+    def close(self) -> None:
+        """Release the transport connections."""
+
+
+class RequestsTransport(Transport):
+    """HTTP/1.1 transport keeping connections open in a requests session."""
+
+    def __init__(
+        self,
+        session: Optional["requests.Session"] = None,
+        timeout: Optional[float] = 30.0,
+    ) -> None:
+        """
+        Initialize the transport.
+
+        :param session: session sending requests, created on first request by default
+        :param timeout: number of seconds to wait for the response, None to wait
+                        forever
+        """
+        self._session = session
+        self.timeout = timeout
+
+    @property
+    def session(self) -> "requests.Session":
+        """Get session keeping connections to the API open."""
+        if self._session is None:
+            # imported on first request to keep the package import fast
+            import requests
+
+            self._session = requests.Session()
+
+        return self._session
+
+    def get(self, url: str, timeout: Optional[float] = None) -> RawResponse:
+        """Send GET request through the session."""
+        response = self.session.get(url, timeout=bound_timeout(self.timeout, timeout))
+        return RawResponse(response.content, response.status_code, response.headers)
+
+    def close(self) -> None:
+        """Close the session."""
+        if self._session is not None:
+            self._session.close()
+
+
+class HttpxTransport(Transport):
+    """
+    Transport sending requests with httpx.
+
+    With HTTP/2 concurrent requests from all threads are multiplexed over
+    a few connections. Requires `pip install vater[httpx]`.
+    """
+
+    def __init__(
+        self, *, http2: bool = True, max_connections: int = 10, timeout: float = 30.0
+    ) -> None:
+        """
+        Create httpx client.
+
+        :param http2: flag indicating if HTTP/2 is used when the server supports it
+        :param max_connections: maximal number of open connections
+        :param timeout: number of seconds to wait for the response
+        """
+        try:
+            import httpx
+        except ImportError as error:
+            raise ImportError(
+                "httpx transport requires `pip install vater[httpx]`"
+            ) from error
+
+        self._errors = httpx.TransportError
+        self.timeout = timeout
+        self.client = httpx.Client(
+            http2=http2,
+            limits=httpx.Limits(max_connections=max_connections),
+            timeout=timeout,
+        )
+
+    def get(self, url: str, timeout: Optional[float] = None) -> RawResponse:
+        """Send GET request through the httpx client."""
+        try:
+            response = self.client.get(
+                url, timeout=bound_timeout(self.timeout, timeout)
+            )
+        except self._errors as error:
+            raise ConnectionError(str(error)) from error
+
+        return RawResponse(response.content, response.status_code, response.headers)
+
+    def close(self) -> None:
+        """Close the httpx client."""
+        self.client.close()
+
+
+class AiohttpTransport(Transport):
+    """
+    Transport sending requests with aiohttp from an event loop thread.
+
+    Calling threads only wait for the responses, so hundreds of requests may be
+    in flight over a bounded connection pool. Coroutines may await `aget`
+    instead. Requires `pip install vater[aiohttp]`.
+    """
+
+    def __init__(self, *, limit: int = 100, timeout: float = 30.0) -> None:
+        """
+        Start event loop thread and create aiohttp session.
+
+        :param limit: maximal number of open connections
+        :param timeout: number of seconds to wait for the response
+        """
+        try:
+            import aiohttp
+        except ImportError as error:
+            raise ImportError(
+                "aiohttp transport requires `pip install vater[aiohttp]`"
+            ) from error
+
+        # imported here, as asyncio is slow to import and used only by this transport
+        import asyncio
+
+        self._errors = (aiohttp.ClientError, asyncio.TimeoutError)
+        self._client_timeout = aiohttp.ClientTimeout
+        self.timeout = timeout
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+        async def create_session() -> Any:
+            """Create session in the event loop."""
+            return aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=limit),
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            )
+
+        self.session = self._run(create_session())
+
+    def _run(self, coroutine: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run the coroutine in the event loop thread and wait for its result."""
+        import asyncio
+        from concurrent.futures import TimeoutError as FutureTimeoutError
+
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            # frees the connection right away instead of waiting for the response
+            future.cancel()
+            raise TimeoutError("request deadline exceeded") from None
+
+    async def aget(self, url: str, timeout: Optional[float] = None) -> RawResponse:
+        """
+        Send GET request, must be awaited in the transport event loop.
+
+        :param url: request url
+        :param timeout: number of seconds left until the deadline of the request
+        :return: response
+        """
+        total = bound_timeout(self.timeout, timeout)
+
+        try:
+            async with self.session.get(
+                url, timeout=self._client_timeout(total=total)
+            ) as response:
+                content = await response.read()
+        except self._errors as error:
+            raise ConnectionError(str(error)) from error
+
+        return RawResponse(content, response.status, response.headers)
+
+    def get(self, url: str, timeout: Optional[float] = None) -> RawResponse:
+        """Send GET request from the event loop thread."""
+        return self._run(self.aget(url, timeout), timeout)
+
+    def close(self) -> None:
+        """Close the session and stop the event loop."""
+        self._run(self.session.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+class MemoryTransport(Transport):
+    """Transport answering requests from memory, for tests and benchmarks."""
+
+    def __init__(
+        self,
+        responses: Optional[Dict[str, Union[bytes, RawResponse]]] = None,
+        *,
+        handler: Optional[Callable[[str], RawResponse]] = None,
+        latency: float = 0.0,
+    ) -> None:
+        """
+        Initialize the transport.
+
+        :param responses: response or response body for every url
+        :param handler: function returning response for urls not in `responses`
+        :param latency: number of seconds every request takes
+        """
+        self.responses = {} if responses is None else responses
+        self.handler = handler
+        self.latency = latency
+        self.requests: List[str] = []
+
+    def add(self, url: str, body: bytes, status_code: int = 200) -> None:
+        """
+        Add response for the url.
+
+        :param url: request url
+        :param body: response body
+        :param status_code: response status code
+        """
+        self.responses[url] = RawResponse(body, status_code)
+
+    def get(self, url: str, timeout: Optional[float] = None) -> RawResponse:
+        """Return response for the url, 404 if it's unknown."""
+        self.requests.append(url)
+
+        if self.latency:
+            time.sleep(self.latency if timeout is None else min(self.latency, timeout))
+            if timeout is not None and timeout < self.latency:
+                raise TimeoutError("request deadline exceeded")
+
+        response = self.responses.get(url)
+        if isinstance(response, bytes):
+            return RawResponse(response)
+
+        if response is not None:
+            return response
+
+        if self.handler is not None:
+            return self.handler(url)
+
+        return RawResponse(b"", 404, {})
+
+
+class Interaction(NamedTuple):
+    """Single recorded request with its response."""
+
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    # number of seconds the response took
+    latency: float
+
+
+def save_cassette(path: str, interactions: List[Interaction]) -> None:
+    """
+    Write interactions into a gzip compressed json cassette file.
+
+    :param path: path of the cassette file
+    :param interactions: interactions in the order they were recorded
+    """
+    records = []
+
+    for interaction in interactions:
+        record: Dict[str, Any] = {
+            "url": interaction.url,
+            "status": interaction.status_code,
+            "headers": dict(interaction.headers),
+            "latency": round(interaction.latency, 6),
+        }
+        try:
+            record["body"] = interaction.content.decode()
+        except UnicodeDecodeError:
+            record["body64"] = base64.b64encode(interaction.content).decode()
+
+        records.append(record)
+
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        json.dump({"version": CASSETTE_VERSION, "interactions": records}, file)
+
+
+def load_cassette(path: str) -> List[Interaction]:
+    """
+    Read interactions from the cassette file.
+
+    :param path: path of the cassette file
+    :return: interactions in the order they were recorded
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        cassette = json.load(file)
+
+    if cassette.get("version") != CASSETTE_VERSION:
+        raise ValueError(f"unsupported cassette version: {cassette.get('version')}")
+
+    return [
+        Interaction(
+            record["url"],
+            record["status"],
+            record["headers"],
+            (
+                record["body"].encode()
+                if "body" in record
+                else base64.b64decode(record["body64"])
+            ),
+            record["latency"],
+        )
+        for record in cassette["interactions"]
+    ]
+
+
+class RecordingTransport(Transport):
+    """
+    Transport recording requests sent by another transport into a cassette.
+
+    Interactions are kept in memory and written to the cassette by `save`
+    or `close`, e.g. to replay the traffic of the real or a stub API offline.
+    """
+
+    def __init__(self, transport: Transport, path: str) -> None:
+        """
+        Wrap the transport.
+
+        :param transport: transport sending the recorded requests
+        :param path: path of the cassette file
+        """
+        self.transport = transport
+        self.path = path
+        self.interactions: List[Interaction] = []
+        self._lock = threading.Lock()
+
+    def get(self, url: str, timeout: Optional[float] = None) -> RawResponse:
+        """Send GET request through the wrapped transport and record it."""
+        start = time.perf_counter()
+        response = self.transport.get(url, timeout)
+        interaction = Interaction(
+            url,
+            response.status_code,
+            dict(response.headers),
+            response.content,
+            time.perf_counter() - start,
+        )
+
+        with self._lock:
+            self.interactions.append(interaction)
+
+        return response
+
+    def save(self) -> None:
+        """Write recorded interactions to the cassette."""
+        with self._lock:
+            save_cassette(self.path, self.interactions)
+
+    def close(self) -> None:
+        """Write the cassette and close the wrapped transport."""
+        self.save()
+        self.transport.close()
+
+
+class ReplayTransport(Transport):
+    """
+    Transport answering requests with the responses recorded in a cassette.
+
+    Responses of an url are replayed in the recorded order, the last one is
+    repeated. By default they are returned right away, with `speed` given
+    the recorded latencies are waited for, e.g. at half of them with speed 2.
+    """
+
+    def __init__(self, path: str, *, speed: Optional[float] = None) -> None:
+        """
+        Load the cassette.
+
+        :param path: path of the cassette file
+        :param speed: factor the recorded latencies are divided by, no wait if None
+        """
+        self.speed = speed
+        self.requests: List[str] = []
+        self._responses: Dict[str, Deque[Interaction]] = {}
+        self._lock = threading.Lock()
+
+        for interaction in load_cassette(path):
+            self._responses.setdefault(interaction.url, deque()).append(interaction)
+
+    def get(self, url: str, timeout: Optional[float] = None) -> RawResponse:
+        """Return the next response recorded for the url."""
+        with self._lock:
+            self.requests.append(url)
+            recorded = self._responses.get(url)
+            if not recorded:
+                raise LookupError(f"no response recorded for {url}")
+
+            interaction = recorded[0] if len(recorded) == 1 else recorded.popleft()
+
+        if self.speed is not None:
+            delay = interaction.latency / self.speed
+            time.sleep(delay if timeout is None else min(delay, timeout))
+            if timeout is not None and timeout < delay:
+                raise TimeoutError("request deadline exceeded")
+
+        return RawResponse(
+            interaction.content, interaction.status_code, interaction.headers
+        )
@@ -1,14 +1,50 @@
 """Validators module."""
+import dataclasses
 import datetime
 import re
-from typing import Dict, Generator, Iterable, Union
+from typing import Dict, Generator, Iterable, Optional, Tuple, Union
 
 from vater.errors import ValidationError
+from vater.models import Subject
+
+# spaces and dashes used to format identifiers
+SEPARATORS = re.compile(r"[\s-]")
+# weights of the checksum digits
+NIP_WEIGHTS = (6, 5, 7, 2, 3, 4, 5, 6, 7)
+REGON_WEIGHTS: Dict[int, tuple] = {
+    9: (8, 9, 2, 3, 4, 5, 6, 7),
+    14: (2, 4, 8, 5, 0, 9, 7, 3, 6, 1, 2, 4, 8),
+}
+
+
+def normalize_nip(value: str) -> str:
+    """Remove separators and the `PL` country prefix from the nip number."""
+    value = SEPARATORS.sub("", value)
+
+    if value[:2].upper() == "PL":
+        return value[2:]
+
+    return value
+
+
+def normalize_regon(value: str) -> str:
+    """Remove separators from the regon number."""
+    return SEPARATORS.sub("", value)
+
+
+def normalize_account(value: str) -> str:
+    """Remove separators and the `PL` IBAN country code from the account number."""
+    value = SEPARATORS.sub("", value)
+
+    if len(value) == 28 and value[:2].upper() == "PL":
+        return value[2:]
+
+    return value
 
 
 def nip_validator(value: str) -> str:
     """Check if given value is a valid nip number."""
-    weights = (6, 5, 7, 2, 3, 4, 5, 6, 7)
+    value = normalize_nip(value)
 
     def wrapper() -> str:
         value_len = len(value)
@@ -17,7 +53,7 @@ def nip_validator(value: str) -> str:
                 "nip", f"`{value}` invalid length: {value_len}, required 10"
             )
 
-        sum_value = sum(s[0] * int(s[1]) for s in zip(weights, value))
+        sum_value = sum(s[0] * int(s[1]) for s in zip(NIP_WEIGHTS, value))
         if sum_value % 11 != int(value[-1]):
             raise ValidationError("nip", f"`{value}` - invalid checksum")
 
@@ -33,19 +69,15 @@ def nips_validator(values_iter: Iterable[str]) -> Generator[str, None, None]:
 
 def regon_validator(value: str) -> str:
     """Check if a given value is valid regon number."""
-    valid_len = (9, 14)
-    weights: Dict[int, tuple] = {
-        9: (8, 9, 2, 3, 4, 5, 6, 7),
-        14: (2, 4, 8, 5, 0, 9, 7, 3, 6, 1, 2, 4, 8),
-    }
+    value = normalize_regon(value)
 
     def wrapper() -> str:
         value_len = len(value)
-        if value_len not in valid_len:
+        if value_len not in REGON_WEIGHTS:
             raise ValidationError(
                 "regon", f"`{value}` invalid length: {value_len}, required 9 or 14"
             )
-        sum_value = sum(s[0] * int(s[1]) for s in zip(weights[value_len], value))
+        sum_value = sum(s[0] * int(s[1]) for s in zip(REGON_WEIGHTS[value_len], value))
         if sum_value % 11 != int(value[-1]):
             raise ValidationError("regon", f"`{value}` - invalid checksum")
         return value
@@ -60,6 +92,7 @@ def regons_validator(values_iter: Iterable[str]) -> Generator[str, None, None]:
 
 def account_validator(value: str) -> str:
     """Check if a given value is valid account number."""
+    value = normalize_account(value)
     value_len = len(value)
     if value_len != 26:
         raise ValidationError(
@@ -88,3 +121,18 @@ def date_validator(value: Union[datetime.date, str]) -> str:
         )
 
     return wrapper()
+
+
+def fields_validator(values: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    """Check if given values are names of the subject fields."""
+    if values is None:
+        return None
+
+    names = {field.name for field in dataclasses.fields(Subject)}
+    values = tuple(sorted(set(values)))
+
+    for value in values:
+        if value not in names:
+            raise ValidationError("fields", f"`{value}` is not a subject field")
+
+    return values
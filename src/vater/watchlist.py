@@ -0,0 +1,215 @@
+"""Watchlist change feed module."""
+import datetime
+import hashlib
+import json
+import sqlite3
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from vater.bulk import bounded_map, chunks, job_cancellation, thread_pool
+from vater.cancellation import CancellationToken
+from vater.models import SUBJECT_KEYS
+from vater.request_types import SearchRequest
+from vater.validators import date_validator, nip_validator
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watchlist (nip TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS hashes (
+    nip TEXT, date TEXT, hash BLOB, PRIMARY KEY (nip, date)
+);
+CREATE TABLE IF NOT EXISTS latest (
+    nip TEXT PRIMARY KEY, date TEXT, hash BLOB, data BLOB
+);
+"""
+
+# hash of the subjects missing in the register
+MISSING = b""
+
+
+def subject_hash(subject: dict) -> Tuple[bytes, bytes]:
+    """
+    Get content hash of the subject json.
+
+    :param subject: subject json returned by the API
+    :return: hash and canonical json the hash is computed from
+    """
+    canonical = json.dumps(
+        subject, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    ).encode()
+    return hashlib.blake2b(canonical, digest_size=16).digest(), canonical
+
+
+def diff_subjects(old: dict, new: dict) -> Dict[str, Tuple[Any, Any]]:
+    """
+    Compare subject json field by field.
+
+    :param old: previous subject json
+    :param new: current subject json
+    :return: previous and current value of every changed subject field
+    """
+    changes = {}
+
+    for name, (key, load) in SUBJECT_KEYS.items():
+        before, after = old.get(key), new.get(key)
+        if before != after:
+            changes[name] = (
+                (before, after) if load is None else (load(before), load(after))
+            )
+
+    return changes
+
+
+@dataclass
+class ChangeEvent:
+    """Change of the watched subject between refreshes."""
+
+    nip: str
+    date: str
+    # `added`, `changed` or `removed`
+    kind: str
+    # date of the previous refresh the subject is compared with
+    previous_date: Optional[str]
+    request_id: str
+    changes: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+
+
+class Watchlist:
+    """
+    Watchlist of nips emitting changes of the subjects between register dates.
+
+    A content hash of every subject is stored per date in a local SQLite database.
+    Subjects are fetched as raw json in batches of the maximal size allowed by
+    the API, so unchanged subjects cost a single hash comparison. Only changed
+    subjects are compared field by field with their last stored state.
+    """
+
+    def __init__(self, client: Any, path: str = ":memory:", *, max_workers: int = 4):
+        """
+        Open the database.
+
+        :param client: vat register client
+        :param path: path of the SQLite database file
+        :param max_workers: number of threads sending requests
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def add(self, nips: Iterable[str]) -> None:
+        """Add nips to the watchlist."""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO watchlist VALUES (?)",
+                ((nip_validator(nip),) for nip in nips),
+            )
+
+    def remove(self, nips: Iterable[str]) -> None:
+        """Remove nips and their stored states from the watchlist."""
+        values = [(nip_validator(nip),) for nip in nips]
+
+        with self.connection:
+            for table in ("watchlist", "hashes", "latest"):
+                self.connection.executemany(
+                    f"DELETE FROM {table} WHERE nip = ?", values
+                )
+
+    @property
+    def nips(self) -> List[str]:
+        """Get watched nips."""
+        query = "SELECT nip FROM watchlist ORDER BY nip"
+        return [nip for nip, in self.connection.execute(query)]
+
+    def hashes(self, nip: str) -> Dict[str, bytes]:
+        """Get content hash of the subject for every refreshed date."""
+        query = "SELECT date, hash FROM hashes WHERE nip = ? ORDER BY date"
+        return dict(self.connection.execute(query, (nip,)))
+
+    def refresh(
+        self,
+        date: Optional[Union[datetime.date, str]] = None,
+        token: Optional[CancellationToken] = None,
+    ) -> Iterator[ChangeEvent]:
+        """
+        Fetch watched subjects and yield their changes since the previous refresh.
+
+        States are stored after every batch, so an interrupted refresh continues
+        with the remaining changes when it's run again.
+
+        :param date: date data is acquired from
+        :param token: cancellation token abandoning the remaining batches,
+                      by default the one of the calling thread requests
+        :return: iterator of the change events
+        """
+        token = self.client.current_token if token is None else token
+        validated_date = date_validator(datetime.date.today() if date is None else date)
+        batches = list(chunks(self.nips, SearchRequest.PARAM_LIMIT))
+
+        def search(batch: List[str]) -> dict:
+            """Fetch raw subjects of the batch."""
+            with self.client.lane("bulk"), job_cancellation(self.client, token):
+                return self.client.search_nips(batch, date=validated_date, raw=True)
+
+        with thread_pool(self.max_workers, token) as threads:
+            for batch, body in zip(
+                batches,
+                bounded_map(search, batches, threads, 2 * self.max_workers, token),
+            ):
+                with self.connection:
+                    yield from self._compare(batch, body["result"], validated_date)
+
+    def _compare(self, batch: List[str], result: dict, date: str) -> List[ChangeEvent]:
+        """Store states of the batch subjects and return their changes."""
+        found = {subject["nip"]: subject for subject in result["subjects"]}
+        placeholders = ",".join("?" * len(batch))
+        stored = {
+            nip: (stored_date, stored_hash, data)
+            for nip, stored_date, stored_hash, data in self.connection.execute(
+                "SELECT nip, date, hash, data FROM latest "
+                f"WHERE nip IN ({placeholders})",
+                batch,
+            )
+        }
+        events = []
+        hashes = []
+
+        for nip in batch:
+            subject = found.get(nip)
+            digest, canonical = (
+                (MISSING, b"") if subject is None else subject_hash(subject)
+            )
+            hashes.append((nip, date, digest))
+            previous_date, previous_hash, data = stored.get(nip, (None, MISSING, None))
+
+            if digest == previous_hash:
+                continue
+
+            self.connection.execute(
+                "INSERT OR REPLACE INTO latest VALUES (?, ?, ?, ?)",
+                (nip, date, digest, zlib.compress(canonical) if subject else None),
+            )
+
+            changes: Dict[str, Tuple[Any, Any]] = {}
+            if subject is None:
+                kind = "removed"
+            elif data is None:
+                kind = "added"
+            else:
+                previous = json.loads(zlib.decompress(data))
+                kind, changes = "changed", diff_subjects(previous, subject)
+
+            events.append(
+                ChangeEvent(
+                    nip, date, kind, previous_date, result["requestId"], changes
+                )
+            )
+
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?)", hashes
+        )
+        return events
+
+    def close(self) -> None:
+        """Close the database."""
+        self.connection.close()
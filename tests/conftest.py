@@ -1,10 +1,47 @@
 """Test fixtures."""
+import random
+
 import pytest
 
 from vater.client import Client
+from vater.testing import make_nip
 
 
 @pytest.fixture
 def client() -> Client:
     """Yield vat register API client. Client connects to test API client."""
     return Client(base_url="https://wl-test.mf.gov.pl")
+
+
+@pytest.fixture
+def subject_dict() -> dict:
+    """Return subject json with the minimal data as returned by the API."""
+    return {
+        "name": "Eminem",
+        "nip": "0" * 10,
+        "statusVat": "Czynny",
+        "regon": None,
+        "pesel": None,
+        "krs": None,
+        "residenceAddress": None,
+        "workingAddress": None,
+        "representatives": [],
+        "authorizedClerks": [],
+        "partners": [],
+        "registrationLegalDate": None,
+        "registrationDenialBasis": None,
+        "registrationDenialDate": None,
+        "restorationBasis": None,
+        "restorationDate": None,
+        "removalBasis": None,
+        "removalDate": None,
+        "accountNumbers": ["1" * 26],
+        "hasVirtualAccounts": False,
+    }
+
+
+@pytest.fixture
+def nips() -> list:
+    """Return distinct nip numbers with valid checksums."""
+    generator = random.Random(0)
+    return sorted({make_nip(generator) for _ in range(90)})
@@ -0,0 +1,279 @@
+"""Test bulk module."""
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import responses
+
+from vater.bulk import bisect_batch, bounded_map, chunks
+from vater.client import Client
+from vater.errors import InvalidRequestData, ValidationError
+from vater.models import SubjectSchema
+from vater.negative_cache import NegativeCache
+from vater.request_types import RawResponse
+from vater.testing import StubRegister, generate
+from vater.transports import MemoryTransport
+
+SAMPLE_NIP = "0" * 10
+SAMPLE_DATE = "2001-01-01"
+NIPS_URL = "https://wl-test.mf.gov.pl/api/search/nips/{nips}?date=2001-01-01"
+
+
+def test_chunks():
+    """Test that values are split into chunks of given size."""
+    assert list(chunks(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_bounded_map_keeps_order():
+    """Test that results of executor tasks are yielded in order."""
+    with ThreadPoolExecutor(4) as executor:
+        assert list(bounded_map(str, range(10), executor, window=3)) == [
+            str(value) for value in range(10)
+        ]
+
+
+@pytest.mark.parametrize("processes", (None, 2))
+@responses.activate
+def test_search_nips_bulk(processes, client, subject_dict, nips):
+    """Test that nips are split into batches and results are yielded in order."""
+    batches = ((nips[:30], "aa111-aa111aaa"), (nips[30:31], "bb222-bb222bbb"))
+    for batch, request_id in batches:
+        responses.add(
+            responses.GET,
+            NIPS_URL.format(nips=",".join(batch)),
+            status=200,
+            json={
+                "result": {
+                    "subjects": [subject_dict] * len(batch),
+                    "requestId": request_id,
+                }
+            },
+            content_type="application/json",
+        )
+    subject = SubjectSchema().load(subject_dict)
+
+    results = list(
+        client.search_nips_bulk(nips[:31], date=SAMPLE_DATE, processes=processes)
+    )
+
+    assert results == [
+        ([subject] * 30, "aa111-aa111aaa"),
+        ([subject], "bb222-bb222bbb"),
+    ]
+
+
+@pytest.mark.parametrize("processes", (None, 2))
+@responses.activate
+def test_search_nips_bulk_fields(processes, client, subject_dict):
+    """Test that only requested fields are loaded in bulk searches."""
+    responses.add(
+        responses.GET,
+        NIPS_URL.format(nips=SAMPLE_NIP),
+        status=200,
+        json={"result": {"subjects": [subject_dict], "requestId": "aa111-aa111aaa"}},
+        content_type="application/json",
+    )
+
+    (result,) = client.search_nips_bulk(
+        [SAMPLE_NIP], date=SAMPLE_DATE, processes=processes, fields=["status_vat"]
+    )
+
+    assert result.by_input[SAMPLE_NIP].status_vat == "Czynny"
+    assert result.value[0].name is None
+
+
+@pytest.mark.parametrize("processes", (None, 2))
+@responses.activate
+def test_search_nips_bulk_duplicates(processes, client, subject_dict, nips):
+    """Test that repeated and formatted nips are searched once."""
+    responses.add(
+        responses.GET,
+        NIPS_URL.format(nips=",".join(nips[:2])),
+        status=200,
+        json={"result": {"subjects": [], "requestId": "aa111-aa111aaa"}},
+        content_type="application/json",
+    )
+    formatted = f"PL {nips[0][:3]}-{nips[0][3:6]}-{nips[0][6:8]}-{nips[0][8:]}"
+
+    results = list(
+        client.search_nips_bulk(
+            [nips[0], nips[1]] * 15 + [formatted], date=SAMPLE_DATE, processes=processes
+        )
+    )
+
+    assert results == [([], "aa111-aa111aaa")]
+    assert results[0].missing == nips[:2]
+    assert client.dedup_stats.duplicates == 29
+    assert client.dedup_stats.requests_saved == 1
+
+
+@pytest.mark.parametrize("processes", (None, 2))
+def test_search_nips_bulk_fans_out_repeats(processes):
+    """Test that every given position is answered, repeats across batches too."""
+    records = list(generate(40, seed=0))
+    transport = MemoryTransport(handler=StubRegister(records))
+    client = Client(base_url="https://wl-test.mf.gov.pl", transport=transport)
+    nips = [record.nip for record in records]
+    values = nips[:2] + nips[:29] + nips[1:3] + nips[29:] + [nips[0], nips[35]]
+
+    answers = {}
+    for result in client.search_nips_bulk(
+        values, date=SAMPLE_DATE, processes=processes
+    ):
+        answers.update(zip(result.positions, result.per_input))
+
+    assert len(transport.requests) == 2
+    assert sorted(answers) == list(range(len(values)))
+    assert [answers[position].nip for position in sorted(answers)] == values
+
+
+def test_bisect_batch_raises_request_errors():
+    """Test that errors not caused by a single identifier aren't bisected."""
+
+    def send(batch):
+        """Reject the date."""
+        raise InvalidRequestData("Date has value preceding registry range.", "WL-118")
+
+    with pytest.raises(InvalidRequestData):
+        bisect_batch(send, ["a", "b"])
+
+
+@pytest.mark.parametrize("processes", (None, 2))
+def test_search_nips_bulk_bisects_rejected_batch(processes, subject_dict, nips):
+    """Test that rejected nips are isolated and the others are still found."""
+    rejected = nips[5]
+
+    def handler(url):
+        """Reject batches with the invalid nip."""
+        batch = re.search(r"nips/([\d,]+)", url).group(1).split(",")
+        if rejected in batch:
+            return RawResponse(json.dumps({"code": "WL-115"}).encode(), 400)
+
+        subjects = [{**subject_dict, "nip": nip} for nip in batch]
+        body = {"result": {"subjects": subjects, "requestId": batch[0]}}
+        return RawResponse(json.dumps(body).encode())
+
+    transport = MemoryTransport(handler=handler)
+    client = Client(
+        base_url="https://wl-test.mf.gov.pl",
+        transport=transport,
+        negative_cache=NegativeCache(),
+    )
+
+    (result,) = client.search_nips_bulk(nips[:8], date=SAMPLE_DATE, processes=processes)
+
+    assert [subject.nip for subject in result.value] == nips[:5] + nips[6:8]
+    assert result.batch_ids == [nips[0], nips[4], nips[6]]
+    assert result.errors[rejected].code == "WL-115"
+    assert result.missing == []
+    assert len(transport.requests) == 7
+
+    (result,) = client.search_nips_bulk(nips[:8], date=SAMPLE_DATE)
+
+    assert result.errors[rejected].code == "WL-115"
+    assert len(transport.requests) == 8
+
+
+@pytest.mark.parametrize("processes", (None, 2))
+def test_search_nips_bulk_invalid_nip(processes, client):
+    """Test that validation error is raised for invalid nip."""
+    with pytest.raises(ValidationError) as exception_info:
+        list(client.search_nips_bulk(["123"], date=SAMPLE_DATE, processes=processes))
+
+    assert str(exception_info.value) == (
+        "ValidationError: nip `123` invalid length: 3, required 10"
+    )
+
+
+@responses.activate
+def test_check_nip_history(client, subject_dict):
+    """Test that subject is fetched once for every distinct date."""
+    for date, accounts in (("2001-01-01", ["1" * 26]), ("2001-01-02", [])):
+        responses.add(
+            responses.GET,
+            f"https://wl-test.mf.gov.pl/api/search/nips/{SAMPLE_NIP}?date={date}",
+            status=200,
+            json={
+                "result": {
+                    "subjects": [{**subject_dict, "accountNumbers": accounts}],
+                    "requestId": date,
+                }
+            },
+            content_type="application/json",
+        )
+
+    assert client.check_nip_history(
+        SAMPLE_NIP, "1" * 26, ["2001-01-01", "2001-01-02", "2001-01-01"]
+    ) == {"2001-01-01": (True, "2001-01-01"), "2001-01-02": (False, "2001-01-02")}
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_check_nips_history_virtual_accounts(client, subject_dict):
+    """Test that unlisted accounts of subjects with virtual accounts are checked."""
+    responses.add(
+        responses.GET,
+        NIPS_URL.format(nips=SAMPLE_NIP),
+        status=200,
+        json={
+            "result": {
+                "subjects": [{**subject_dict, "hasVirtualAccounts": True}],
+                "requestId": "aa111-aa111aaa",
+            }
+        },
+        content_type="application/json",
+    )
+    responses.add(
+        responses.GET,
+        (
+            f"https://wl-test.mf.gov.pl/api/check/nip/{SAMPLE_NIP}/bank-account/"
+            f"{'2' * 26}?date={SAMPLE_DATE}"
+        ),
+        status=200,
+        json={"result": {"accountAssigned": "TAK", "requestId": "bb222-bb222bbb"}},
+        content_type="application/json",
+    )
+
+    assert client.check_nips_history(
+        [(SAMPLE_NIP, "1" * 26, SAMPLE_DATE), (SAMPLE_NIP, "2" * 26, SAMPLE_DATE)]
+    ) == [(True, "aa111-aa111aaa"), (True, "bb222-bb222bbb")]
+
+
+def test_virtual_account_checks_are_concurrent():
+    """Test that unlisted virtual accounts are checked by the thread pool."""
+    records = list(generate(8, seed=0, virtual_accounts=1.0))
+    transport = MemoryTransport(handler=StubRegister(records), latency=0.2)
+    client = Client(base_url="https://wl-test.mf.gov.pl", transport=transport)
+
+    start = time.monotonic()
+    results = client.check_nips_history(
+        [(record.nip, "1" * 26, SAMPLE_DATE) for record in records], max_workers=8
+    )
+
+    assert [result.value for result in results] == [False] * 8
+    assert len(transport.requests) == 9
+    assert time.monotonic() - start < 1.0
+
+
+@responses.activate
+def test_check_nips_bulk(client, subject_dict):
+    """Test that pairs are grouped by nip and answered from a single batch."""
+    responses.add(
+        responses.GET,
+        NIPS_URL.format(nips=f"{SAMPLE_NIP},{'1' * 10}"),
+        status=200,
+        json={"result": {"subjects": [subject_dict], "requestId": "aa111-aa111aaa"}},
+        content_type="application/json",
+    )
+
+    assert client.check_nips_bulk(
+        [(SAMPLE_NIP, "1" * 26), ("1" * 10, "1" * 26), (SAMPLE_NIP, "2" * 26)],
+        date=SAMPLE_DATE,
+    ) == [
+        (True, "aa111-aa111aaa"),
+        (False, "aa111-aa111aaa"),
+        (False, "aa111-aa111aaa"),
+    ]
+    assert len(responses.calls) == 1
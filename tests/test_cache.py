@@ -0,0 +1,80 @@
+"""Test cache module."""
+import datetime
+
+import responses
+from freezegun import freeze_time
+
+from vater.cache import MemoryCache, next_refresh
+from vater.client import Client
+from vater.rate_limiter import RateLimiter
+
+SAMPLE_NIP = "0" * 10
+SAMPLE_KEY = ("/api/search/nip", SAMPLE_NIP, "2001-01-01")
+
+
+def test_next_refresh():
+    """Test that the next refresh is today or tomorrow depending on current time."""
+    refresh_time = datetime.time(6)
+
+    before_refresh = next_refresh(refresh_time, datetime.datetime(2001, 1, 1, 5))
+    after_refresh = next_refresh(refresh_time, datetime.datetime(2001, 1, 1, 7))
+
+    assert before_refresh == datetime.datetime(2001, 1, 1, 6).timestamp()
+    assert after_refresh == datetime.datetime(2001, 1, 2, 6).timestamp()
+
+
+def test_memory_cache_expires_at_refresh():
+    """Test that entries are invalidated at the register refresh."""
+    cache = MemoryCache(refresh_time=datetime.time(6))
+
+    with freeze_time("2001-01-01 05:00:00"):
+        cache.set(SAMPLE_KEY, b"{}")
+        assert cache.get(SAMPLE_KEY) == b"{}"
+
+    with freeze_time("2001-01-01 06:00:01"):
+        assert cache.get(SAMPLE_KEY) is None
+
+
+def test_memory_cache_evicts_least_recently_used():
+    """Test that least recently used entry is evicted when cache is full."""
+    cache = MemoryCache(maxsize=2)
+    keys = [("/api/search/nip", str(number) * 10, "2001-01-01") for number in range(3)]
+
+    cache.set(keys[0], b"0")
+    cache.set(keys[1], b"1")
+    cache.get(keys[0])
+    cache.set(keys[2], b"2")
+
+    assert cache.get(keys[0]) == b"0"
+    assert cache.get(keys[1]) is None
+    assert len(cache) == 2
+
+
+@responses.activate
+def test_client_uses_cache():
+    """Test that cached response is used for the repeated request."""
+    client = Client(base_url="https://wl-test.mf.gov.pl", cache=MemoryCache())
+    responses.add(
+        responses.GET,
+        f"https://wl-test.mf.gov.pl/api/search/nip/{SAMPLE_NIP}?date=2001-01-01",
+        status=200,
+        json={"result": {"subject": None, "requestId": "aa111-aa111aaa"}},
+        content_type="application/json",
+    )
+
+    for _ in range(2):
+        assert client.search_nip(SAMPLE_NIP, date="2001-01-01") == (
+            None,
+            "aa111-aa111aaa",
+        )
+
+    assert len(responses.calls) == 1
+
+
+def test_rate_limiter():
+    """Test that tokens are taken up to the burst size."""
+    rate_limiter = RateLimiter(rate=0.001, burst=2)
+
+    assert rate_limiter.try_acquire()
+    assert rate_limiter.try_acquire()
+    assert not rate_limiter.try_acquire()
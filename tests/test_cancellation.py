@@ -0,0 +1,135 @@
+"""Test cancellation module."""
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from vater.cancellation import CancellationToken
+from vater.circuit_breaker import CircuitBreaker
+from vater.client import Client
+from vater.errors import Cancelled, DeadlineExceeded
+from vater.rate_limiter import RateLimiter
+from vater.request_types import RawResponse
+from vater.transports import MemoryTransport
+
+SAMPLE_NIP = "0" * 10
+NIP_URL = f"https://wl-test.mf.gov.pl/api/search/nip/{SAMPLE_NIP}?date=2001-01-01"
+BODY = b'{"result": {"subject": null, "requestId": "aa111-aa111aaa"}}'
+
+
+def make_client(latency=0.0, **kwargs):
+    """Return client answering every search with no subjects."""
+
+    def handler(url):
+        """Return empty search result."""
+        body = {"result": {"subjects": [], "requestId": "aa111-aa111aaa"}}
+        return RawResponse(json.dumps(body).encode())
+
+    transport = MemoryTransport({NIP_URL: BODY}, handler=handler, latency=latency)
+    return Client(base_url="https://wl-test.mf.gov.pl", transport=transport, **kwargs)
+
+
+def test_token():
+    """Test that tokens are cancelled explicitly and at their deadline."""
+    token = CancellationToken()
+    token.check()
+    assert token.remaining() is None
+
+    threading.Timer(0.05, token.cancel).start()
+    start = time.monotonic()
+    with pytest.raises(Cancelled):
+        token.sleep(5)
+    assert time.monotonic() - start < 1
+
+    with pytest.raises(DeadlineExceeded):
+        CancellationToken(0).check()
+
+
+def test_call_deadline_bounds_http():
+    """Test that the request times out at its deadline without opening the circuit."""
+    breaker = CircuitBreaker(failure_threshold=1)
+    client = make_client(latency=1, circuit_breaker=breaker)
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        with client.cancellation(timeout=0.05):
+            client.search_nip(SAMPLE_NIP, date="2001-01-01")
+
+    assert time.monotonic() - start < 0.5
+    assert breaker.state == breaker.CLOSED
+    assert client.current_token is None
+
+
+def test_cancelled_call_isnt_sent():
+    """Test that requests of a cancelled token aren't validated nor sent."""
+    client = make_client()
+    token = CancellationToken()
+    token.cancel()
+
+    with pytest.raises(Cancelled):
+        with client.cancellation(token):
+            client.search_nip(SAMPLE_NIP, date="2001-01-01")
+
+    assert client.transport.requests == []
+
+
+def test_deadline_interrupts_rate_limit():
+    """Test that waiting for the rate limiter ends at the deadline."""
+    client = make_client(rate_limiter=RateLimiter(rate=0.01))
+    client.search_nip(SAMPLE_NIP, date="2001-01-01")
+
+    with pytest.raises(DeadlineExceeded):
+        with client.cancellation(timeout=0.05):
+            client.search_nip(SAMPLE_NIP, date="2001-01-01")
+
+    assert len(client.transport.requests) == 1
+
+
+def test_bulk_cancellation(nips):
+    """Test that cancelled bulk searches abandon the remaining batches."""
+    client = make_client(latency=0.2)
+    token = CancellationToken()
+    results = client.search_nips_bulk(nips, date="2001-01-01", token=token)
+
+    next(results)
+    token.cancel()
+    start = time.monotonic()
+    with pytest.raises(Cancelled):
+        next(results)
+
+    assert time.monotonic() - start < 0.15
+    assert len(client.transport.requests) < 4
+
+
+def test_run_coroutine():
+    """Test that coroutines are cancelled at the token deadline."""
+
+    async def main():
+        """Await coroutines with tokens."""
+        assert await CancellationToken().run(asyncio.sleep(0, result=1)) == 1
+
+        with pytest.raises(DeadlineExceeded):
+            await CancellationToken(0.05).run(asyncio.sleep(5))
+
+    asyncio.get_event_loop().run_until_complete(main())
+
+
+def test_cancelled_probe_releases_circuit():
+    """Test that a probe stopped by its deadline lets the next request probe."""
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.0)
+    breaker.record_failure()
+    client = make_client(latency=0.2, circuit_breaker=breaker)
+
+    with pytest.raises(DeadlineExceeded):
+        with client.cancellation(timeout=0.05):
+            client.search_nip(SAMPLE_NIP, date="2001-01-01")
+
+    assert breaker.state == CircuitBreaker.OPEN
+    client.transport.latency = 0.0
+
+    for _ in range(3):
+        client.search_nip(SAMPLE_NIP, date="2001-01-01")
+
+    assert breaker.state == CircuitBreaker.CLOSED
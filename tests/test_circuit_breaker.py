@@ -0,0 +1,109 @@
+"""Test circuit breaker module."""
+import time
+
+import pytest
+import responses
+
+from vater.cache import MemoryCache
+from vater.circuit_breaker import CircuitBreaker
+from vater.client import Client
+from vater.errors import ApiUnavailable, UnknownExternalApiError
+
+SAMPLE_NIP = "0" * 10
+NIP_URL = f"https://wl-test.mf.gov.pl/api/search/nip/{SAMPLE_NIP}?date={{}}"
+
+
+def wait_for_state(breaker, state):
+    """Wait until the background probe changes the circuit state."""
+    deadline = time.monotonic() + 2
+
+    while breaker.state != state and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_circuit_opens_and_recovers():
+    """Test that circuit opens after failures and closes after successful probe."""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.05)
+
+    breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+
+    with pytest.raises(ApiUnavailable):
+        breaker.before_request()
+
+    time.sleep(0.05)
+    breaker.before_request()
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(ApiUnavailable):
+        breaker.before_request()
+
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@responses.activate
+def test_client_fails_fast():
+    """Test that requests aren't sent after repeated API failures."""
+    client = Client(
+        base_url="https://wl-test.mf.gov.pl",
+        circuit_breaker=CircuitBreaker(failure_threshold=2),
+    )
+    responses.add(responses.GET, NIP_URL.format("2001-01-01"), status=500)
+
+    for _ in range(2):
+        with pytest.raises(UnknownExternalApiError):
+            client.search_nip(SAMPLE_NIP, date="2001-01-01")
+
+    with pytest.raises(ApiUnavailable):
+        client.search_nip(SAMPLE_NIP, date="2001-01-01")
+
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_client_serves_stale_result():
+    """Test that the last known result is flagged as stale during an outage."""
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+    client = Client(
+        base_url="https://wl-test.mf.gov.pl",
+        cache=MemoryCache(),
+        circuit_breaker=breaker,
+        serve_stale=True,
+    )
+    responses.add(
+        responses.GET,
+        NIP_URL.format("2001-01-01"),
+        status=200,
+        json={"result": {"subject": None, "requestId": "aa111-aa111aaa"}},
+        content_type="application/json",
+    )
+    responses.add(
+        responses.GET,
+        NIP_URL.format("2001-01-02"),
+        status=400,
+        json={"code": "WL-196", "message": "Message from the server"},
+        content_type="application/json",
+    )
+    responses.add(
+        responses.GET,
+        NIP_URL.format("2001-01-02"),
+        status=200,
+        json={"result": {"subject": None, "requestId": "bb222-bb222bbb"}},
+        content_type="application/json",
+    )
+    client.search_nip(SAMPLE_NIP, date="2001-01-01")
+
+    result = client.search_nip(SAMPLE_NIP, date="2001-01-02")
+
+    assert result == (None, "aa111-aa111aaa")
+    assert result.stale
+    assert result.date == "2001-01-01"
+    assert breaker.state == CircuitBreaker.OPEN
+
+    wait_for_state(breaker, CircuitBreaker.CLOSED)
+
+    assert client.search_nip(SAMPLE_NIP, date="2001-01-02") == (None, "bb222-bb222bbb")
+    assert len(responses.calls) == 3
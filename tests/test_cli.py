@@ -5,6 +5,7 @@ import pytest
 from click.testing import CliRunner
 
 from vater.cli import cli
+from vater.request_types import RawResponse
 
 SAMPLE_ACCOUNT = 26 * "1"
 SAMPLE_NIP = 10 * "1"
@@ -51,3 +52,19 @@ def test_check_commands(command, params):
         runner.invoke(cli, [command] + params)
 
     mock_method.assert_called()
+
+
+@pytest.mark.parametrize("status_code, exit_code", ((200, 0), (400, 1)))
+def test_response_body_is_written(status_code, exit_code):
+    """Test that the API response body is written as it is."""
+    runner = CliRunner()
+    body = b'{"result": {"subject": null, "requestId": "aa111-aa111aaa"}}'
+
+    with patch(
+        "vater.client.Client.search_nip",
+        return_value=RawResponse(body, status_code=status_code),
+    ):
+        result = runner.invoke(cli, ["--no-daemon", "search-nip", SAMPLE_NIP])
+
+    assert result.stdout_bytes == body + b"\n"
+    assert result.exit_code == exit_code
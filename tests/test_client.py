@@ -1,10 +1,13 @@
 """Test client module."""
 import datetime
+import io
 
 import pytest
 import responses
 from freezegun import freeze_time
 
+from vater.cache import MemoryCache
+from vater.client import Client
 from vater.errors import (
     ERROR_CODE_MAPPING,
     InvalidRequestData,
@@ -12,7 +15,7 @@ from vater.errors import (
     UnknownExternalApiError,
     ValidationError,
 )
-from vater.models import Company, Subject
+from vater.models import SUBJECT_KEYS, Company, Subject, load_projection
 from vater.request_types import SearchRequest
 
 SAMPLE_NIP = "0" * 10
@@ -260,6 +263,51 @@ class TestSubjectSearch:
             accounts=[SAMPLE_ACCOUNT], date=datetime.date(2001, 1, 1)
         ) == ([self.example_subject], "aa111-aa111aaa")
 
+    @responses.activate
+    def test_search_accounts_fields(self, client):
+        """Test that only requested fields and the searched field are loaded."""
+        self.set_up()
+        responses.add(
+            responses.GET,
+            (
+                "https://wl-test.mf.gov.pl/api/search/bank-accounts/"
+                f"{SAMPLE_ACCOUNT}?date={SAMPLE_DATE}"
+            ),
+            status=200,
+            json={
+                "result": {
+                    "subjects": [self.example_subject_dict],
+                    "requestId": "aa111-aa111aaa",
+                }
+            },
+            content_type="application/json",
+        )
+
+        (subject,), _ = client.search_accounts(
+            [SAMPLE_ACCOUNT], date=SAMPLE_DATE, fields=["status_vat"]
+        )
+
+        assert subject.status_vat == self.example_subject.status_vat
+        assert subject.account_numbers == self.example_subject.account_numbers
+        assert subject.name is None and subject.partners is None
+
+    def test_projection_loads_like_schema(self):
+        """Test that all projected fields are equal to the fields loaded by schema."""
+        self.set_up()
+
+        subject = load_projection(self.example_subject_dict, SUBJECT_KEYS)
+
+        assert subject == self.example_subject
+
+    def test_invalid_fields(self, client):
+        """Test that error is raised for unknown field names."""
+        with pytest.raises(ValidationError) as exception_info:
+            client.search_nip(SAMPLE_NIP, fields=["status"])
+
+        assert str(exception_info.value) == (
+            "ValidationError: fields `status` is not a subject field"
+        )
+
     @responses.activate
     def test_check_nip(self, client):
         """Test proper tuple is returned for valid nip and account."""
@@ -366,6 +414,46 @@ class TestSubjectSearch:
             SAMPLE_NIP, SAMPLE_ACCOUNT, date=datetime.date(2001, 1, 1), raw=True
         ) == {"result": {"accountAssigned": "TAK", "requestId": "aa111-aa111aaa"}}
 
+    @responses.activate
+    def test_search_passthrough(self, client):
+        """Test that undecoded response is returned when `passthrough` is set."""
+        body = b'{"result": {"subject": null, "requestId": "aa111-aa111aaa"}}'
+        responses.add(
+            responses.GET,
+            f"https://wl-test.mf.gov.pl/api/search/nip/{SAMPLE_NIP}?date={SAMPLE_DATE}",
+            status=200,
+            body=body,
+            content_type="application/json",
+        )
+        file = io.BytesIO()
+
+        response = client.search_nip(SAMPLE_NIP, date=SAMPLE_DATE, passthrough=True)
+
+        assert response.content == body
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "application/json"
+        assert response.write_to(file, chunk_size=7) == len(body)
+        assert file.getvalue() == body
+
+    @responses.activate
+    def test_passthrough_returns_api_errors(self):
+        """Test that API errors are returned with `passthrough` and not cached."""
+        client = Client(base_url="https://wl-test.mf.gov.pl", cache=MemoryCache())
+        responses.add(
+            responses.GET,
+            f"https://wl-test.mf.gov.pl/api/search/nip/{SAMPLE_NIP}?date={SAMPLE_DATE}",
+            status=400,
+            json={"code": "WL-113", "message": "Message from the server"},
+            content_type="application/json",
+        )
+
+        for _ in range(2):
+            response = client.search_nip(SAMPLE_NIP, date=SAMPLE_DATE, passthrough=True)
+            assert response.status_code == 400
+            assert response.json()["code"] == "WL-113"
+
+        assert len(responses.calls) == 2
+
     @pytest.mark.parametrize(
         "error_code", [error_code for error_code in ERROR_CODE_MAPPING]
     )
@@ -404,10 +492,10 @@ class TestSubjectSearch:
             '{"message": "Unknown error"}'
         ) in str(exception_info.value)
 
-    def test_max_args_exceeded(self, client):
+    def test_max_args_exceeded(self, client, nips):
         """Test that error is raised when number of args exceeds allowed maximum."""
         with pytest.raises(MaximumParameterNumberExceeded) as exception_info:
-            client.search_nips([SAMPLE_NIP] * (SearchRequest.PARAM_LIMIT + 1))
+            client.search_nips(nips[: SearchRequest.PARAM_LIMIT + 1])
 
         assert str(exception_info.value) == (
             "MaximumParameterNumberExceeded: number of nips exceeds allowed maximum: "
@@ -452,6 +540,32 @@ class TestSubjectSearch:
 
         assert str(exception_info.value) == err_msg
 
+    @pytest.mark.parametrize(
+        "method, value, url",
+        (
+            ("search_nip", "PL 000-000-00-00", "nip/0000000000"),
+            ("search_nip", "pl0000000000", "nip/0000000000"),
+            ("search_regon", "000 000 000", "regon/000000000"),
+            (
+                "search_account",
+                "PL00 0000 0000 0000 0000 0000 0000",
+                "bank-account/00000000000000000000000000",
+            ),
+        ),
+    )
+    @responses.activate
+    def test_identifiers_normalized(self, method, value, url, client, subject_dict):
+        """Test that separators and country prefixes are removed before search."""
+        responses.add(
+            responses.GET,
+            f"https://wl-test.mf.gov.pl/api/search/{url}?date={SAMPLE_DATE}",
+            status=200,
+            json={"result": {"subjects": [], "subject": None, "requestId": "a"}},
+            content_type="application/json",
+        )
+
+        assert getattr(client, method)(value, date=SAMPLE_DATE).request_id == "a"
+
     @pytest.mark.parametrize(
         "regon, err_msg",
         (
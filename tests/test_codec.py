@@ -0,0 +1,93 @@
+"""Test codec module."""
+import dataclasses
+import datetime
+
+import pytest
+
+from vater import codec
+from vater.models import Company, Subject
+
+COMPANY = Company(
+    company_name="Moby Dick Inc",
+    first_name="sir Richard",
+    last_name="Lion Heart",
+    nip="0" * 10,
+    pesel=None,
+)
+
+
+def make_subject(**kwargs):
+    """Create a subject with all fields set."""
+    return Subject(
+        **{
+            "name": "Eminem Łódź",
+            "nip": "0" * 10,
+            "status_vat": "Czynny",
+            "regon": "0" * 9,
+            "pesel": None,
+            "krs": "6" * 10,
+            "residence_address": "8 mile",
+            "working_address": "",
+            "representatives": [COMPANY],
+            "authorized_clerks": [],
+            "partners": [COMPANY, COMPANY],
+            "registration_legal_date": datetime.date(2001, 1, 1),
+            "registration_denial_basis": None,
+            "registration_denial_date": None,
+            "restoration_basis": "Restoration Basis",
+            "restoration_date": datetime.date(2003, 3, 3),
+            "removal_basis": None,
+            "removal_date": None,
+            "account_numbers": ["0" * 26, "12" * 13],
+            "has_virtual_accounts": False,
+            **kwargs,
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "subject",
+    (
+        make_subject(),
+        make_subject(
+            representatives=None, has_virtual_accounts=None, account_numbers=None
+        ),
+        make_subject(account_numbers=["PL" + "1" * 26]),
+        make_subject(name="Moby\x00Dick", partners=[COMPANY, Company("\x00", *"abcd")]),
+    ),
+)
+def test_dumps_loads(subject):
+    """Test that decoded subject is equal to the encoded one."""
+    assert codec.loads(codec.dumps(subject)) == subject
+
+
+@pytest.mark.parametrize("length", (0, 65535, 65536, 100000))
+def test_long_strings(length):
+    """Test that strings of any length are told apart from None."""
+    company = dataclasses.replace(COMPANY, company_name="x" * length)
+    subject = make_subject(
+        name="ł" * length, representatives=[company], account_numbers=["1" * length]
+    )
+
+    assert codec.loads(codec.dumps(subject)) == subject
+
+
+def test_dumps_loads_many():
+    """Test that decoded subjects are equal to the encoded ones."""
+    subjects = [make_subject(), make_subject(nip="1" * 10, account_numbers=[])]
+
+    assert codec.loads_many(codec.dumps_many(subjects)) == subjects
+    assert codec.loads_many(codec.dumps_many([])) == []
+
+
+def test_accounts_are_packed():
+    """Test that 26 digits accounts are encoded with 13 bytes."""
+    without_accounts = codec.dumps(make_subject(account_numbers=[]))
+
+    assert len(codec.dumps(make_subject())) - len(without_accounts) == 26
+
+
+def test_unsupported_version():
+    """Test that error is raised for data encoded with different version."""
+    with pytest.raises(codec.CodecError):
+        codec.loads(b"\x01" + codec.dumps(make_subject())[1:])
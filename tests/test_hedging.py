@@ -0,0 +1,96 @@
+"""Test hedging module."""
+import threading
+
+import pytest
+import responses
+
+from vater.client import Client
+from vater.hedging import HedgingPolicy
+from vater.rate_limiter import RateLimiter
+
+SAMPLE_NIP = "0" * 10
+
+
+def slow_first_call(results):
+    """Return function answering slowly only on the first call."""
+    calls = []
+    release = threading.Event()
+
+    def function():
+        """Block the first call until another one returns."""
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)
+            return results[0]
+
+        release.set()
+        return results[1]
+
+    return function
+
+
+def test_delay_is_percentile_of_latencies():
+    """Test that the initial delay is used until enough latencies are known."""
+    policy = HedgingPolicy(90, initial_delay=1, min_samples=10)
+
+    assert policy.delay() == 1
+
+    policy._latencies.extend(number / 100 for number in range(1, 11))
+
+    assert policy.delay() == pytest.approx(0.09)
+
+
+def test_hedge_wins():
+    """Test that hedge is sent for the slow request and its result is used."""
+    policy = HedgingPolicy(initial_delay=0.05)
+
+    assert policy.call(slow_first_call(["primary", "hedge"])) == "hedge"
+    assert (policy.stats.requests, policy.stats.fired, policy.stats.won) == (1, 1, 1)
+
+
+def test_hedge_limited_by_rate_limiter():
+    """Test that hedge is skipped when the rate limiter budget is used up."""
+    policy = HedgingPolicy(initial_delay=0.05)
+    rate_limiter = RateLimiter(rate=0.001)
+    rate_limiter.acquire()
+
+    function = slow_first_call(["primary", "hedge"])
+    threading.Timer(0.2, function).start()
+
+    assert policy.call(function, rate_limiter) == "primary"
+    assert (policy.stats.fired, policy.stats.skipped) == (0, 1)
+
+
+def test_failed_request_waits_for_the_other():
+    """Test that the other request result is used if the first one fails."""
+    policy = HedgingPolicy(initial_delay=0.05)
+    calls = []
+
+    def function():
+        """Fail the hedge after the delay and answer the primary request later."""
+        calls.append(1)
+        if len(calls) == 2:
+            raise ConnectionError
+
+        threading.Event().wait(0.2)
+        return "primary"
+
+    assert policy.call(function) == "primary"
+    assert (policy.stats.fired, policy.stats.won) == (1, 0)
+
+
+@responses.activate
+def test_client_sends_requests_through_policy():
+    """Test that client requests are counted by the hedging policy."""
+    client = Client(base_url="https://wl-test.mf.gov.pl", hedging=HedgingPolicy())
+    responses.add(
+        responses.GET,
+        f"https://wl-test.mf.gov.pl/api/search/nip/{SAMPLE_NIP}?date=2001-01-01",
+        status=200,
+        json={"result": {"subject": None, "requestId": "aa111-aa111aaa"}},
+        content_type="application/json",
+    )
+
+    assert client.search_nip(SAMPLE_NIP, date="2001-01-01") == (None, "aa111-aa111aaa")
+    assert client.hedging.stats.requests == 1
+    assert client.hedging.stats.fired == 0
@@ -0,0 +1,56 @@
+"""Test import time of the package."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+# cumulative import time budget of the modules every CLI command imports
+# in microseconds
+COMMAND_IMPORT_BUDGET = 100000
+COMMAND_MODULES = ("vater.cli", "vater.client", "vater.daemon")
+
+
+def import_times(module: str) -> dict:
+    """Return cumulative import time of every module imported with given ones."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+
+    return times
+
+
+@pytest.mark.parametrize("module", ("vater", "vater.cli", "vater.client"))
+def test_heavy_dependencies_not_imported(module):
+    """Test that requests and marshmallow are imported on first use only."""
+    times = import_times(module)
+
+    assert "requests" not in times
+    assert "marshmallow" not in times
+
+
+def test_command_import_time_budget():
+    """Test that modules imported by CLI commands are imported within the budget."""
+    times = import_times(", ".join(COMMAND_MODULES))
+
+    assert sum(times[module] for module in COMMAND_MODULES) < COMMAND_IMPORT_BUDGET
+
+
+def test_command_features_not_imported():
+    """Test that optional client features are imported on first use only."""
+    times = import_times(", ".join(COMMAND_MODULES))
+
+    for module in ("sqlite3", "concurrent.futures", "urllib.request", "vater.bulk"):
+        assert module not in times
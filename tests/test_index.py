@@ -0,0 +1,178 @@
+"""Test index module."""
+
+import datetime
+import random
+import threading
+
+import responses
+
+from vater.client import Client
+from vater.index import AccountIndex
+from vater.models import Subject
+
+SAMPLE_NIP = "0" * 10
+SAMPLE_ACCOUNT = "1" * 26
+OTHER_ACCOUNT = "2" * 26
+SAMPLE_DATE = "2001-01-01"
+
+
+def make_subject(nip=SAMPLE_NIP, accounts=(SAMPLE_ACCOUNT,), virtual=False):
+    """Create a subject with given nip and accounts."""
+    return Subject(
+        name="Eminem",
+        nip=nip,
+        status_vat="Czynny",
+        regon=None,
+        pesel=None,
+        krs=None,
+        residence_address=None,
+        working_address=None,
+        representatives=[],
+        authorized_clerks=[],
+        partners=[],
+        registration_legal_date=None,
+        registration_denial_basis=None,
+        registration_denial_date=None,
+        restoration_basis=None,
+        restoration_date=None,
+        removal_basis=None,
+        removal_date=None,
+        account_numbers=list(accounts),
+        has_virtual_accounts=virtual,
+    )
+
+
+def test_search_account():
+    """Test that subjects are found by account only for the indexed date."""
+    index = AccountIndex()
+    subject = make_subject()
+    index.add([subject], SAMPLE_DATE, "aa111-aa111aaa")
+
+    assert index.search_account(SAMPLE_ACCOUNT, SAMPLE_DATE) == (
+        [subject],
+        "aa111-aa111aaa",
+    )
+    assert index.search_account(SAMPLE_ACCOUNT, datetime.date(2002, 2, 2)) is None
+    assert index.search_account(OTHER_ACCOUNT, SAMPLE_DATE) is None
+
+
+def test_search_account_after_compaction():
+    """Test that entries are found both in the buffer and in sorted arrays."""
+    index = AccountIndex(compact_threshold=2)
+    subjects = [
+        make_subject(nip=str(number) * 10, accounts=[str(number) * 26])
+        for number in range(1, 6)
+    ]
+
+    for subject in subjects:
+        index.add([subject], SAMPLE_DATE, "aa111-aa111aaa")
+
+    assert len(index) == 5
+    for subject in subjects:
+        assert index.search_account(subject.account_numbers[0], SAMPLE_DATE) == (
+            [subject],
+            "aa111-aa111aaa",
+        )
+
+
+def test_compaction_merges_shared_accounts():
+    """Test that merged entries keep all subjects sharing an account."""
+    index = AccountIndex(compact_threshold=4)
+    generator = random.Random(0)
+    accounts = [f"{generator.randrange(10 ** 26):026d}" for _ in range(20)]
+    subjects = [
+        make_subject(nip=f"{number:010d}", accounts=generator.sample(accounts, 3))
+        for number in range(200)
+    ]
+
+    for subject in subjects:
+        index.add([subject], SAMPLE_DATE, "aa111-aa111aaa")
+    index.compact()
+
+    for account in accounts:
+        expected = [
+            subject for subject in subjects if account in subject.account_numbers
+        ]
+        found = index.search_account(account, SAMPLE_DATE)
+        assert (found[0] if found else []) == expected
+
+
+def test_concurrent_add():
+    """Test that subjects added from many threads are all indexed."""
+    index = AccountIndex(compact_threshold=64)
+
+    def add(thread):
+        """Add subjects with distinct nips and accounts."""
+        for number in range(500):
+            nip = f"{thread}{number:09d}"
+            index.add(
+                [make_subject(nip=nip, accounts=[nip * 2 + "000000"])], SAMPLE_DATE, "a"
+            )
+
+    threads = [threading.Thread(target=add, args=(thread,)) for thread in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(index) == 4000
+    assert index.search_account("7000000499" * 2 + "000000", SAMPLE_DATE) is not None
+
+
+def test_check_nip():
+    """Test that check is answered unless the subject has virtual accounts."""
+    index = AccountIndex()
+    index.add([make_subject()], SAMPLE_DATE, "aa111-aa111aaa")
+    index.add([make_subject(nip="1" * 10, virtual=True)], SAMPLE_DATE, "bb222-bb222bbb")
+
+    assert index.check_nip(SAMPLE_NIP, SAMPLE_ACCOUNT, SAMPLE_DATE) == (
+        True,
+        "aa111-aa111aaa",
+    )
+    assert index.check_nip(SAMPLE_NIP, OTHER_ACCOUNT, SAMPLE_DATE) == (
+        False,
+        "aa111-aa111aaa",
+    )
+    assert index.check_nip("1" * 10, OTHER_ACCOUNT, SAMPLE_DATE) is None
+    assert index.check_nip("2" * 10, SAMPLE_ACCOUNT, SAMPLE_DATE) is None
+
+
+def test_save_and_load(tmp_path):
+    """Test that persisted index is loaded with all entries."""
+    index = AccountIndex()
+    subject = make_subject()
+    index.add([subject], SAMPLE_DATE, "aa111-aa111aaa")
+    index.save(str(tmp_path / "index.pickle"))
+
+    loaded = AccountIndex.load(str(tmp_path / "index.pickle"))
+
+    assert loaded.search_account(SAMPLE_ACCOUNT, SAMPLE_DATE) == (
+        [subject],
+        "aa111-aa111aaa",
+    )
+
+
+@responses.activate
+def test_client_answers_from_index(subject_dict):
+    """Test that client answers account lookups from fetched subjects."""
+    client = Client(base_url="https://wl-test.mf.gov.pl", index=AccountIndex())
+    responses.add(
+        responses.GET,
+        f"https://wl-test.mf.gov.pl/api/search/nips/{SAMPLE_NIP}?date={SAMPLE_DATE}",
+        status=200,
+        json={"result": {"subjects": [subject_dict], "requestId": "aa111-aa111aaa"}},
+        content_type="application/json",
+    )
+    date = datetime.date(2001, 1, 1)
+
+    subjects, _ = client.search_nips([SAMPLE_NIP], date=date)
+
+    assert client.check_nip(SAMPLE_NIP, SAMPLE_ACCOUNT, date=date) == (
+        True,
+        "aa111-aa111aaa",
+    )
+    assert client.search_account(SAMPLE_ACCOUNT, date=date) == (
+        subjects,
+        "aa111-aa111aaa",
+    )
+    assert len(responses.calls) == 1
@@ -0,0 +1,210 @@
+"""Test priority lanes module."""
+import json
+import threading
+import time
+
+import pytest
+
+from vater.cancellation import CancellationToken
+from vater.client import Client
+from vater.errors import Cancelled, QuotaExceeded
+from vater.lanes import PriorityScheduler
+from vater.quota import QuotaCoordinator
+from vater.rate_limiter import RateLimiter
+from vater.request_types import RawResponse
+from vater.testing import StubRegister, generate
+from vater.transports import MemoryTransport
+
+
+def wait_for_depth(scheduler, lane, depth):
+    """Wait until given number of requests is queued in the lane."""
+    deadline = time.monotonic() + 2
+
+    while scheduler.stats[lane].depth != depth and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_interactive_jumps_queue():
+    """Test that a free slot is given to the highest priority lane."""
+    scheduler = PriorityScheduler(max_concurrency=1)
+    order = []
+
+    def request(lane):
+        """Hold a slot of the lane and record the order."""
+        with scheduler.slot(lane):
+            order.append(lane)
+
+    threads = []
+    with scheduler.slot("normal"):
+        for lane in ("bulk", "interactive"):
+            threads.append(threading.Thread(target=request, args=(lane,)))
+            threads[-1].start()
+            wait_for_depth(scheduler, lane, 1)
+
+    for thread in threads:
+        thread.join()
+
+    assert order == ["interactive", "bulk"]
+    assert scheduler.stats["bulk"].max_depth == 1
+    assert scheduler.stats["bulk"].max_wait > 0
+    assert scheduler.stats["normal"].requests == 1
+
+    with pytest.raises(ValueError):
+        with scheduler.slot("urgent"):
+            pass
+
+
+def test_lane_limit():
+    """Test that a lane at its limit doesn't block the other lanes."""
+    scheduler = PriorityScheduler(max_concurrency=2, limits={"bulk": 1})
+    started = threading.Event()
+
+    def bulk():
+        """Hold the bulk slot queued behind the running one."""
+        with scheduler.slot("bulk"):
+            started.set()
+
+    with scheduler.slot("bulk"):
+        thread = threading.Thread(target=bulk)
+        thread.start()
+        wait_for_depth(scheduler, "bulk", 1)
+
+        with scheduler.slot("interactive"):
+            assert not started.is_set()
+
+    thread.join()
+    assert started.is_set()
+
+
+def test_cancelled_request_gives_slot_back(subject_dict):
+    """Test that a slot held by a cancelled request is taken before its response."""
+    body = {"result": {"subject": subject_dict, "requestId": "aa111-aa111aaa"}}
+    scheduler = PriorityScheduler(max_concurrency=1)
+    client = Client(
+        base_url="https://wl-test.mf.gov.pl",
+        transport=MemoryTransport(
+            handler=lambda url: RawResponse(json.dumps(body).encode()), latency=0.5
+        ),
+        scheduler=scheduler,
+    )
+    token = CancellationToken()
+
+    def abandoned():
+        """Send request cancelled while waiting for the response."""
+        with client.cancellation(token):
+            client.search_nip(subject_dict["nip"], date="2001-01-01")
+
+    thread = threading.Thread(target=abandoned)
+    thread.start()
+    time.sleep(0.1)
+    token.cancel()
+    start = time.monotonic()
+    with scheduler.slot("normal"):
+        assert time.monotonic() - start < 0.2
+
+    thread.join()
+    # the abandoned request doesn't give its slot back twice
+    with scheduler.slot("normal"):
+        with pytest.raises(Cancelled):
+            with scheduler.slot("bulk", CancellationToken(timeout=0.1)):
+                pass
+
+
+def test_rate_reserve():
+    """Test that tokens reserved for other requests aren't taken."""
+    limiter = RateLimiter(rate=0.001, burst=2)
+
+    assert limiter.try_acquire(reserve=1)
+    assert not limiter.try_acquire(reserve=1)
+    assert limiter.try_acquire()
+
+
+def test_rate_reserve_without_burst():
+    """Test that reserving requests wait for capacity left unused by others."""
+    limiter = RateLimiter(rate=20, burst=1)
+
+    assert not limiter.try_acquire(reserve=1)
+    assert limiter.try_acquire()
+
+    time.sleep(0.1)
+
+    assert limiter.try_acquire(reserve=1)
+    assert not limiter.try_acquire()
+
+
+def test_client_lanes(subject_dict, nips):
+    """Test that requests are sent in the lanes of their kind."""
+
+    def handler(url):
+        """Return no subjects and negative checks."""
+        result = {"subjects": [], "accountAssigned": "NIE", "requestId": "aa111"}
+        return RawResponse(json.dumps({"result": result}).encode())
+
+    scheduler = PriorityScheduler()
+    client = Client(
+        base_url="https://wl-test.mf.gov.pl",
+        transport=MemoryTransport(handler=handler),
+        scheduler=scheduler,
+    )
+
+    client.check_nip(nips[0], "1" * 26, date="2001-01-01")
+    list(client.search_nips_bulk(nips[:40], date="2001-01-01"))
+    client.search_nips(nips[:2], date="2001-01-01")
+    with client.lane("bulk"):
+        client.search_nips(nips[2:4], date="2001-01-01")
+
+    assert scheduler.stats["interactive"].requests == 1
+    assert scheduler.stats["bulk"].requests == 3
+    assert scheduler.stats["normal"].requests == 1
+    client.check_nips_history([(nips[0], "1" * 26, "2001-01-01")])
+
+    assert scheduler.stats["bulk"].requests == 4
+
+
+def test_bulk_jobs_use_bulk_lane():
+    """Test that virtual account checks and planned searches are sent in bulk lane."""
+    records = list(generate(4, seed=0, virtual_accounts=1.0))
+    scheduler = PriorityScheduler()
+    client = Client(
+        base_url="https://wl-test.mf.gov.pl",
+        transport=MemoryTransport(handler=StubRegister(records)),
+        scheduler=scheduler,
+    )
+
+    client.check_nips_bulk([(record.nip, "1" * 26) for record in records])
+
+    assert scheduler.stats["bulk"].requests == 5
+    planner = client.plan()
+    planner.add_nip(records[0].nip)
+    planner.add_check(records[1].nip, "1" * 26)
+    planner.add_regon(records[2].regon)
+    planner.execute()
+
+    assert scheduler.stats["bulk"].requests == 8
+    assert scheduler.stats["interactive"].requests == 0
+    assert scheduler.stats["normal"].requests == 0
+
+
+def test_lanes_use_quota_priorities(tmp_path, nips):
+    """Test that bulk requests leave the quota reserve to interactive ones."""
+    coordinator = QuotaCoordinator(str(tmp_path / "quota.db"), daily_limit=2, reserve=1)
+
+    def handler(url):
+        """Return no subjects and negative checks."""
+        result = {"subjects": [], "accountAssigned": "NIE", "requestId": "aa111"}
+        return RawResponse(json.dumps({"result": result}).encode())
+
+    client = Client(
+        base_url="https://wl-test.mf.gov.pl",
+        transport=MemoryTransport(handler=handler),
+        scheduler=PriorityScheduler(),
+        quota=coordinator.limiter(),
+    )
+
+    with client.lane("bulk"):
+        client.search_nips(nips[:2], date="2001-01-01")
+        with pytest.raises(QuotaExceeded):
+            client.search_nips(nips[2:4], date="2001-01-01")
+
+    client.check_nip(nips[0], "1" * 26, date="2001-01-01")
+    assert coordinator.remaining == 0
@@ -0,0 +1,97 @@
+"""Test mmap cache module."""
+import datetime
+import subprocess
+import sys
+import threading
+
+import pytest
+from freezegun import freeze_time
+
+from vater.mmap_cache import MmapCache
+
+SAMPLE_KEY = ("/api/search/nip", "0" * 10, "2001-01-01")
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    """Return path of the cache file."""
+    return str(tmp_path / "vater.cache")
+
+
+def test_entries_are_shared(cache_path):
+    """Test that entries stored by one instance are read by another."""
+    writer = MmapCache(cache_path, slots=16, data_size=1024)
+    reader = MmapCache(cache_path)
+
+    writer.set(SAMPLE_KEY, b'{"result": {}}')
+    writer.set(SAMPLE_KEY, b'{"result": {"subject": null}}')
+
+    assert reader.get(SAMPLE_KEY) == b'{"result": {"subject": null}}'
+    assert bytes(reader.get_view(SAMPLE_KEY)) == b'{"result": {"subject": null}}'
+    assert reader.get(("/api/search/nip", "1" * 10, "2001-01-01")) is None
+
+
+def test_concurrent_sets(cache_path):
+    """Test that entries stored from many threads of the process aren't lost."""
+    cache = MmapCache(cache_path, slots=65536, data_size=8 * 1024 * 1024)
+
+    def store(thread):
+        """Store entries with distinct keys."""
+        for number in range(3000):
+            cache.set(("/api/search/nip", str(thread), str(number)), b"%d" % number)
+
+    threads = [threading.Thread(target=store, args=(thread,)) for thread in range(8)]
+    interval = sys.getswitchinterval()
+    # switch threads often so the writes interleave
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    for thread in range(8):
+        for number in range(3000):
+            key = ("/api/search/nip", str(thread), str(number))
+            assert cache.get(key) == b"%d" % number
+
+
+def test_entries_are_shared_between_processes(cache_path):
+    """Test that entries stored by another process are read."""
+    code = (
+        "from vater.mmap_cache import MmapCache;"
+        f"MmapCache({cache_path!r}).set({SAMPLE_KEY!r}, b'value')"
+    )
+    subprocess.run(
+        [sys.executable, "-c", code],
+        env={"PYTHONPATH": ":".join(sys.path)},
+        check=True,
+    )
+
+    assert MmapCache(cache_path).get(SAMPLE_KEY) == b"value"
+
+
+def test_entries_expire_at_refresh(cache_path):
+    """Test that all entries are invalidated at the register refresh."""
+    with freeze_time("2001-01-01 05:00:00"):
+        cache = MmapCache(cache_path, refresh_time=datetime.time(6))
+        cache.set(SAMPLE_KEY, b"value")
+
+        assert cache.get(SAMPLE_KEY) == b"value"
+
+    with freeze_time("2001-01-01 06:00:01"):
+        assert cache.get(SAMPLE_KEY) is None
+
+
+def test_full_table_is_cleared(cache_path):
+    """Test that table is cleared when the data area is full."""
+    cache = MmapCache(cache_path, slots=16, data_size=100)
+    keys = [("/api/search/nip", str(number) * 10, "2001-01-01") for number in range(3)]
+
+    for key in keys:
+        cache.set(key, b"x" * 30)
+
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) == b"x" * 30
@@ -0,0 +1,121 @@
+"""Test negative cache module."""
+import pytest
+import responses
+from freezegun import freeze_time
+
+from vater.client import Client
+from vater.errors import InvalidRequestData
+from vater.negative_cache import BloomFilter, NegativeCache, NegativeEntry
+
+SAMPLE_NIP = "0" * 10
+SAMPLE_DATE = "2001-01-01"
+SEARCH_URL = "https://wl-test.mf.gov.pl/api/search/{endpoint}?date=2001-01-01"
+
+
+@pytest.fixture
+def client():
+    """Return client with a negative cache."""
+    return Client(base_url="https://wl-test.mf.gov.pl", negative_cache=NegativeCache())
+
+
+def test_entries_expire_and_are_evicted():
+    """Test that entries are kept for the ttl and up to the maximal number."""
+    cache = NegativeCache(ttl=60, max_entries=2)
+
+    with freeze_time("2001-01-01 12:00:00") as frozen_time:
+        cache.add_absent("a", SAMPLE_DATE, "r1")
+        cache.add("b", SAMPLE_DATE, InvalidRequestData("NIP is invalid.", "WL-115"))
+        assert cache.get("a", SAMPLE_DATE) == NegativeEntry("r1", None)
+        assert cache.get("b", SAMPLE_DATE).error.code == "WL-115"
+        assert cache.get("a", "2001-01-02") is None
+
+        cache.add_absent("c", SAMPLE_DATE, "r2")
+        assert len(cache) == 2
+        assert cache.get("a", SAMPLE_DATE) is None
+
+        frozen_time.tick(61)
+        assert cache.get("c", SAMPLE_DATE) is None
+
+
+def test_evicted_misses_are_kept_in_bloom_filter():
+    """Test that misses evicted from the dictionary are answered by the filter."""
+    cache = NegativeCache(max_entries=1, bloom_capacity=100)
+
+    for value in ("a", "b", "c"):
+        cache.add_absent(value, SAMPLE_DATE, "r1")
+
+    assert len(cache) == 1
+    assert cache.get("a", SAMPLE_DATE) == NegativeEntry(None, None)
+    assert cache.get("d", SAMPLE_DATE) is None
+
+
+def test_bloom_filter_error_rate():
+    """Test that the filter has no false negatives and few false positives."""
+    bloom = BloomFilter(1000, error_rate=0.01)
+
+    for value in range(1000):
+        bloom.add(str(value))
+
+    assert all(str(value) in bloom for value in range(1000))
+    assert sum(str(value) in bloom for value in range(1000, 11000)) < 200
+
+
+@responses.activate
+def test_absent_subject_is_not_searched_again(client):
+    """Test that missing subject is answered from the negative cache."""
+    responses.add(
+        responses.GET,
+        SEARCH_URL.format(endpoint=f"nip/{SAMPLE_NIP}"),
+        status=200,
+        json={"result": {"subject": None, "requestId": "aa111-aa111aaa"}},
+        content_type="application/json",
+    )
+
+    assert client.search_nip(SAMPLE_NIP, date=SAMPLE_DATE) == (None, "aa111-aa111aaa")
+    result = client.search_nip(SAMPLE_NIP, date=SAMPLE_DATE)
+    assert result == (None, "aa111-aa111aaa")
+    assert result.from_cache
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_rejected_identifier_is_not_searched_again(client):
+    """Test that identifier rejected by the API is rejected from the cache."""
+    responses.add(
+        responses.GET,
+        SEARCH_URL.format(endpoint=f"nip/{SAMPLE_NIP}"),
+        status=400,
+        json={"code": "WL-115"},
+        content_type="application/json",
+    )
+
+    for _ in range(2):
+        with pytest.raises(InvalidRequestData):
+            client.search_nip(SAMPLE_NIP, date=SAMPLE_DATE)
+
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_known_misses_are_left_out_of_search(client, subject_dict, nips):
+    """Test that only identifiers not known to be missing are searched."""
+    for batch in ([SAMPLE_NIP, nips[0]], [SAMPLE_NIP, nips[1]]):
+        responses.add(
+            responses.GET,
+            SEARCH_URL.format(endpoint=f"nips/{','.join(batch)}"),
+            status=200,
+            json={"result": {"subjects": [subject_dict], "requestId": batch[1]}},
+            content_type="application/json",
+        )
+
+    client.search_nips([SAMPLE_NIP, nips[0]], date=SAMPLE_DATE)
+    result = client.search_nips([SAMPLE_NIP, nips[0], nips[1]], date=SAMPLE_DATE)
+
+    assert result.request_id == nips[1]
+    assert result.by_input[nips[0]] is None
+    assert result.missing == [nips[0], nips[1]]
+    assert client.search_nips([nips[0], nips[1]], date=SAMPLE_DATE) == (
+        [],
+        nips[0],
+    )
+    assert len(responses.calls) == 2
@@ -0,0 +1,70 @@
+"""Test planner module."""
+import json
+import re
+
+from vater.client import Client
+from vater.request_types import RawResponse
+from vater.transports import MemoryTransport
+
+SAMPLE_DATE = "2001-01-01"
+ACCOUNT = "1" * 26
+
+
+def make_client(subject_dict):
+    """Return client answering searches with subjects having the searched values."""
+
+    def handler(url):
+        """Return subject for every searched nip or regon, none for accounts."""
+        kind, values = re.search(r"search/([\w-]+)/([\d,]+)", url).groups()
+        field = {"nips": "nip", "regons": "regon"}.get(kind)
+        subjects = [
+            {**subject_dict, field: value} for value in values.split(",") if field
+        ]
+        body = {"result": {"subjects": subjects, "requestId": f"{kind}-{values}"}}
+        return RawResponse(json.dumps(body).encode())
+
+    transport = MemoryTransport(handler=handler)
+    return Client(base_url="https://wl-test.mf.gov.pl", transport=transport)
+
+
+def test_plan_merges_lookups(subject_dict, nips):
+    """Test that checks are merged into nip searches and batches are filled."""
+    client = make_client(subject_dict)
+    plan = client.plan()
+
+    for nip in nips[:20]:
+        plan.add_nip(nip, date=SAMPLE_DATE)
+        plan.add_check(nip, ACCOUNT, date=SAMPLE_DATE)
+    for nip in nips[20:35]:
+        plan.add_check(nip, "2" * 26, date=SAMPLE_DATE)
+    plan.add_regon("000000000", date=SAMPLE_DATE)
+    plan.add_account(ACCOUNT, date=SAMPLE_DATE)
+
+    assert plan.naive_requests == 57
+    assert plan.planned_requests == 4
+    assert "4 requests planned instead of 57" in plan.explain()
+
+    results = plan.execute()
+
+    assert len(client.transport.requests) == 4
+    assert results[0].value.nip == nips[0]
+    assert results[1] == (True, f"nips-{','.join(nips[:30])}")
+    assert results[40].value is False
+    assert results[55].value.regon == "000000000"
+    assert results[56].value == []
+
+
+def test_plan_groups_by_date(subject_dict, nips):
+    """Test that lookups of different dates are searched separately."""
+    client = make_client(subject_dict)
+    plan = client.plan()
+    plan.add_nip(nips[0], date="2001-01-01")
+    plan.add_nip(nips[0], date="2001-01-02")
+    plan.add_check(nips[0], ACCOUNT, date="2001-01-02")
+
+    assert [batch.date for batch in plan.batches()] == ["2001-01-01", "2001-01-02"]
+    assert [result.date for result in plan.execute()] == [
+        "2001-01-01",
+        "2001-01-02",
+        "2001-01-02",
+    ]
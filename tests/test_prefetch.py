@@ -0,0 +1,104 @@
+"""Test prefetch module."""
+import datetime
+import json
+
+import pytest
+import responses
+
+from vater.cache import MemoryCache
+from vater.client import Client
+from vater.errors import UnknownExternalApiError
+from vater.index import AccountIndex
+from vater.prefetch import PrefetchScheduler, split_batch
+
+SAMPLE_NIP = "0" * 10
+OTHER_NIP = "1" * 10
+SAMPLE_ACCOUNT = "1" * 26
+NIPS_URL = (
+    f"https://wl-test.mf.gov.pl/api/search/nips/{SAMPLE_NIP},{OTHER_NIP}"
+    "?date=2001-01-01"
+)
+
+
+def test_split_batch(subject_dict):
+    """Test that batch response is split into single value responses."""
+    content = json.dumps(
+        {"result": {"subjects": [subject_dict], "requestId": "aa111-aa111aaa"}}
+    ).encode()
+
+    nips = dict(split_batch(content, "nips", [SAMPLE_NIP, OTHER_NIP]))
+    accounts = dict(split_batch(content, "accounts", [SAMPLE_ACCOUNT, "2" * 26]))
+
+    assert json.loads(nips[SAMPLE_NIP])["result"]["subject"] == subject_dict
+    assert json.loads(nips[OTHER_NIP])["result"]["subject"] is None
+    assert json.loads(accounts[SAMPLE_ACCOUNT])["result"]["subjects"] == [subject_dict]
+    assert "2" * 26 not in accounts
+
+
+@responses.activate
+def test_prefetch_populates_cache_and_index(subject_dict):
+    """Test that prefetched subjects are answered without requests."""
+    client = Client(
+        base_url="https://wl-test.mf.gov.pl", cache=MemoryCache(), index=AccountIndex()
+    )
+    responses.add(
+        responses.GET,
+        NIPS_URL,
+        status=200,
+        json={"result": {"subjects": [subject_dict], "requestId": "aa111-aa111aaa"}},
+        content_type="application/json",
+    )
+    progress = []
+
+    job = client.prefetch(
+        nips=[OTHER_NIP, SAMPLE_NIP, "PL 000-000-00-00"],
+        date="2001-01-01",
+        on_progress=lambda job: progress.append(job.progress),
+    )
+
+    assert job.wait(5)
+    assert (job.total, job.completed, job.loaded, job.errors) == (1, 1, 2, [])
+    assert progress == [1.0]
+
+    subject, request_id = client.search_nip(SAMPLE_NIP, date="2001-01-01")
+    assert (subject.nip, request_id) == (SAMPLE_NIP, "aa111-aa111aaa")
+    assert client.search_nip(OTHER_NIP, date="2001-01-01") == (None, "aa111-aa111aaa")
+    assert client.check_nip(SAMPLE_NIP, SAMPLE_ACCOUNT, date="2001-01-01") == (
+        True,
+        "aa111-aa111aaa",
+    )
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_prefetch_records_errors():
+    """Test that failed batches are recorded and don't stop the job."""
+    client = Client(base_url="https://wl-test.mf.gov.pl", cache=MemoryCache())
+    responses.add(responses.GET, NIPS_URL, status=500)
+
+    job = client.prefetch(nips=[SAMPLE_NIP, OTHER_NIP], date="2001-01-01")
+
+    assert job.wait(5)
+    assert job.errors[0][0] == [SAMPLE_NIP, OTHER_NIP]
+    assert isinstance(job.errors[0][1], UnknownExternalApiError)
+
+
+def test_prefetch_requires_cache_or_index():
+    """Test that error is raised if there is nowhere to store the results."""
+    with pytest.raises(ValueError):
+        Client(base_url="https://wl-test.mf.gov.pl").prefetch(nips=[SAMPLE_NIP])
+
+
+def test_scheduler_runs_after_refresh():
+    """Test that prefetch is scheduled the given delay after the next refresh."""
+    scheduler = PrefetchScheduler(
+        Client(base_url="https://wl-test.mf.gov.pl", cache=MemoryCache()),
+        delay=datetime.timedelta(minutes=5),
+        nips=[SAMPLE_NIP],
+    )
+
+    before_run = scheduler.next_run(datetime.datetime(2001, 1, 1, 0, 3))
+    after_run = scheduler.next_run(datetime.datetime(2001, 1, 1, 0, 6))
+
+    assert before_run == datetime.datetime(2001, 1, 1, 0, 5).timestamp()
+    assert after_run == datetime.datetime(2001, 1, 2, 0, 5).timestamp()
@@ -0,0 +1,81 @@
+"""Test quota module."""
+
+import multiprocessing
+
+import pytest
+
+from vater.client import Client
+from vater.errors import QuotaExceeded
+from vater.quota import QuotaCoordinator
+from vater.transports import MemoryTransport
+
+SAMPLE_NIP = "0" * 10
+NIP_URL = f"https://wl-test.mf.gov.pl/api/search/nip/{SAMPLE_NIP}?date=2001-01-01"
+
+
+def acquire_in_process(path, count):
+    """Take tokens from the quota in a separate process."""
+    limiter = QuotaCoordinator(path, daily_limit=100).limiter()
+    for _ in range(count):
+        limiter.acquire()
+
+
+def test_quota_is_shared_by_processes(tmp_path):
+    """Test that requests of all processes count against the same budget."""
+    path = str(tmp_path / "quota.db")
+    processes = [
+        multiprocessing.Process(target=acquire_in_process, args=(path, 5))
+        for _ in range(3)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    coordinator = QuotaCoordinator(path, daily_limit=100)
+    assert coordinator.used == 15
+    assert coordinator.remaining == 85
+
+
+def test_batch_uses_left_over_capacity(tmp_path):
+    """Test that batch jobs leave the reserve and bucket headroom."""
+    path = str(tmp_path / "quota.db")
+    coordinator = QuotaCoordinator(path, daily_limit=5, rate=1, burst=4, reserve=2)
+    interactive = coordinator.limiter()
+    batch = QuotaCoordinator(path, daily_limit=5, rate=1, burst=4, reserve=2).limiter(
+        "batch"
+    )
+
+    assert batch.try_acquire(2)
+    assert not batch.try_acquire()
+    assert coordinator.take(1, "batch") > 0
+    assert interactive.try_acquire(2)
+    assert batch.remaining == 0
+    assert interactive.remaining == 1
+
+    with pytest.raises(QuotaExceeded):
+        coordinator.take(1, "batch")
+
+    with pytest.raises(ValueError):
+        coordinator.limiter("urgent")
+
+
+def test_client_stops_at_daily_limit(tmp_path):
+    """Test that client requests take tokens from the quota."""
+    transport = MemoryTransport()
+    transport.add(
+        NIP_URL, b'{"result": {"subject": null, "requestId": "aa111-aa111aaa"}}'
+    )
+    quota = QuotaCoordinator(str(tmp_path / "quota.db"), daily_limit=2)
+    client = Client(
+        base_url="https://wl-test.mf.gov.pl", transport=transport, quota=quota.limiter()
+    )
+
+    client.search_nip(SAMPLE_NIP, date="2001-01-01")
+    client.search_nip(SAMPLE_NIP, date="2001-01-01")
+
+    with pytest.raises(QuotaExceeded):
+        client.search_nip(SAMPLE_NIP, date="2001-01-01")
+
+    assert len(transport.requests) == 2
+    assert quota.remaining == 0
@@ -0,0 +1,120 @@
+"""Test results module."""
+import pickle
+
+import pytest
+import responses
+
+from vater.cache import MemoryCache
+from vater.client import Client
+from vater.models import SubjectSchema
+from vater.results import Result, match_inputs
+
+SAMPLE_NIP = "0" * 10
+OTHER_NIP = "1" * 10
+NIPS_URL = "https://wl-test.mf.gov.pl/api/search/nips/{nips}?date=2001-01-01"
+
+
+@pytest.fixture
+def subject(subject_dict):
+    """Return subject loaded from the minimal subject json."""
+    return SubjectSchema().load(subject_dict)
+
+
+def test_result_is_tuple_compatible():
+    """Test that result unpacks, indexes and compares like a tuple."""
+    result = Result(True, "aa111-aa111aaa")
+
+    value, request_id = result
+    assert (value, request_id) == (True, "aa111-aa111aaa")
+    assert result == (True, "aa111-aa111aaa")
+    assert result[0] is True and result[-1] == "aa111-aa111aaa"
+    assert len(result) == 2
+    assert result.batch_ids == ["aa111-aa111aaa"]
+
+
+def test_match_inputs(subject):
+    """Test that searched values are mapped to their subjects."""
+    assert match_inputs([subject], [SAMPLE_NIP, OTHER_NIP], "nips") == {
+        SAMPLE_NIP: subject,
+        OTHER_NIP: None,
+    }
+    assert match_inputs([subject], ["1" * 26, "2" * 26], "accounts") == {
+        "1" * 26: [subject],
+        "2" * 26: [],
+    }
+
+
+@responses.activate
+def test_search_result_metadata(subject_dict):
+    """Test that missing values are reported and cached results are flagged."""
+    client = Client(base_url="https://wl-test.mf.gov.pl", cache=MemoryCache())
+    responses.add(
+        responses.GET,
+        NIPS_URL.format(nips=f"{SAMPLE_NIP},{OTHER_NIP}"),
+        status=200,
+        json={"result": {"subjects": [subject_dict], "requestId": "aa111-aa111aaa"}},
+        content_type="application/json",
+    )
+
+    result = client.search_nips([SAMPLE_NIP, OTHER_NIP], date="2001-01-01")
+    assert result.missing == [OTHER_NIP]
+    assert result.by_input[SAMPLE_NIP].nip == SAMPLE_NIP
+    assert result.date == "2001-01-01"
+    assert not result.from_cache and result.latency >= 0
+
+    cached = client.search_nips([SAMPLE_NIP, OTHER_NIP], date="2001-01-01")
+    assert cached.from_cache
+    assert cached == result
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_bulk_results(client, subject_dict):
+    """Test that bulk results map batch values and keep their request ids."""
+    responses.add(
+        responses.GET,
+        NIPS_URL.format(nips=SAMPLE_NIP),
+        status=200,
+        json={"result": {"subjects": [subject_dict], "requestId": "aa111-aa111aaa"}},
+        content_type="application/json",
+    )
+
+    (result,) = client.search_nips_bulk([SAMPLE_NIP], date="2001-01-01")
+    assert result.batch_ids == ["aa111-aa111aaa"]
+    assert list(result.by_input) == [SAMPLE_NIP]
+
+    check = client.check_nips_bulk([(SAMPLE_NIP, "1" * 26)], date="2001-01-01")
+    assert check == [(True, "aa111-aa111aaa")]
+    assert check[0].by_input == {SAMPLE_NIP: True}
+
+
+def test_result_pickles(subject):
+    """Test that result with its metadata survives pickling."""
+    result = Result(
+        [subject], "aa111-aa111aaa", by_input={SAMPLE_NIP: subject}, stale=True
+    )
+
+    loaded = pickle.loads(pickle.dumps(result))
+    assert loaded == result
+    assert loaded.stale and loaded.by_input == {SAMPLE_NIP: subject}
+
+
+@responses.activate
+def test_search_results_fan_out(client, subject_dict):
+    """Test that duplicates are searched once and mapped to every position."""
+    responses.add(
+        responses.GET,
+        NIPS_URL.format(nips=f"{SAMPLE_NIP},{OTHER_NIP}"),
+        status=200,
+        json={"result": {"subjects": [subject_dict], "requestId": "aa111-aa111aaa"}},
+        content_type="application/json",
+    )
+
+    result = client.search_nips(
+        [SAMPLE_NIP, OTHER_NIP, "PL 000-000-00-00"] * 11, date="2001-01-01"
+    )
+    subject = result.by_input[SAMPLE_NIP]
+    assert result.inputs == [SAMPLE_NIP, OTHER_NIP, SAMPLE_NIP] * 11
+    assert result.per_input == [subject, None, subject] * 11
+    assert client.dedup_stats.duplicates == 31
+    assert client.dedup_stats.requests_saved == 1
@@ -0,0 +1,175 @@
+"""Test serve module."""
+import threading
+
+import pytest
+import requests
+import responses
+from click.testing import CliRunner
+
+from vater.cache import MemoryCache
+from vater.cli import cli
+from vater.client import Client
+from vater.daemon import find_daemon, remove_state, write_state
+from vater.errors import ERROR_CODE_MAPPING, ApiUnavailable, InvalidRequestData
+from vater.request_types import RawResponse
+from vater.serve import Coalescer, Daemon, build_routes
+from vater.transports import MemoryTransport
+
+SAMPLE_NIP = "0" * 10
+SAMPLE_DATE = "2001-01-01"
+NIP_URL = f"https://wl-test.mf.gov.pl/api/search/nip/{SAMPLE_NIP}?date={SAMPLE_DATE}"
+
+
+@pytest.fixture
+def daemon():
+    """Yield running daemon sending requests to the test API."""
+    daemon = Daemon(Client(base_url="https://wl-test.mf.gov.pl", cache=MemoryCache()))
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+
+    yield daemon
+
+    daemon.shutdown()
+    daemon.server_close()
+
+
+@pytest.fixture
+def state_file(tmp_path, monkeypatch):
+    """Use temporary daemon state file."""
+    monkeypatch.setenv("VATER_DAEMON_FILE", str(tmp_path / "daemon.json"))
+
+
+@responses.activate
+def test_daemon_proxies_client_methods(daemon, subject_dict):
+    """Test that client using the daemon gets cached API results."""
+    responses.add_passthru(daemon.url)
+    responses.add(
+        responses.GET,
+        NIP_URL,
+        status=200,
+        json={"result": {"subject": subject_dict, "requestId": "aa111-aa111aaa"}},
+        content_type="application/json",
+    )
+    client = Client(base_url=daemon.url)
+
+    for _ in range(2):
+        subject, request_id = client.search_nip(SAMPLE_NIP, date=SAMPLE_DATE)
+        assert subject.nip == SAMPLE_NIP
+        assert request_id == "aa111-aa111aaa"
+
+    assert len([call for call in responses.calls if "wl-test" in call.request.url]) == 1
+
+
+@responses.activate
+def test_daemon_forwards_api_errors(daemon):
+    """Test that API errors are raised by the client using the daemon."""
+    responses.add_passthru(daemon.url)
+    responses.add(
+        responses.GET,
+        NIP_URL,
+        status=400,
+        json={"code": "WL-113", "message": "Message from the server"},
+        content_type="application/json",
+    )
+
+    with pytest.raises(InvalidRequestData, match=ERROR_CODE_MAPPING["WL-113"]):
+        Client(base_url=daemon.url).search_nip(SAMPLE_NIP, date=SAMPLE_DATE)
+
+
+def test_routes_of_client_with_custom_transport():
+    """Test that routes are built without the requests session of the client."""
+    client = Client(base_url="https://wl-test.mf.gov.pl", transport=MemoryTransport())
+    methods = {method.__name__ for _, method, _ in build_routes(client)}
+
+    assert {"search_nip", "search_nips", "check_nip"} <= methods
+
+
+def test_coalescer_shares_in_flight_call():
+    """Test that concurrent callers with the same key get the single call result."""
+    coalescer = Coalescer()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def function():
+        """Wait until released."""
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "result"
+
+    results = []
+
+    def call():
+        """Call the function through the coalescer."""
+        results.append(coalescer.call("key", function))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    # give the follower time to wait for the in-flight call
+    threading.Timer(0.2, release.set).start()
+    leader.join()
+    follower.join()
+
+    assert results == ["result", "result"]
+    assert len(calls) == 1
+
+
+@responses.activate
+def test_daemon_answers_upstream_failures(daemon):
+    """Test that requests the daemon couldn't send raise ApiUnavailable."""
+    responses.add_passthru(daemon.url)
+    responses.add(responses.GET, NIP_URL, body=requests.ConnectionError("refused"))
+
+    with pytest.raises(ApiUnavailable):
+        Client(base_url=daemon.url).search_nip(SAMPLE_NIP, date=SAMPLE_DATE)
+
+
+def test_find_daemon(state_file, daemon):
+    """Test that the daemon is found only for the API it sends requests to."""
+    assert find_daemon("https://wl-test.mf.gov.pl") is None
+
+    write_state(daemon.url, "https://wl-test.mf.gov.pl/", daemon.token)
+
+    assert find_daemon("https://wl-test.mf.gov.pl") == daemon.url
+    assert find_daemon("https://wl-api.mf.gov.pl") is None
+
+    remove_state()
+
+    assert find_daemon("https://wl-test.mf.gov.pl") is None
+
+
+def test_stale_state_is_ignored(state_file, daemon):
+    """Test that daemons which don't answer the ping aren't used."""
+    url = daemon.url
+    write_state(url, "https://wl-test.mf.gov.pl", "other token")
+
+    assert find_daemon("https://wl-test.mf.gov.pl") is None
+
+    daemon.shutdown()
+    daemon.server_close()
+    write_state(url, "https://wl-test.mf.gov.pl", daemon.token)
+
+    assert find_daemon("https://wl-test.mf.gov.pl") is None
+
+
+def test_cli_uses_daemon(state_file, daemon, monkeypatch):
+    """Test that CLI client sends requests to the running daemon."""
+    write_state(daemon.url, "https://wl-api.mf.gov.pl", daemon.token)
+    monkeypatch.setattr(
+        Client,
+        "search_nip",
+        lambda client, **kwargs: RawResponse(client.base_url.encode()),
+    )
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["search-nip", SAMPLE_NIP])
+    no_daemon_result = runner.invoke(cli, ["--no-daemon", "search-nip", SAMPLE_NIP])
+    write_state(daemon.url, "https://wl-api.mf.gov.pl", "other token")
+    stale_result = runner.invoke(cli, ["search-nip", SAMPLE_NIP])
+
+    assert result.output == f"{daemon.url}\n"
+    assert no_daemon_result.output == "https://wl-api.mf.gov.pl\n"
+    assert stale_result.output == "https://wl-api.mf.gov.pl\n"
@@ -0,0 +1,101 @@
+"""Test testing module."""
+import io
+import json
+
+from click.testing import CliRunner
+
+from vater import Client
+from vater.cli import cli
+from vater.errors import ValidationError
+from vater.testing import StubRegister, account_checksum_valid, generate, write_dataset
+from vater.transports import MemoryTransport
+from vater.validators import nip_validator, regon_validator
+
+
+def is_valid(validator, value):
+    """Check if the validator accepts the value."""
+    try:
+        validator(value)
+    except ValidationError:
+        return False
+
+    return True
+
+
+def test_generated_identifiers_match_validators():
+    """Test that valid records pass the validators and invalid ones don't."""
+    records = list(generate(2000, seed=1, invalid=0.2, long_regons=0.5))
+    valid = [record for record in records if record.valid]
+
+    assert 300 < len(records) - len(valid) < 500
+    for record in records:
+        assert is_valid(nip_validator, record.nip) is record.valid
+        assert is_valid(regon_validator, record.regon) is record.valid
+        assert len(record.regon) in (9, 14)
+        for account in record.accounts:
+            assert len(account) == 26
+            assert account_checksum_valid(account) is record.valid
+
+    assert all(record.subject["nip"] == record.nip for record in valid)
+
+
+def test_generate_is_reproducible_with_duplicates():
+    """Test that the seed fixes the dataset and duplicates repeat records."""
+    records = list(generate(1000, seed=2, duplicates=0.3, virtual_accounts=0.5))
+
+    assert records == list(generate(1000, seed=2, duplicates=0.3, virtual_accounts=0.5))
+    assert 200 < 1000 - len({record.nip for record in records}) < 400
+    virtual = [record.subject["hasVirtualAccounts"] for record in records]
+    assert 0.3 < sum(virtual) / len(virtual) < 0.7
+
+
+def test_write_dataset():
+    """Test that records and identifiers are written one per line."""
+    records = list(generate(10, seed=3))
+    file = io.StringIO()
+
+    assert write_dataset(records, file) == 10
+    assert [json.loads(line)["nip"] for line in file.getvalue().splitlines()] == [
+        record.nip for record in records
+    ]
+
+    file = io.StringIO()
+    lines = write_dataset(records, file, "accounts")
+    assert lines == sum(len(record.accounts) for record in records)
+
+
+def test_stub_register_feeds_client():
+    """Test that the client gets generated subjects from the stub API."""
+    records = list(generate(20, seed=4, invalid=0.2))
+    transport = MemoryTransport(handler=StubRegister(records))
+    client = Client(base_url="https://wl-test.mf.gov.pl", transport=transport)
+    valid = [record for record in records if record.valid]
+
+    subjects, _ = client.search_nips([record.nip for record in valid[:5]])
+    assert [subject.nip for subject in subjects] == [record.nip for record in valid[:5]]
+
+    subject, _ = client.search_regon(valid[0].regon)
+    assert subject.account_numbers == valid[0].accounts
+
+    subjects, _ = client.search_account(valid[3].accounts[0])
+    assert [subject.nip for subject in subjects] == [valid[3].nip]
+
+    assigned, _ = client.check_nip(valid[1].nip, valid[1].accounts[0])
+    assert assigned is True
+    assigned, _ = client.check_nip(valid[1].nip, valid[2].accounts[0])
+    assert assigned is False
+
+
+def test_generate_command(tmp_path):
+    """Test that the command streams the dataset to the file."""
+    path = tmp_path / "nips.txt"
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli, ["generate", "50", "--format", "nips", "--seed", "5", "-o", str(path)]
+    )
+
+    assert result.exit_code == 0
+    assert path.read_text().splitlines() == [
+        record.nip for record in generate(50, seed=5)
+    ]
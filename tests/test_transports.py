@@ -0,0 +1,237 @@
+"""Test transports module."""
+
+import asyncio
+import importlib.util
+import socket
+import threading
+import time
+
+import pytest
+
+from vater.circuit_breaker import CircuitBreaker
+from vater.client import Client
+from vater.errors import UnknownExternalApiError
+from vater.serve import Daemon
+from vater.testing import StubRegister, generate
+from vater.transports import (
+    AiohttpTransport,
+    HttpxTransport,
+    MemoryTransport,
+    RecordingTransport,
+    ReplayTransport,
+    load_cassette,
+)
+
+SAMPLE_NIP = "0" * 10
+NIP_URL = f"https://wl-test.mf.gov.pl/api/search/nip/{SAMPLE_NIP}?date=2001-01-01"
+
+
+def test_memory_transport():
+    """Test that client gets responses from memory."""
+    transport = MemoryTransport()
+    transport.add(
+        NIP_URL, b'{"result": {"subject": null, "requestId": "aa111-aa111aaa"}}'
+    )
+    client = Client(base_url="https://wl-test.mf.gov.pl", transport=transport)
+
+    assert client.search_nip(SAMPLE_NIP, date="2001-01-01") == (None, "aa111-aa111aaa")
+    assert transport.requests == [NIP_URL]
+
+    with pytest.raises(UnknownExternalApiError):
+        client.search_nip(SAMPLE_NIP, date="2001-01-02")
+
+
+def test_connection_errors_are_outages():
+    """Test that connection errors raised by the transport are counted as failures."""
+
+    def handler(url):
+        """Fail to connect."""
+        raise ConnectionError(url)
+
+    breaker = CircuitBreaker()
+    client = Client(
+        base_url="https://wl-test.mf.gov.pl",
+        transport=MemoryTransport(handler=handler),
+        circuit_breaker=breaker,
+    )
+
+    with pytest.raises(ConnectionError):
+        client.search_nip(SAMPLE_NIP, date="2001-01-01")
+
+    assert breaker.failures == 1
+
+
+@pytest.mark.parametrize(
+    "transport_class, module",
+    ((HttpxTransport, "httpx"), (AiohttpTransport, "aiohttp")),
+)
+def test_missing_optional_dependency(transport_class, module):
+    """Test that error with the install hint is raised without the dependency."""
+    if importlib.util.find_spec(module) is not None:
+        pytest.skip(f"{module} is installed")
+
+    with pytest.raises(ImportError, match=f"vater\\[{module}\\]"):
+        transport_class()
+
+
+@pytest.fixture
+def register():
+    """Return stub API answering with generated subjects."""
+    return StubRegister(generate(1, seed=0))
+
+
+@pytest.fixture
+def daemon(register):
+    """Yield HTTP server answering API requests from the stub register."""
+    client = Client(
+        base_url="https://wl-test.mf.gov.pl",
+        transport=MemoryTransport(handler=register),
+    )
+    daemon = Daemon(client)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+
+    yield daemon
+
+    daemon.shutdown()
+    daemon.server_close()
+
+
+def closed_port_url():
+    """Get url of a local port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    return f"http://127.0.0.1:{port}"
+
+
+def test_httpx_transport(register):
+    """Test that httpx responses and errors are mapped by the transport."""
+    httpx = pytest.importorskip("httpx")
+    requests = []
+
+    def handler(request):
+        """Answer from the stub register, fail to connect to other hosts."""
+        requests.append(request)
+        if request.url.host != "wl-test.mf.gov.pl":
+            raise httpx.ConnectError("connection refused", request=request)
+
+        response = register(str(request.url))
+        return httpx.Response(
+            response.status_code,
+            content=response.content,
+            headers={"Content-Type": "application/json", "X-Test": "1"},
+        )
+
+    transport = HttpxTransport(timeout=5)
+    transport.client.close()
+    transport.client = httpx.Client(transport=httpx.MockTransport(handler))
+    nip = next(iter(register.subjects["nip"]))
+
+    response = transport.get("https://wl-test.mf.gov.pl/api/unknown", timeout=1)
+    assert response.status_code == 404
+    assert response.headers["x-test"] == "1"
+    assert requests[-1].extensions["timeout"]["read"] == 1
+
+    client = Client(base_url="https://wl-test.mf.gov.pl", transport=transport)
+    subject, request_id = client.search_nip(nip, date="2001-01-01")
+    assert subject.nip == nip
+    assert request_id == "aa111-aa111aaa"
+    assert requests[-1].extensions["timeout"]["read"] == 5
+
+    with pytest.raises(OSError, match="connection refused"):
+        transport.get("https://example.com/api/search/nip/0")
+
+    transport.close()
+    assert transport.client.is_closed
+
+
+def test_aiohttp_transport(daemon, register):
+    """Test that aiohttp responses and errors are mapped by the transport."""
+    pytest.importorskip("aiohttp")
+    transport = AiohttpTransport(timeout=5)
+    nip = next(iter(register.subjects["nip"]))
+
+    response = transport.get(f"{daemon.url}/vater/ping", timeout=1)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/plain"
+    assert response.text == daemon.token
+
+    response = transport.get(f"{daemon.url}/api/unknown")
+    assert response.status_code == 404
+    assert response.headers["Content-Length"] == str(len(response.content))
+
+    client = Client(base_url=daemon.url, transport=transport)
+    subject, request_id = client.search_nip(nip, date="2001-01-01")
+    assert subject.nip == nip
+    assert request_id == "aa111-aa111aaa"
+
+    response = asyncio.run_coroutine_threadsafe(
+        transport.aget(f"{daemon.url}/vater/ping"), transport.loop
+    ).result(5)
+    assert response.text == daemon.token
+
+    with pytest.raises(OSError):
+        transport.get(closed_port_url())
+
+    transport.close()
+    assert transport.session.closed
+    deadline = time.monotonic() + 2
+    while transport.loop.is_running() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not transport.loop.is_running()
+
+
+def test_record_and_replay(tmp_path):
+    """Test that recorded responses are replayed in order."""
+    path = str(tmp_path / "cassette.json.gz")
+    memory = MemoryTransport(latency=0.05)
+    memory.add(NIP_URL, b'{"result": {"subject": null, "requestId": "aa111-aa111aaa"}}')
+    memory.add(f"{NIP_URL}2", b"\xff", 502)
+    recording = RecordingTransport(memory, path)
+    client = Client(base_url="https://wl-test.mf.gov.pl", transport=recording)
+
+    expected = client.search_nip(SAMPLE_NIP, date="2001-01-01")
+    memory.add(NIP_URL, b'{"result": {"subject": null, "requestId": "bb222-bb222bbb"}}')
+    client.search_nip(SAMPLE_NIP, date="2001-01-01")
+    recording.get(f"{NIP_URL}2")
+    recording.close()
+
+    interactions = load_cassette(path)
+    assert [interaction.status_code for interaction in interactions] == [200, 200, 502]
+    assert interactions[2].content == b"\xff"
+    assert interactions[0].latency >= 0.05
+
+    replay = ReplayTransport(path)
+    client = Client(base_url="https://wl-test.mf.gov.pl", transport=replay)
+    start = time.perf_counter()
+
+    assert client.search_nip(SAMPLE_NIP, date="2001-01-01") == expected
+    assert (
+        client.search_nip(SAMPLE_NIP, date="2001-01-01").request_id == "bb222-bb222bbb"
+    )
+    assert (
+        client.search_nip(SAMPLE_NIP, date="2001-01-01").request_id == "bb222-bb222bbb"
+    )
+    assert time.perf_counter() - start < 0.05
+
+    with pytest.raises(LookupError):
+        client.search_nip(SAMPLE_NIP, date="2001-01-02")
+
+
+def test_replay_with_recorded_latency(tmp_path):
+    """Test that recorded latencies are waited for at the given speed."""
+    path = str(tmp_path / "cassette.json.gz")
+    memory = MemoryTransport(latency=0.1)
+    memory.add(NIP_URL, b"{}")
+    recording = RecordingTransport(memory, path)
+    recording.get(NIP_URL)
+    recording.save()
+
+    replay = ReplayTransport(path, speed=2)
+    start = time.perf_counter()
+    replay.get(NIP_URL)
+
+    assert 0.05 <= time.perf_counter() - start < 0.1
+    assert replay.requests == [NIP_URL]
@@ -0,0 +1,68 @@
+"""Test watchlist module."""
+import json
+import re
+
+from vater.client import Client
+from vater.request_types import RawResponse
+from vater.transports import MemoryTransport
+
+
+def make_client(subjects):
+    """Return client answering nips searches with subjects of the mutable dict."""
+
+    def handler(url):
+        """Return registered subjects of the searched nips."""
+        values = re.search(r"search/nips/([\d,]+)", url).group(1).split(",")
+        found = [subjects[nip] for nip in values if nip in subjects]
+        body = {"result": {"subjects": found, "requestId": f"nips-{len(values)}"}}
+        return RawResponse(json.dumps(body).encode())
+
+    transport = MemoryTransport(handler=handler)
+    return Client(base_url="https://wl-test.mf.gov.pl", transport=transport)
+
+
+def test_refresh_emits_changes(subject_dict, nips):
+    """Test that only changed fields of changed subjects are emitted."""
+    subjects = {nip: {**subject_dict, "nip": nip} for nip in nips[:40]}
+    client = make_client(subjects)
+    watchlist = client.watchlist()
+    watchlist.add(nips[:40])
+
+    events = list(watchlist.refresh("2001-01-01"))
+
+    assert len(client.transport.requests) == 2
+    assert [event.kind for event in events] == ["added"] * 40
+    assert events[0].previous_date is None
+
+    assert list(watchlist.refresh("2001-01-02")) == []
+
+    nip = sorted(nips[:40])[3]
+    subjects[nip] = {**subjects[nip], "statusVat": "Zwolniony"}
+    del subjects[nips[0]]
+    events = {event.nip: event for event in watchlist.refresh("2001-01-03")}
+
+    assert events[nip].kind == "changed"
+    assert events[nip].previous_date == "2001-01-01"
+    assert events[nip].changes == {"status_vat": ("Czynny", "Zwolniony")}
+    assert events[nips[0]].kind == "removed"
+    assert len(events) == 2
+    assert len(watchlist.hashes(nip)) == 3
+
+
+def test_watchlist_is_persisted(tmp_path, subject_dict, nips):
+    """Test that states are kept in the database file and removed with the nips."""
+    subjects = {nip: {**subject_dict, "nip": nip} for nip in nips[:2]}
+    client = make_client(subjects)
+    path = str(tmp_path / "watchlist.db")
+    watchlist = client.watchlist(path)
+    watchlist.add(nips[:2])
+    assert len(list(watchlist.refresh("2001-01-01"))) == 2
+    watchlist.close()
+
+    watchlist = client.watchlist(path)
+    assert watchlist.nips == sorted(nips[:2])
+    assert list(watchlist.refresh("2001-01-02")) == []
+
+    watchlist.remove(nips[:1])
+    assert watchlist.nips == [nips[1]]
+    assert watchlist.hashes(nips[0]) == {}